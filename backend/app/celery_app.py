@@ -10,7 +10,8 @@ celery_app = Celery(
         "app.tasks.main_workflow",
         "app.tasks.rss_task",
         "app.tasks.telegram_task",
-        "app.tasks.llm_task"
+        "app.tasks.llm_task",
+        "app.celery_beat"
         ]
 )
 
@@ -20,4 +21,33 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    # LLM-задачи висят на Ollama до минуты и дольше - у них своя очередь и свой воркер,
+    # чтобы не задерживать скраперы (и наоборот)
+    task_routes={
+        "app.tasks.llm_task.process_raw_item": {"queue": os.getenv("LLM_QUEUE", "llm")},
+        "app.tasks.llm_task.process_raw_batch": {"queue": os.getenv("LLM_QUEUE", "llm")},
+    },
+    worker_prefetch_multiplier=1,
+    # Приоритеты LLM-задач (app/utils/llm_priority.py): в Redis каждый уровень - свой список
+    # (llm, llm:3, llm:6, llm:9), воркер выбирает сначала меньший номер
+    broker_transport_options={
+        "priority_steps": [0, 3, 6, 9],
+        "sep": ":",
+        "queue_order_strategy": "priority",
+    },
+    task_default_priority=3,
+    beat_schedule={
+        "run-due-subscriptions": {
+            "task": "app.celery_beat.run_due_subscriptions",
+            "schedule": 300.0,
+        },
+        "check-ollama-hosts": {
+            "task": "app.celery_beat.check_ollama_hosts",
+            "schedule": float(os.getenv("OLLAMA_HEALTH_INTERVAL", "30")),
+        },
+        "retry-deferred-telegram": {
+            "task": "app.tasks.telegram_task.retry_deferred_channels",
+            "schedule": 60.0,
+        },
+    },
 )
\ No newline at end of file
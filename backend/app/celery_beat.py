@@ -1,24 +1,53 @@
+import logging
 from celery import Celery
 from app.celery_app import celery_app
+from app.config import settings
 from app.tasks.main_workflow import trigger_company_monitoring
 from sqlalchemy.orm import Session
 from app.database import SessionLocal
 from app.models.subscription import Subscription
-from datetime import datetime, timedelta
+from app.utils.llm_governor import llm_backlog
+from app.utils.metrics import incr_metrics
+from app.utils.ollama_client import get_ollama_client
+from app.utils.llm_parking import take_parked
+from app.tasks.llm_task import process_raw_item
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+def _is_due(sub: Subscription, now: datetime) -> bool:
+    """Подписка ни разу не запускалась или её интервал уже прошёл."""
+    if sub.last_run_at is None:
+        return True
+    last_run_at = sub.last_run_at
+    if last_run_at.tzinfo is None:
+        last_run_at = last_run_at.replace(tzinfo=timezone.utc)
+    return last_run_at < now - timedelta(hours=sub.interval_hours or 0)
 
 @celery_app.task
 def run_due_subscriptions():
     """Запускает все подписки, чей интервал наступил"""
+    # Backpressure: пока LLM не разобрал очередь, новые скрапы только её растят.
+    # Непрошедшие подписки остаются «просроченными» и запустятся на следующем тике.
+    backlog = llm_backlog()
+    if backlog > settings.LLM_BACKLOG_LIMIT:
+        logger.warning(f"⏸️ LLM backlog {backlog} > {settings.LLM_BACKLOG_LIMIT}, postponing subscriptions")
+        incr_metrics("scheduler", {"postponed_backlog": 1})
+        return {"status": "postponed", "llm_backlog": backlog}
+    # Очередь заполнена больше чем наполовину - запускаем только самые давние подписки
+    max_runs = settings.SCHEDULER_SLOW_BATCH if backlog > settings.LLM_BACKLOG_LIMIT // 2 else None
+
     db: Session = SessionLocal()
     try:
-        now = datetime.utcnow()
-        subs = db.query(Subscription).filter(
-            Subscription.is_active == True,
-            (
-                (Subscription.last_run_at.is_(None)) |
-                (Subscription.last_run_at < now - timedelta(hours=Subscription.interval_hours))
-            )
-        ).all()
+        now = datetime.now(timezone.utc)
+        # Интервал у каждой подписки свой - срок проверяем в Python, от самых давних
+        active = db.query(Subscription).filter(
+            Subscription.is_active == True
+        ).order_by(Subscription.last_run_at.asc().nullsfirst()).all()
+        subs = [sub for sub in active if _is_due(sub, now)][:max_runs]
+        if max_runs is not None:
+            logger.info(f"🐢 LLM backlog {backlog}, launching at most {max_runs} subscriptions")
+            incr_metrics("scheduler", {"slowed_backlog": 1})
 
         for sub in subs:
             trigger_company_monitoring.delay(
@@ -30,4 +59,25 @@ def run_due_subscriptions():
             sub.last_run_at = now
             db.commit()
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+@celery_app.task
+def check_ollama_hosts():
+    """
+    Проверяет хосты Ollama через /api/tags: исключает недоступные и возвращает ожившие.
+    Если есть живой хост - возвращает отложенные элементы в LLM-очередь (не больше,
+    чем позволяет LLM_BACKLOG_LIMIT).
+    """
+    report = get_ollama_client().check_hosts()
+    unhealthy = [host for host, state in report.items() if not state["healthy"]]
+    if unhealthy:
+        logger.warning(f"🩺 Ollama hosts down: {unhealthy}")
+    if len(unhealthy) == len(report):
+        return report
+
+    item_ids = take_parked(settings.LLM_BACKLOG_LIMIT - llm_backlog())
+    for item_id in item_ids:
+        process_raw_item.delay(item_id)
+    if item_ids:
+        logger.info(f"🚚 Ollama is back, re-queued {len(item_ids)} parked items")
+    return report
@@ -12,6 +12,9 @@ class Settings:
 
 
     OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+    # Несколько серверов Ollama через запятую; по умолчанию - только OLLAMA_HOST.
+    # LLM_MAX_CONCURRENCY - общий лимит на все хосты, его стоит поднять вместе с числом хостов
+    OLLAMA_HOSTS = [h.strip() for h in os.getenv("OLLAMA_HOSTS", OLLAMA_HOST).split(",") if h.strip()]
     DATABASE_URL = os.getenv("DATABASE_URL")
     REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
 
@@ -19,5 +22,111 @@ class Settings:
     TELEGRAM_API_HASH = os.getenv("TELEGRAM_API_HASH")
     TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
     TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+    # Один клиент Telethon на процесс воркера: каналов опрашиваем одновременно,
+    # FloodWait короче порога (секунды) клиент переждёт сам, сущности каналов кэшируем в Redis
+    TELEGRAM_CHANNEL_CONCURRENCY = int(os.getenv("TELEGRAM_CHANNEL_CONCURRENCY", "4"))
+    TELEGRAM_FLOOD_SLEEP_THRESHOLD = int(os.getenv("TELEGRAM_FLOOD_SLEEP_THRESHOLD", "5"))
+    # Общий бюджет запросов сессии (все воркеры и слушатель); длинные FloodWait ждут все,
+    # а каналы откладываются и дочитываются задачей retry_deferred_channels
+    TELEGRAM_REQUESTS_PER_MINUTE = int(os.getenv("TELEGRAM_REQUESTS_PER_MINUTE", "30"))
+    TELEGRAM_ENTITY_TTL_DAYS = int(os.getenv("TELEGRAM_ENTITY_TTL_DAYS", "7"))
+    # Каналы читаются от отметки (id последнего сообщения); впервые - только столько последних
+    TELEGRAM_FIRST_RUN_LIMIT = int(os.getenv("TELEGRAM_FIRST_RUN_LIMIT", "20"))
+    # Слушатель (python -m app.telegram_listener) получает сообщения сразу; пока он включён,
+    # beat не опрашивает Telegram (сессия одна). Подписки перечитываются по сигналу /subscribe
+    # или раз в REFRESH, пропуски дочитываются от отметок не реже раза в BACKFILL секунд
+    TELEGRAM_LISTENER_ENABLED = os.getenv("TELEGRAM_LISTENER_ENABLED", "false").lower() == "true"
+    TELEGRAM_LISTENER_JOIN = os.getenv("TELEGRAM_LISTENER_JOIN", "true").lower() == "true"
+    TELEGRAM_LISTENER_POLL_SECONDS = float(os.getenv("TELEGRAM_LISTENER_POLL_SECONDS", "5"))
+    TELEGRAM_LISTENER_REFRESH_SECONDS = int(os.getenv("TELEGRAM_LISTENER_REFRESH_SECONDS", "300"))
+    TELEGRAM_LISTENER_BACKFILL_SECONDS = int(os.getenv("TELEGRAM_LISTENER_BACKFILL_SECONDS", "1800"))
+
+    # Сколько дней помним уже сохранённые в БД URL (seen-set в Redis) и сколько часов
+    # держим блокировку URL, пока элемент ждёт LLM (не дошёл до БД - после неё возьмём снова)
+    SEEN_URL_TTL_DAYS = int(os.getenv("SEEN_URL_TTL_DAYS", "30"))
+    SEEN_CLAIM_TTL_HOURS = int(os.getenv("SEEN_CLAIM_TTL_HOURS", os.getenv("STAGING_TTL_HOURS", "48")))
+
+    # Параллельная загрузка RSS/HTML: всего запросов одновременно и на один хост
+    FETCH_MAX_CONCURRENCY = int(os.getenv("FETCH_MAX_CONCURRENCY", "20"))
+    FETCH_PER_HOST_CONCURRENCY = int(os.getenv("FETCH_PER_HOST_CONCURRENCY", "4"))
+    FETCH_TIMEOUT = float(os.getenv("FETCH_TIMEOUT", "10"))
+
+    # Сколько дней храним ETag / Last-Modified лент и страниц (условный GET)
+    HTTP_CACHE_TTL_DAYS = int(os.getenv("HTTP_CACHE_TTL_DAYS", "14"))
+
+    # Кэш поиска RSS: сколько часов верим «лента найдена» / «ленты нет»,
+    # и пауза для недоступных страниц (удваивается после каждого сбоя)
+    RSS_DISCOVERY_FEED_TTL_HOURS = int(os.getenv("RSS_DISCOVERY_FEED_TTL_HOURS", "168"))
+    RSS_DISCOVERY_NONE_TTL_HOURS = int(os.getenv("RSS_DISCOVERY_NONE_TTL_HOURS", "24"))
+    RSS_DISCOVERY_DEAD_BASE_HOURS = int(os.getenv("RSS_DISCOVERY_DEAD_BASE_HOURS", "2"))
+    RSS_DISCOVERY_DEAD_MAX_HOURS = int(os.getenv("RSS_DISCOVERY_DEAD_MAX_HOURS", "168"))
+
+    # Потоковый конвейер: скраперы отдают элементы в LLM сразу, без chord-барьера
+    PIPELINE_STREAMING = os.getenv("PIPELINE_STREAMING", "true").lower() == "true"
+
+    # Сколько часов сырые элементы ждут LLM во временном хранилище
+    STAGING_TTL_HOURS = int(os.getenv("STAGING_TTL_HOURS", "48"))
+
+    # Отдельная очередь LLM и подбор числа одновременных запросов к Ollama.
+    # LLM_MAX_CONCURRENCY - не больше --concurrency LLM-воркера и OLLAMA_NUM_PARALLEL
+    LLM_QUEUE = os.getenv("LLM_QUEUE", "llm")
+    LLM_MIN_CONCURRENCY = int(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+    LLM_LATENCY_TOLERANCE = float(os.getenv("LLM_LATENCY_TOLERANCE", "2.0"))
+    LLM_BACKOFF_RATIO = float(os.getenv("LLM_BACKOFF_RATIO", "0.7"))
+    LLM_SLOT_TIMEOUT = int(os.getenv("LLM_SLOT_TIMEOUT", "300"))
+    LLM_SLOT_POLL_SECONDS = float(os.getenv("LLM_SLOT_POLL_SECONDS", "0.5"))
+    # Сколько раз элемент можно отложить из-за недоступности Ollama, потом он сохраняется без LLM
+    LLM_PARK_MAX_ATTEMPTS = int(os.getenv("LLM_PARK_MAX_ATTEMPTS", "5"))
+    # Если в LLM-очереди больше задач - новые подписки не запускаем
+    LLM_BACKLOG_LIMIT = int(os.getenv("LLM_BACKLOG_LIMIT", "200"))
+    # ...а если больше половины - не больше стольких подписок за тик
+    SCHEDULER_SLOW_BATCH = int(os.getenv("SCHEDULER_SLOW_BATCH", "5"))
+
+    # Пачки коротких текстов в одном запросе к LLM (num_ctx 2048: инструкция + тексты + ответ)
+    LLM_BATCH_ENABLED = os.getenv("LLM_BATCH_ENABLED", "true").lower() == "true"
+    LLM_BATCH_ITEM_MAX_TOKENS = int(os.getenv("LLM_BATCH_ITEM_MAX_TOKENS", "250"))
+    LLM_BATCH_TOKEN_BUDGET = int(os.getenv("LLM_BATCH_TOKEN_BUDGET", "1000"))
+    LLM_BATCH_MAX_ITEMS = int(os.getenv("LLM_BATCH_MAX_ITEMS", "6"))
+
+    # Кэш результатов LLM по содержимому текста (один пост у нескольких компаний / URL)
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_TTL_DAYS = int(os.getenv("LLM_CACHE_TTL_DAYS", "7"))
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))
+
+    # Сжатие статьи перед промптом: столько токенов текста (num_ctx 2048 - ещё инструкция и ответ)
+    LLM_COMPRESSION_ENABLED = os.getenv("LLM_COMPRESSION_ENABLED", "true").lower() == "true"
+    LLM_INPUT_TOKEN_BUDGET = int(os.getenv("LLM_INPUT_TOKEN_BUDGET", "800"))
+
+    # Элементы с оценкой релевантности ниже порога сохраняются без LLM (одно упоминание в тексте = 0.25)
+    RELEVANCE_FILTER_ENABLED = os.getenv("RELEVANCE_FILTER_ENABLED", "true").lower() == "true"
+    RELEVANCE_THRESHOLD = float(os.getenv("RELEVANCE_THRESHOLD", "0.25"))
+    # Таблица алиасов компаний (JSON {"компания": ["алиас", ...]}) в дополнение к встроенным синонимам
+    COMPANY_ALIASES_FILE = os.getenv("COMPANY_ALIASES_FILE", os.path.join("data", "company_aliases.json"))
+    COMPANY_MATCHER_REFRESH_SECONDS = int(os.getenv("COMPANY_MATCHER_REFRESH_SECONDS", "300"))
+
+    # Сколько часов после публикации новость считается свежей; старше - в конец LLM-очереди
+    LLM_FRESHNESS_HOURS = int(os.getenv("LLM_FRESHNESS_HOURS", "24"))
+
+    # Почти-дубли (один сюжет из разных источников): SimHash по тексту, при желании - эмбеддинги Ollama.
+    # Индекс - кольцевой буфер в data/ (memmap), ищем среди элементов компании за DEDUP_WINDOW_HOURS
+    DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+    DEDUP_INDEX_PATH = os.getenv("DEDUP_INDEX_PATH", os.path.join("data", "story_index.npy"))
+    DEDUP_INDEX_CAPACITY = int(os.getenv("DEDUP_INDEX_CAPACITY", "100000"))
+    DEDUP_WINDOW_HOURS = int(os.getenv("DEDUP_WINDOW_HOURS", "48"))
+    DEDUP_SIMHASH_DISTANCE = int(os.getenv("DEDUP_SIMHASH_DISTANCE", "6"))
+    DEDUP_EMBEDDINGS_ENABLED = os.getenv("DEDUP_EMBEDDINGS_ENABLED", "false").lower() == "true"
+    DEDUP_EMBED_MODEL = os.getenv("DEDUP_EMBED_MODEL", "nomic-embed-text")
+    DEDUP_EMBED_THRESHOLD = float(os.getenv("DEDUP_EMBED_THRESHOLD", "0.9"))
+
+    # Сколько Ollama держит модель в памяти после запроса ("30m", "2h" или секунды, -1 - всегда).
+    # Должно пережить паузу между тиками beat, иначе каждый запуск платит за загрузку модели
+    OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+    OLLAMA_PRELOAD = os.getenv("OLLAMA_PRELOAD", "true").lower() == "true"
+    OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "120"))
+    # Хост исключается из пула после стольких ошибок подряд (или проваленной проверки /api/tags)
+    OLLAMA_EJECT_AFTER_FAILURES = int(os.getenv("OLLAMA_EJECT_AFTER_FAILURES", "3"))
+    OLLAMA_EJECT_SECONDS = int(os.getenv("OLLAMA_EJECT_SECONDS", "60"))
+    OLLAMA_HEALTH_INTERVAL = float(os.getenv("OLLAMA_HEALTH_INTERVAL", "30"))
 
 settings = Settings()
\ No newline at end of file
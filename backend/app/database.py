@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
@@ -7,6 +7,12 @@ engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+def ensure_columns():
+    """create_all не добавляет колонки в существующие таблицы - досоздаём новые вручную."""
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE news_items ADD COLUMN IF NOT EXISTS story_id VARCHAR(32)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_news_items_story_id ON news_items (story_id)"))
+
 def get_db():
     db = SessionLocal()
     try:
@@ -1,17 +1,24 @@
 from http.client import HTTPException
-import os
 from fastapi import FastAPI, Body
 from sqlalchemy.orm import Session
 from typing import List
 from app.tasks.main_workflow import trigger_company_monitoring
-from app.database import Base, engine, SessionLocal
+from app.database import Base, engine, SessionLocal, ensure_columns
 from app.models.subscription import Subscription
+from app.utils.metrics import get_metrics
+from app.utils.ollama_client import get_ollama_client
+from app.utils.llm_parking import parked_count
+from app.utils.llm_priority import queue_wait_percentiles
+from app.utils.run_tracker import get_run
+from app.utils.telegram_rate import deferred_count, flood_remaining
+from app.telegram_listener import notify_subscriptions_changed
 from pydantic import BaseModel, validator
 from datetime import datetime, timezone
 
 app = FastAPI(title="News Aggregator API", version="0.1.0")
 
 Base.metadata.create_all(bind=engine)
+ensure_columns()
 
 class SubscriptionCreate(BaseModel):
     company: str
@@ -55,20 +62,57 @@ def start_monitoring(
 @app.get("/health/ollama")
 def check_ollama():
     """
-    Проверяет подключение к локальному Ollama.
+    Проверяет подключение к хостам Ollama (OLLAMA_HOSTS) и показывает их состояние в пуле.
     """
-    import requests
-    ollama_host = os.getenv("OLLAMA_HOST", "http://host.docker.internal:11434")
+    pool = get_ollama_client()
     try:
-        resp = requests.get(f"{ollama_host}/api/tags", timeout=5)
-        if resp.status_code == 200:
-            models = [m["name"] for m in resp.json().get("models", [])]
-            return {"status": "ok", "ollama_host": ollama_host, "available_models": models}
-        else:
-            return {"status": "error", "details": resp.text}
+        hosts = pool.check_hosts()
+        parked = None
+        try:
+            for host, state in pool.host_states().items():
+                hosts[host].update(state)
+            parked = parked_count()
+        except Exception:
+            # Без Redis нет состояния пула, но результат проверки хостов всё равно полезен
+            pass
+        healthy = [host for host, state in hosts.items() if state["healthy"]]
+        if healthy:
+            return {
+                "status": "ok",
+                "ollama_host": healthy[0],
+                "available_models": hosts[healthy[0]]["models"],
+                "hosts": hosts,
+                "parked_items": parked,
+            }
+        return {"status": "error", "details": "no healthy Ollama hosts", "hosts": hosts, "parked_items": parked}
+    except Exception as e:
+        return {"status": "error", "details": str(e)}
+
+@app.get("/metrics")
+def read_metrics():
+    """
+    Счётчики конвейера (пропущенные дубли, кэши и т.п.).
+    """
+    try:
+        return {
+            **get_metrics(),
+            "llm_queue_wait": queue_wait_percentiles(),
+            "telegram_rate_state": {"flood_seconds_left": round(flood_remaining()), "deferred_channels": deferred_count()},
+        }
     except Exception as e:
         return {"status": "error", "details": str(e)}
     
+@app.get("/runs/{run_id}")
+def read_run(run_id: str):
+    """
+    Ход запуска мониторинга: сколько источников отчиталось,
+    время до первого элемента и первой суммаризации.
+    """
+    run = get_run(run_id)
+    if run is None:
+        return {"status": "not_found", "run_id": run_id}
+    return run
+
 @app.post("/subscribe")
 def create_subscription(sub: SubscriptionCreate):
     print("✅ Received subscription:", sub.dict())
@@ -86,6 +130,7 @@ def create_subscription(sub: SubscriptionCreate):
         db.add(new_sub)
         db.commit()
         db.refresh(new_sub)
+        notify_subscriptions_changed()
         return {"id": new_sub.id, "status": "subscribed" }
     finally:
         db.close()
@@ -118,6 +163,7 @@ def delete_subscription(sub_id: int):
         if sub:
             sub.is_active = False
             db.commit()
+            notify_subscriptions_changed()
             return {"status": "deleted"}
         else:
             raise HTTPException(status_code=404, detail="Subscription not found")
@@ -16,4 +16,6 @@ class NewsItem(Base):
     sentiment = Column(String(20), nullable=True)
     published_at = Column(DateTime(timezone=True), nullable=True)
     processed = Column(Boolean, default=False)
+    # Сюжет: почти-дубли одной новости из разных источников (app/utils/story_index.py)
+    story_id = Column(String(32), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
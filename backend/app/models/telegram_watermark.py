@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+class TelegramWatermark(Base):
+    """Id последнего прочитанного сообщения канала (отдельно для каждой компании)."""
+    __tablename__ = "telegram_watermarks"
+    __table_args__ = (UniqueConstraint("channel", "company", name="uq_telegram_watermark"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    channel = Column(String(100), nullable=False)
+    company = Column(String(100), nullable=False)
+    last_message_id = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,11 @@
+import redis
+from app.config import settings
+
+_client = None
+
+def get_redis_client() -> redis.Redis:
+    """Возвращает общий для процесса клиент Redis (внутри — пул соединений)."""
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _client
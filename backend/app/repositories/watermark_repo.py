@@ -0,0 +1,31 @@
+from sqlalchemy.orm import Session
+from app.models.telegram_watermark import TelegramWatermark
+
+def _normalize(channel: str, company: str) -> tuple[str, str]:
+    return channel.lstrip("@").lower(), company.lower().strip()
+
+def get_watermark(db: Session, channel: str, company: str) -> int:
+    """
+    Id последнего прочитанного сообщения канала для компании, 0 - канал ещё не читали.
+    """
+    channel, company = _normalize(channel, company)
+    row = db.query(TelegramWatermark).filter(
+        TelegramWatermark.channel == channel, TelegramWatermark.company == company
+    ).first()
+    return row.last_message_id if row else 0
+
+def save_watermark(db: Session, channel: str, company: str, message_id: int) -> None:
+    """
+    Сдвигает отметку вперёд (назад - никогда: параллельный запуск мог уйти дальше).
+    """
+    channel, company = _normalize(channel, company)
+    row = db.query(TelegramWatermark).filter(
+        TelegramWatermark.channel == channel, TelegramWatermark.company == company
+    ).first()
+    if row is None:
+        db.add(TelegramWatermark(channel=channel, company=company, last_message_id=message_id))
+    elif message_id > row.last_message_id:
+        row.last_message_id = message_id
+    else:
+        return
+    db.commit()
@@ -1,61 +1,139 @@
+import json
 import logging
-import requests
+import time
+import threading
 from celery import Task
+from celery.signals import worker_ready
 from app.celery_app import celery_app
 from app.config import settings
 from sqlalchemy.orm import Session
 from app.database import SessionLocal
 from app.repositories.new_repo import create_news_item
 from app.utils.telegram_notifier import send_telegram_message
+from app.utils.seen_filter import filter_seen_items, mark_seen, release_seen
+from app.utils.run_tracker import record_emitted, record_summary
+from app.utils.staging import drop_item, load_item, restage_item, stage_items
+from app.utils.llm_governor import llm_backlog, llm_slot
+from app.utils.llm_priority import (
+    PRIORITY_CLASSES, assign_priority, is_overdue, record_queue_wait, task_priority
+)
+from app.utils.llm_cache import cache_key, get_cached_result, get_cached_results, save_result
+from app.utils.ollama_client import OllamaRequestError, OllamaUnavailable, get_ollama_client
+from app.utils.llm_parking import park_items
+from app.utils.metrics import incr_metrics
+from app.utils.tokens import estimate_tokens
+from app.utils.text_compressor import compress_text
+from app.utils.relevance import split_relevant
+from app.utils.story_index import assign_stories
 
 logger = logging.getLogger(__name__)
 
 # Выбираем модель
 DEFAULT_MODEL = "mistral:7b-instruct-q4_K_M"
+DEFAULT_OPTIONS = {"temperature": 0.3, "num_ctx": 2048}
 
-def call_ollama(prompt: str, model: str = DEFAULT_MODEL, temperature: float = 0.3) -> str:
-    """Вызов локального Ollama."""
-    ollama_url = f"{settings.OLLAMA_HOST}/api/generate"
-    payload = {
-        "model": model,
-        "prompt": prompt,
-        "stream": False,
-        "options": {
-            "temperature": temperature,
-            "num_ctx": 2048
-        }
-    }
+# Меняем при любой правке ITEM_PROMPT / BATCH_PROMPT - иначе кэш вернёт ответы старого промпта
+PROMPT_VERSION = "summary-v2"
+
+# Допустимые значения полей (промпт и JSON-схема ответа)
+EVENT_TYPES = ["новость", "слух", "обзор", "критика", "пресс-релиз", "нейтральное упоминание"]
+SENTIMENTS = ["позитивная", "нейтральная", "негативная"]
+
+# Модель иногда отвечает по-английски - такие метки переводим без нового запроса
+EVENT_TYPE_ALIASES = {
+    "news": "новость", "rumor": "слух", "rumour": "слух", "review": "обзор",
+    "criticism": "критика", "press release": "пресс-релиз", "press-release": "пресс-релиз",
+    "neutral mention": "нейтральное упоминание", "mention": "нейтральное упоминание",
+}
+SENTIMENT_ALIASES = {
+    "positive": "позитивная", "neutral": "нейтральная", "negative": "негативная",
+    "позитивный": "позитивная", "нейтральный": "нейтральная", "негативный": "негативная",
+}
+
+_RESULT_PROPERTIES = {
+    "summary": {"type": "string"},
+    "event_type": {"type": "string", "enum": EVENT_TYPES},
+    "sentiment": {"type": "string", "enum": SENTIMENTS},
+}
+ITEM_SCHEMA = {
+    "type": "object",
+    "properties": _RESULT_PROPERTIES,
+    "required": ["summary", "event_type", "sentiment"],
+}
+BATCH_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {"id": {"type": "integer"}, **_RESULT_PROPERTIES},
+        "required": ["id", "summary", "event_type", "sentiment"],
+    },
+}
+
+# Ответ на перевод - одно-два предложения
+TRANSLATION_MAX_TOKENS = 200
+
+def generate_ollama(prompt: str, model: str = DEFAULT_MODEL, temperature: float = 0.3,
+                    format: dict | str | None = None, max_tokens: int | None = None,
+                    kind: str = "item") -> dict:
+    """
+    Вызов локального Ollama, ответ целиком (response + счётчики токенов).
+    kind - вид запроса (item / batch / translate) для регулятора параллельности.
+    Если Ollama недоступен - OllamaUnavailable (сразу, без ожидания таймаута,
+    пока все хосты исключены из пула).
+    """
+    client = get_ollama_client()
+    if not client.is_available():
+        raise OllamaUnavailable("no healthy Ollama hosts")
+    options = {**DEFAULT_OPTIONS, "temperature": temperature}
+    if max_tokens:
+        options["num_predict"] = max_tokens
+    # Число одновременных запросов к Ollama ограничивает общий для всех воркеров регулятор
+    with llm_slot(kind) as slot:
+        started = time.monotonic()
+        try:
+            data = client.generate(prompt, model, options, format)
+            tokens = (data.get("prompt_eval_count") or 0) + (data.get("eval_count") or 0)
+            slot.report(time.monotonic() - started, True, tokens)
+            return data
+        except OllamaUnavailable as e:
+            slot.report(time.monotonic() - started, False)
+            logger.error(f"Ollama request failed: {e}")
+            raise
+
+def call_ollama(prompt: str, model: str = DEFAULT_MODEL, temperature: float = 0.3,
+                format: dict | str | None = None, kind: str = "item") -> str:
+    """Вызов локального Ollama, только текст ответа."""
+    return generate_ollama(prompt, model, temperature, format, kind=kind).get("response", "").strip()
+
+@worker_ready.connect
+def preload_ollama_model(sender=None, **kwargs):
+    """
+    LLM-воркер при старте загружает модель в Ollama, чтобы первый элемент
+    не ждал загрузки. Воркеры других очередей модель не трогают.
+    """
+    if not settings.OLLAMA_PRELOAD:
+        return
     try:
-        resp = requests.post(ollama_url, json=payload, timeout=120)
-        if resp.status_code == 200:
-            return resp.json().get("response", "").strip()
-        else:
-            logger.error(f"Ollama error {resp. status_code}: {resp.text}")
-            return ""
-    except Exception as e:
-        logger.error(f"Ollama request failed: {e}")
-        return ""
+        queues = sender.app.amqp.queues.consume_from or {}
+        if settings.LLM_QUEUE not in queues:
+            return
+    except AttributeError:
+        pass
+
+    def _preload():
+        try:
+            get_ollama_client().preload(DEFAULT_MODEL)
+        except Exception as e:
+            logger.warning(f"⚠️ Ollama model preload failed: {e}")
+
+    threading.Thread(target=_preload, name="ollama-preload", daemon=True).start()
 
 def is_russian(text: str) -> bool:
     # Простая эвристика: доля кириллических символов
     cyrillic = sum(1 for c in text if '\u0400' <= c <= '\u04FF')
     return len(text) > 0 and cyrillic / len(text) > 0.3
 
-@celery_app.task(bind=True, max_retries=2)
-def process_raw_item(self: Task, item: dict) -> dict:
-    """
-    Обрабатывает один элемент (пост, статью, сообщение) через LLM.
-    """
-    title = item.get("title", "")
-    text = item.get("text", "")
-    source = item.get("source", "unknown")
-    url = item.get("url", "")
-
-    if not text.strip():
-        return {**item, "processed": False, "reason": "empty_text"}
-    
-    # Формируем промпт
-    prompt = f"""Ты - аналитик новостей. Тебе дан текст на ЛЮБОМ языке.
+ITEM_PROMPT = """Ты - аналитик новостей. Тебе дан текст на ЛЮБОМ языке.
 
 ЗАДАЧА:
 1. Прочитай текст.
@@ -68,54 +146,230 @@ def process_raw_item(self: Task, item: dict) -> dict:
 - Не используй английские слова в JSON-значениях.
 - Даже если исходный текст на английском - отвечай ТОЛЬКО по-русски.
 
-Текст: {text[:3000]}
+Текст: {text}
 
 Ответ строго в формате JSON без пояснений:
 {{"summary":"...", "event_type": "...", "sentiment": "..."}} 
 """
+
+# Инструкция одна на всю пачку, тексты пронумерованы
+BATCH_PROMPT = """Ты - аналитик новостей. Тебе даны {count} пронумерованных текстов на ЛЮБОМ языке.
+
+ЗАДАЧА для КАЖДОГО текста:
+1. Сделай краткую суммаризацию на РУССКОМ языке (1-2 предложения).
+2. Определи тип события на РУССКОМ: [новость, слух, обзор, критика, пресс-релиз, нейтральное упоминание].
+3. Определи тональность на РУССКОМ: [позитивная, нейтральная, негативная].
+
+ВАЖНО:
+- Весь ответ ДОЛЖЕН быть на РУССКОМ языке
+- Не используй английские слова в JSON-значениях.
+- Тексты не смешивай: каждому номеру - свой объект.
+
+{texts}
+
+Ответ строго JSON-массивом из {count} объектов без пояснений:
+[{{"id": 1, "summary":"...", "event_type": "...", "sentiment": "..."}}, ...]
+"""
+
+TRANSLATE_PROMPT = """Переведи текст на русский язык. Ответь только переводом, без пояснений.
+
+Текст: {text}
+"""
+
+def prepare_item_text(item: dict) -> str:
+    """
+    Текст статьи для промпта: без обвязки и сжатый под LLM_INPUT_TOKEN_BUDGET
+    (лид + самые весомые предложения), а не обрезанный по символам.
+    """
+    text = item.get("text", "")
+    if not settings.LLM_COMPRESSION_ENABLED:
+        return text[:3000]
+    compressed, stats = compress_text(text, settings.LLM_INPUT_TOKEN_BUDGET, [item.get("company", "")])
+    incr_metrics("llm_compression", {
+        "items": 1,
+        "compressed": 1 if stats["tokens_out"] < stats["tokens_in"] else 0,
+        **stats,
+    })
+    return compressed
+
+def build_item_prompt(text: str) -> str:
+    return ITEM_PROMPT.format(text=text)
+
+def build_batch_prompt(texts: list[str]) -> str:
+    numbered = "\n\n".join(f"[{i}] {text}" for i, text in enumerate(texts, 1))
+    return BATCH_PROMPT.format(count=len(texts), texts=numbered)
+
+def parse_llm_result(response: str) -> dict:
+    """Извлекает JSON-объект из ответа (иногда Ollama добавляет markdown)."""
+    start = response.find("{")
+    end = response.rfind("}") + 1
+    parsed = json.loads(response[start:end])
+    return normalize_labels({
+        "summary": parsed.get("summary", ""),
+        "event_type": parsed.get("event_type", ""),
+        "sentiment": parsed.get("sentiment", ""),
+    })
+
+def normalize_labels(result: dict) -> dict:
+    """
+    Приводит event_type и sentiment к допустимым значениям: английские метки
+    переводятся по словарю, неизвестные заменяются нейтральными.
+    """
+    invalid = {}
+    event_type = str(result.get("event_type") or "").strip().lower()
+    event_type = EVENT_TYPE_ALIASES.get(event_type, event_type)
+    if event_type not in EVENT_TYPES:
+        invalid["invalid_event_type"] = 1
+        event_type = "нейтральное упоминание"
+    sentiment = str(result.get("sentiment") or "").strip().lower()
+    sentiment = SENTIMENT_ALIASES.get(sentiment, sentiment)
+    if sentiment not in SENTIMENTS:
+        invalid["invalid_sentiment"] = 1
+        sentiment = "нейтральная"
+    if invalid:
+        incr_metrics("llm_quality", invalid)
+    return {**result, "event_type": event_type, "sentiment": sentiment}
+
+def parse_batch_result(response: str, count: int) -> dict[int, dict]:
+    """
+    Разбирает JSON-массив ответа пачки: {номер текста: результат}.
+    Номера вне диапазона и объекты без summary пропускаются - такие элементы
+    уйдут на обработку по одному. summary не на русском оставляется: его переведут.
+    """
+    start = response.find("[")
+    end = response.rfind("]") + 1
+    if start == -1 or end == 0:
+        return {}
     try:
-        response = call_ollama(prompt)
-        if not is_russian(response):
-            # Повтор с усилением
-            prompt += "\n\nПОВТОРИ ОТВЕТ НА РУССКОМ ЯЗЫКЕ!"
-            response = call_ollama(prompt)
-        # Извлекаем JSON из ответа (иногда Ollama добавляет markdown)
-        import json
-        start = response.find("{")
-        end = response.rfind("}") + 1
-        if start != -1 and end != -1:
-            json_str = response[start:end]
-            parsed = json.loads(json_str)
-            item.update({
-                "summary": parsed.get("summary", ""),
-                "event_type": parsed.get("event_type", "unknown"),
-                "sentiment": parsed.get("sentiment", "neutral"),
-                "processed": True
+        parsed = json.loads(response[start:end])
+    except ValueError:
+        return {}
+
+    results = {}
+    for entry in parsed if isinstance(parsed, list) else []:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            idx = int(entry.get("id"))
+        except (TypeError, ValueError):
+            continue
+        summary = entry.get("summary") or ""
+        if 1 <= idx <= count and summary.strip():
+            results[idx] = normalize_labels({
+                "summary": summary,
+                "event_type": entry.get("event_type", ""),
+                "sentiment": entry.get("sentiment", ""),
             })
-        else:
-            item.update({"processed": False, "error": "invalid_json"})
+    return results
+
+def result_cache_key(text: str) -> str:
+    """Ключ кэша результата LLM для текста при текущих промпте, сжатии, модели и опциях."""
+    prompt_version = PROMPT_VERSION
+    if settings.LLM_COMPRESSION_ENABLED:
+        prompt_version += f":budget={settings.LLM_INPUT_TOKEN_BUDGET}"
+    return cache_key(text, prompt_version, DEFAULT_MODEL, DEFAULT_OPTIONS)
+
+def translate_summary(result: dict, usage: dict) -> bool:
+    """
+    Неверен только язык - переводим короткое summary, а не гоняем текст заново.
+    Токены и исход перевода добавляются в usage. True - summary теперь на русском.
+    """
+    translation = generate_ollama(
+        TRANSLATE_PROMPT.format(text=result["summary"]),
+        temperature=0.1, max_tokens=TRANSLATION_MAX_TOKENS, kind="translate",
+    )
+    usage["translations"] = usage.get("translations", 0) + 1
+    usage["prompt_tokens"] = usage.get("prompt_tokens", 0) + translation.get("prompt_eval_count", 0)
+    usage["eval_tokens"] = usage.get("eval_tokens", 0) + translation.get("eval_count", 0)
+    translated = translation.get("response", "").strip()
+    if is_russian(translated):
+        result["summary"] = translated
+        return True
+    usage["translation_failed"] = usage.get("translation_failed", 0) + 1
+    return False
+
+def summarize_item(item: dict) -> dict:
+    """
+    Суммаризация одного элемента через LLM; результат - в самом item.
+    OllamaUnavailable пробрасывается: такой элемент откладывается, а не сохраняется пустым.
+    """
+    text = item.get("text", "")
+    key = result_cache_key(text) if settings.LLM_CACHE_ENABLED else None
+    if key:
+        cached = get_cached_result(key)
+        if cached:
+            item.update({**cached, "processed": True})
+            return item
+
+    try:
+        # Ответ ограничен JSON-схемой: поля и словари меток гарантирует Ollama
+        data = generate_ollama(build_item_prompt(prepare_item_text(item)), format=ITEM_SCHEMA)
+        result = parse_llm_result(data.get("response", ""))
+        usage = {
+            "items": 1,
+            "prompt_tokens": data.get("prompt_eval_count", 0),
+            "eval_tokens": data.get("eval_count", 0),
+        }
+        if result["summary"] and not is_russian(result["summary"]):
+            if not translate_summary(result, usage):
+                logger.warning(f"⚠️ Summary is still not in Russian for {item.get('url', '')}")
+        incr_metrics("llm_quality", usage)
+        item.update({**result, "processed": True})
+        if key and is_russian(result["summary"]):
+            save_result(key, result)
+    except OllamaUnavailable:
+        raise
     except Exception as e:
-        logger.error(f"LLM processing failed for {url}: {e}")
+        logger.error(f"LLM processing failed for {item.get('url', '')}: {e}")
         item.update({"processed": False, "error": str(e)})
-    
-    # сохранить в БД
+    return item
+
+def _news_item_record(item: dict) -> dict:
+    """Поля записи news_items из элемента конвейера."""
+    return {
+        "source": item.get("source", "unknown"),
+        "company": item.get("company", ""),
+        "url": item.get("url", ""),
+        "title": item.get("title", ""),
+        "raw_text": item.get("text", ""),
+        "summary": item.get("summary", ""),
+        "event_type": item.get("event_type", ""),
+        "sentiment": item.get("sentiment", ""),
+        "published_at": item.get("date") or item.get("published"),
+        "processed": item.get("processed", True),
+        "story_id": item.get("story_id"),
+    }
+
+def store_unprocessed_items(items: list[dict]) -> None:
+    """
+    Сохраняет элементы без LLM и без уведомления (не про компанию или повтор
+    известного сюжета): сырой текст остаётся в БД, а seen-фильтр не пропустит их снова.
+    """
+    if not items:
+        return
+    saved = []
+    db: Session = SessionLocal()
+    try:
+        for item in items:
+            create_news_item(db, _news_item_record({**item, "processed": False}))
+            saved.append(item["url"])
+    except Exception as e:
+        logger.error(f"❌ DB save of unprocessed items failed: {e}")
+        release_seen([item["url"] for item in items[len(saved):]])
+    finally:
+        db.close()
+    mark_seen(saved)
+
+def save_processed_item(item: dict) -> None:
+    """Сохраняет обработанный элемент в БД и шлёт уведомление о новой записи."""
+    stored = False
     db: Session = SessionLocal()
     try:
         # Подготавлчиваем данные для БД
-        db_item = {
-            "source": item.get("source", "unknown"),
-            "company": item.get("company", ""),
-            "url": item.get("url", ""),
-            "title": item.get("title", ""),
-            "raw_text": item.get("text", ""),
-            "summary": item.get("summary", ""),
-            "event_type": item.get("event_type", ""),
-            "sentiment": item.get("sentiment", ""),
-            "published_at": item.get("date") or item.get("published"),
-            "processed": item.get("processed", True),
-        }
+        db_item = _news_item_record(item)
         logger.info(f"Saving item with date: {item.get('date')}, published_at: {db_item['published_at']}")
         saved = create_news_item(db, db_item)
+        stored = True
         if saved:
             logger.info(f"✅ Saved to DB: {saved.url}")
             message = (
@@ -130,39 +384,272 @@ def process_raw_item(self: Task, item: dict) -> dict:
         logger.error(f"❌ DB save failed for {item.get('url')}: {e}")
     finally:
         db.close()
-    
-    return item
+
+    # Не сохранили - отпускаем URL, чтобы следующий запуск взял элемент снова
+    if item.get("url"):
+        (mark_seen if stored else release_seen)([item["url"]])
+
+    if item.get("run_id"):
+        record_summary(item["run_id"])
+
+@celery_app.task(bind=True, max_retries=2, ignore_result=True)
+def process_raw_item(self: Task, item_id: str) -> dict:
+    """
+    Обрабатывает один элемент (пост, статью, сообщение) через LLM.
+    Сам элемент лежит во временном хранилище, в задачу приходит только его id.
+    """
+    item = load_item(item_id)
+    if item is None:
+        logger.warning(f"⚠️ Staged item {item_id} expired or already processed")
+        return {"item_id": item_id, "processed": False, "reason": "expired"}
+
+    if not item.get("text", "").strip():
+        drop_item(item_id)
+        return {"item_id": item_id, "processed": False, "reason": "empty_text"}
+
+    # Новость устарела, пока ждала: уступаем место свежим, если они есть в очереди
+    if is_overdue(item) and self.request.retries == 0 and llm_backlog() > 0:
+        item["priority_class"] = "stale"
+        restage_item(item_id, item)
+        process_raw_item.apply_async(args=[item_id], priority=PRIORITY_CLASSES["stale"])
+        incr_metrics("llm_priority", {"demoted": 1})
+        return {"item_id": item_id, "processed": False, "reason": "demoted"}
+
+    record_queue_wait(item)
+    started = time.monotonic()
+    try:
+        summarize_item(item)
+    except OllamaUnavailable:
+        # Элемент ждёт в хранилище; check_ollama_hosts вернёт его в очередь, когда Ollama оживёт
+        if not park_items([item_id]):
+            return {"item_id": item_id, "processed": False, "reason": "parked"}
+        # Откладывали слишком много раз - сохраняем сырой текст, чтобы не ходить по кругу
+        store_unprocessed_items([item])
+        drop_item(item_id)
+        return {"item_id": item_id, "processed": False, "reason": "park_attempts_exhausted"}
+    incr_metrics("llm_throughput", {"single_items": 1, "single_seconds": time.monotonic() - started})
+
+    if not item.get("processed") and self.request.retries < self.max_retries:
+        # Ответ не разобрался - пробуем ещё раз, а не сохраняем пустую запись навсегда
+        incr_metrics("llm_quality", {"parse_retries": 1})
+        raise self.retry(countdown=30)
+
+    save_processed_item(item)
+    drop_item(item_id)
+    # Результат задачи никто не читает - только краткая сводка
+    return {"item_id": item_id, "processed": item.get("processed", False)}
+
+@celery_app.task(bind=True, ignore_result=True)
+def process_raw_batch(self: Task, item_ids: list[str]) -> dict:
+    """
+    Обрабатывает пачку коротких элементов (посты, анонсы из RSS) одним запросом к LLM.
+    Элементы, для которых ответ не разобрался, уходят в process_raw_item по одному.
+    """
+    staged = [(item_id, load_item(item_id)) for item_id in item_ids]
+    staged = [(item_id, item) for item_id, item in staged if item is not None]
+    if not staged:
+        return {"items": 0, "processed": 0}
+    for _, item in staged:
+        record_queue_wait(item)
+
+    # Тексты, которые уже суммаризировали (тот же пост у другой компании), - без LLM
+    cached_count = 0
+    if settings.LLM_CACHE_ENABLED:
+        keys = [result_cache_key(item["text"]) for _, item in staged]
+        misses = []
+        for (item_id, item), key, cached in zip(staged, keys, get_cached_results(keys)):
+            if cached is None:
+                misses.append((item_id, item, key))
+                continue
+            item.update({**cached, "processed": True})
+            save_processed_item(item)
+            drop_item(item_id)
+        cached_count = len(staged) - len(misses)
+        staged = [(item_id, item) for item_id, item, _ in misses]
+        keys = [key for _, _, key in misses]
+        if not staged:
+            return {"items": cached_count, "processed": cached_count}
+
+    started = time.monotonic()
+    try:
+        response = call_ollama(build_batch_prompt([item["text"] for _, item in staged]), format=BATCH_SCHEMA, kind="batch")
+    except OllamaUnavailable:
+        exhausted = set(park_items([item_id for item_id, _ in staged]))
+        if exhausted:
+            store_unprocessed_items([item for item_id, item in staged if item_id in exhausted])
+            for item_id in exhausted:
+                drop_item(item_id)
+        return {"items": cached_count + len(staged), "processed": cached_count,
+                "parked": len(staged) - len(exhausted)}
+    except OllamaRequestError as e:
+        # Хост исправен, не удался сам запрос - элементы пойдут по одному, со своими повторами
+        logger.error(f"Batch LLM request failed: {e}")
+        response = ""
+    results = parse_batch_result(response, len(staged))
+    # summary не на русском - переводим его, а не отправляем элемент на второй полный прогон
+    usage = {}
+    for idx, result in list(results.items()):
+        if is_russian(result["summary"]):
+            continue
+        try:
+            translated = translate_summary(result, usage)
+        except (OllamaUnavailable, OllamaRequestError) as e:
+            logger.warning(f"⚠️ Batch summary translation failed: {e}")
+            translated = False
+        if not translated:
+            del results[idx]
+    if usage:
+        incr_metrics("llm_quality", usage)
+    incr_metrics("llm_throughput", {
+        "batch_calls": 1,
+        "batch_items": len(results),
+        "batch_seconds": time.monotonic() - started,
+        "batch_fallback_items": len(staged) - len(results),
+    })
+
+    for idx, (item_id, item) in enumerate(staged, 1):
+        if idx not in results:
+            process_raw_item.apply_async(args=[item_id], priority=task_priority(item))
+            continue
+        item.update({**results[idx], "processed": True})
+        if settings.LLM_CACHE_ENABLED:
+            save_result(keys[idx - 1], results[idx])
+        save_processed_item(item)
+        drop_item(item_id)
+
+    if len(results) < len(staged):
+        logger.warning(f"⚠️ Batch parsed {len(results)}/{len(staged)} items, rest sent to single-item path")
+    return {"items": cached_count + len(staged), "processed": cached_count + len(results)}
+
+def plan_llm_batches(items: list[tuple[str, int]]) -> tuple[list[list[str]], list[str]]:
+    """
+    Делит элементы (id, токенов в тексте) на пачки коротких текстов под бюджет
+    токенов и одиночные. Возвращает (пачки id, одиночные id). Пачка из одного элемента - одиночный.
+    """
+    batches, singles = [], []
+    current, current_tokens = [], 0
+    for item_id, tokens in items:
+        if not settings.LLM_BATCH_ENABLED or not tokens or tokens > settings.LLM_BATCH_ITEM_MAX_TOKENS:
+            singles.append(item_id)
+            continue
+        if current and (current_tokens + tokens > settings.LLM_BATCH_TOKEN_BUDGET
+                        or len(current) >= settings.LLM_BATCH_MAX_ITEMS):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(item_id)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+
+    singles.extend(batch[0] for batch in batches if len(batch) == 1)
+    return [batch for batch in batches if len(batch) > 1], singles
+
+def _stage_new_items(items: list, run_id: str = None) -> tuple[list[tuple[str, dict]], dict]:
+    """
+    Отбрасывает уже виденные элементы, нерелевантные компании и почти-дубли
+    известных сюжетов сохраняет без LLM, остальные кладёт во временное хранилище.
+    Возвращает ([(id, элемент)], счётчики seen-фильтра).
+    """
+    fresh, seen_stats = filter_seen_items(items)
+    try:
+        new_items, irrelevant = split_relevant(fresh)
+        new_items, duplicates = assign_stories(new_items)
+        store_unprocessed_items(irrelevant + duplicates)
+        seen_stats["irrelevant"] = len(irrelevant)
+        seen_stats["duplicates"] = len(duplicates)
+        for item in new_items:
+            assign_priority(item)
+            if run_id:
+                item["run_id"] = run_id
+        item_ids = stage_items(new_items)
+    except Exception:
+        # До LLM элементы не дошли - URL занят зря (уже сохранённые отсеет проверка по БД)
+        release_seen([item["url"] for item in fresh])
+        raise
+
+    if run_id:
+        record_emitted(run_id, len(items), len(item_ids))
+    return list(zip(item_ids, new_items)), seen_stats
+
+def _staged_entries(staged: list[tuple[str, dict]]) -> list[list]:
+    """Что нужно для постановки в очередь без самого элемента: [id, класс приоритета, токенов в тексте]."""
+    return [[item_id, item["priority_class"], estimate_tokens(item.get("text", ""))] for item_id, item in staged]
+
+def dispatch_staged(entries: list[list]) -> int:
+    """
+    Ставит LLM-задачи по записям [id, класс приоритета, токены]. Общая для потокового
+    режима и chord. Возвращает число поставленных задач.
+    """
+    # Свежее и заметное - раньше: у каждого класса свой приоритет в брокере,
+    # пачки собираются внутри класса
+    by_class = {}
+    for item_id, priority_class, tokens in entries:
+        by_class.setdefault(priority_class, []).append((item_id, tokens))
+
+    submitted = 0
+    for priority_class, class_items in by_class.items():
+        priority = PRIORITY_CLASSES.get(priority_class, PRIORITY_CLASSES["normal"])
+        # Короткие тексты - пачками в один запрос, длинные - по одному
+        batches, singles = plan_llm_batches(class_items)
+        for batch in batches:
+            process_raw_batch.apply_async(args=[batch], priority=priority)
+        for item_id in singles:
+            process_raw_item.apply_async(args=[item_id], priority=priority)
+        submitted += len(batches) + len(singles)
+        incr_metrics("llm_priority", {priority_class: len(class_items)})
+    return submitted
+
+def stage_for_llm(items: list, run_id: str = None) -> tuple[list[list], dict]:
+    """
+    То же, что _stage_new_items, но без постановки задач: для chord, где их ставит колбэк.
+    Возвращает записи [id, класс приоритета, токены] для dispatch_staged.
+    """
+    staged, seen_stats = _stage_new_items(items, run_id)
+    return _staged_entries(staged), seen_stats
+
+def enqueue_for_llm(items: list, run_id: str = None) -> dict:
+    """
+    Ставит новые элементы в LLM-очередь (в сообщениях - только id).
+    В потоковом режиме скраперы вызывают её на каждую пачку сразу, как только её собрали.
+    """
+    staged, seen_stats = _stage_new_items(items, run_id)
+    submitted = dispatch_staged(_staged_entries(staged))
+
+    return {
+        "total_raw_items": len(items),
+        "skipped_seen": len(items) - len(staged) - seen_stats["irrelevant"] - seen_stats["duplicates"],
+        "skipped_irrelevant": seen_stats["irrelevant"],
+        "skipped_duplicates": seen_stats["duplicates"],
+        "seen_stats": seen_stats,
+        "llm_tasks_submitted": submitted,
+    }
 
 @celery_app.task
 def process_collected_items(results: list, company_name: str) -> dict:
     """
-    Получает список результатов от всех задач +название компании и отправляет каждый элемент в LLM.
+    Получает записи staged-элементов от всех задач +название компании и ставит LLM-задачи
+    так же, как потоковый режим: по классам приоритета и пачками.
+    Скраперы уже отфильтровали виденное и положили элементы во временное хранилище.
     """
     logger.info(f"Recieved {len(results)} results for company '{company_name}'")
-    logger.info(f"Raw results from group: {results}")
     
-    all_items = []
+    entries = []
     for result in results:
         logger.info(f"Processing result of type {type(result)}: {len(result) if isinstance(result, (list, tuple)) else 'not a list'} ")
         
         if isinstance(result, list):
-            all_items.extend(result)
+            for entry in result:
+                # Голый id - результат скрапера, запущенного до обновления
+                entries.append([entry, "normal", 0] if isinstance(entry, str) else entry)
         else:
             logger.warning(f"Unexpected result type: {type(result)} - skipping")
     
-    logger.info(f"Total raw items collected: {len(all_items)}")
-    
-    # Отправляем каждый элемент в LMM
-    for item in all_items:
-        # Убедимся, что item - dict
-        if isinstance(item, dict):
-            process_raw_item.delay(item)
-        else:
-            logger.warning(f"Skipping non-dict item: {item}")
-    
+    logger.info(f"Total staged items collected: {len(entries)}")
+
+    submitted = dispatch_staged(entries)
+
     return {
         "company": company_name,
-        "total_raw_items": len(all_items),
-        "llm_tasks_submitted": len(all_items),
+        "llm_tasks_submitted": submitted,
         "status": "llm_processing_started"
     }
\ No newline at end of file
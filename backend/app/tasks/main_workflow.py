@@ -1,28 +1,42 @@
-from celery import chord
+import uuid
+from celery import chord, group
 from app.celery_app import celery_app
+from app.config import settings
 from app.tasks.rss_task import scrape_rss_or_html
 from app.tasks.telegram_task import scrape_telegram_channels
 from app.tasks.llm_task import process_collected_items
+from app.utils.run_tracker import start_run
 from datetime import datetime, timezone
 
 @celery_app.task(bind=True)
 def trigger_company_monitoring(self, company_name: str, sources: list, urls: list = None, telegram_channels: list = None):
     """
     Основной workflow мониторинга компании.
+
+    В потоковом режиме (PIPELINE_STREAMING) скраперы сами отдают элементы
+    в LLM-стадию по мере сбора, иначе - chord: LLM ждёт все источники.
     """
     task_start_time = datetime.now(timezone.utc).isoformat()
+    # run_id совпадает с id задачи - по нему ход запуска виден в GET /runs/{run_id}
+    run_id = (self.request.id or str(uuid.uuid4())) if settings.PIPELINE_STREAMING else None
     jobs = []
 
     # RSS/HTML
     if "rss" in sources and urls:
-        jobs.append(scrape_rss_or_html.s(company_name, urls, task_start_time))
+        jobs.append(scrape_rss_or_html.s(company_name, urls, task_start_time, run_id=run_id))
 
-    # Telegram
-    if "telegram" in sources and telegram_channels:
-        jobs.append(scrape_telegram_channels.s(company_name, telegram_channels, task_start_time))
+    # Telegram. При включённом слушателе сессией владеет он и сообщения приходят сами:
+    # опрос из воркера открыл бы тот же файл сессии одновременно со слушателем
+    if "telegram" in sources and telegram_channels and not settings.TELEGRAM_LISTENER_ENABLED:
+        jobs.append(scrape_telegram_channels.s(company_name, telegram_channels, task_start_time, run_id=run_id))
 
     if not jobs:
         return {"error": "No valid sources provided", "status": "failed"}
+
+    if run_id:
+        start_run(run_id, company_name, len(jobs))
+        group(jobs).apply_async()
+        return {"run_id": run_id, "status": "workflow_started"}
     
     # chord: выполнить jobs,затем вызвать callback
     result = chord(jobs)(process_collected_items.s(company_name))
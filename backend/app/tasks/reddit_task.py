@@ -5,7 +5,6 @@ from typing import List, Optional
 from celery import Task
 from app.celery_app import celery_app
 from app.reddit_client import get_reddit_client
-from app.config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -84,9 +83,8 @@ def scrape_reddit_for_company(
         logger.info(f"✅ Found {len(results)} Reddit posts for '{company_name}'")
 
         # TODO: отправить результат на LLM-обработку
-        # from .llm_task import process_raw_item
-        # for item in results:
-        #       process_raw_item.delay(item)
+        # from .llm_task import enqueue_for_llm
+        # enqueue_for_llm(results)
 
         return {
             "company": company_name,
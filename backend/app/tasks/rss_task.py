@@ -1,30 +1,55 @@
+import asyncio
 import logging
 import feedparser
-import requests
 from urllib.parse import urljoin, urlparse
-from trafilatura import fetch_url, extract
+from trafilatura import extract
 from celery import Task
 from app.celery_app import celery_app
-from bs4 import BeautifulSoup
-from app.utils.date_utils import extract_data_from_html
+from app.tasks.llm_task import enqueue_for_llm, stage_for_llm
+from app.utils.date_utils import extract_date_from_tree
+from app.utils.discovery_cache import DISCOVERY_DEAD, get_discovery, mark_dead, save_discovery
+from app.utils.fetcher import AsyncFetcher
+from app.utils.html_utils import parse_html
+from app.utils.metrics import incr_metrics
+from app.utils.run_tracker import source_done
 from datetime import datetime, timezone
 
 logger = logging.getLogger(__name__)
 
+class SourceUnavailable(Exception):
+    """Лента или страница не загрузилась (нет ответа, 4xx/5xx)."""
+
+    def __init__(self, url: str, status: int | None):
+        super().__init__(f"{url}: {status or 'no response'}")
+        self.url = url
+        self.status = status
+
 def is_valid_url(url: str) -> bool:
     parsed = urlparse(url)
     return bool(parsed.netloc and parsed.scheme)
 
-def extract_artlicle_from_url(article_url: str) -> dict | None:
-    """Извлекает заголовок и текст из статьи."""
+async def extract_artlicle_from_url(fetcher: AsyncFetcher, article_url: str) -> dict | None:
+    """Загружает статью и извлекает из неё заголовок и текст."""
+    page = await fetcher.get_page(article_url)
+    if page is None or not page.ok or not page.content:
+        return None
+    # Разбор HTML - работа для CPU, не держим на нём event loop
+    return await asyncio.to_thread(parse_article_html, page.content, article_url, page.encoding)
+
+def parse_article_html(downloaded: str | bytes, article_url: str, encoding: str | None = None) -> dict | None:
+    """
+    Извлекает заголовок, текст и дату из уже загруженного HTML статьи.
+    HTML разбирается в lxml один раз, trafilatura и поиск даты работают по одному дереву.
+    encoding - charset из заголовка ответа.
+    """
     try:
-        downloaded = fetch_url(article_url)
-        if not downloaded:
-            return None
-        
+        tree = parse_html(downloaded, encoding)
+        # Дату ищем до trafilatura: та чистит дерево под себя
+        published_date = extract_date_from_tree(tree, article_url)
+
         # Сначала пробуем trafilatura
         result = extract(
-            downloaded,
+            tree,
             include_comments=False,
             only_with_metadata=False,
             url=article_url
@@ -58,7 +83,6 @@ def extract_artlicle_from_url(article_url: str) -> dict | None:
 
         # Дополнительно: ищем дату в HTML, если trafilatura не нашла
         if not item["date"]:
-            published_date = extract_data_from_html(downloaded, article_url)
             if published_date:
                 logger.info(f"✅ Date extracted: {published_date} from source: {article_url}")
                 item["date"] = published_date.isoformat()
@@ -72,72 +96,161 @@ def extract_artlicle_from_url(article_url: str) -> dict | None:
         return None
 
 @celery_app.task(bind=True, max_retries=2)
-def scrape_rss_or_html(self: Task, company_name: str, urls: list, since: str = None) -> list:
+def scrape_rss_or_html(self: Task, company_name: str, urls: list, since: str = None, run_id: str = None) -> list | dict:
     """
     Парсит список URL: сначала как RSS, если не вышло - как HTML.
+    Все ленты, страницы и статьи загружаются параллельно.
+
+    С run_id (потоковый режим) элементы каждого источника сразу уходят
+    в LLM-стадию, а задача возвращает только сводку. Без run_id -
+    id новых элементов во временном хранилище (для chord).
     """
-    flat_urls = flatten_list(urls)
-    logger.info(f"📡 Starting RSS/HTML scrape for '{company_name}' from {len(urls)} URLs")
-    logger.info(f"Processing URLs: {urls}")
-    for i, url in enumerate(urls):
-        logger.info(f"  [{i}] type={type(url)}, value={repr(url)}")
+    try:
+        return _scrape_rss_or_html(company_name, urls, since, run_id)
+    finally:
+        if run_id:
+            source_done(run_id)
 
+def _scrape_rss_or_html(company_name: str, urls: list, since: str = None, run_id: str = None) -> list | dict:
     if not isinstance(urls, list):
         logger.error(f"❌ urls is not a list: {type(urls)} = {urls}")
         return []
 
-    results = []
-    for url in flat_urls:
+    logger.info(f"📡 Starting RSS/HTML scrape for '{company_name}' from {len(urls)} URLs")
+    logger.info(f"Processing URLs: {urls}")
+
+    clean_urls = []
+    for url in flatten_list(urls):
         if not isinstance(url, str):
             logger.warning(f"⚠️ Skipping non-string URL: {url} (type: {type(url)})")
             continue
         url = url.strip()
-        if not url:
-            continue    
+        if url:
+            clean_urls.append(url)
+
+    results, staged = asyncio.run(_scrape_sources(company_name, clean_urls, since, run_id))
+
+    logger.info(f"Total items from {company_name}: {len(results)}")
+    if run_id:
+        return {"company": company_name, "source": "rss", "items": len(results), "streamed": True}
+    return staged
+
+async def _scrape_sources(company_name: str, urls: list[str], since: str = None,
+                          run_id: str = None) -> tuple[list, list]:
+    """
+    Обходит все источники одновременно через общий пул соединений.
+    Возвращает (элементы, записи staged-элементов для chord; в потоковом режиме пусто).
+    """
+    async with AsyncFetcher(cache_scope=company_name) as fetcher:
+        batches = await asyncio.gather(
+            *(_scrape_source(fetcher, url, company_name, since, run_id) for url in urls)
+        )
+        # gather сохраняет порядок - элементы идут в том же порядке, что и URL
+        items = [item for batch in batches for item in batch]
+        # Для chord элементы кладём во временное хранилище до выхода из fetcher:
+        # ETag / Last-Modified он сохраняет, только если это удалось, иначе
+        # следующий запуск получил бы 304 и элементы пропали бы
+        staged = [] if run_id else (await asyncio.to_thread(stage_for_llm, items))[0]
+    return items, staged
+
+async def _scrape_source(fetcher: AsyncFetcher, url: str, company_name: str, since: str = None, run_id: str = None) -> list:
+    """Один источник: RSS, если найден, иначе обход как новостной страницы."""
+    rss_url = None
+    discovery = get_discovery(url)
+    if discovery:
+        incr_metrics("rss_discovery", {f"hit_{discovery['status']}": 1})
+        if discovery["status"] == DISCOVERY_DEAD:
+            logger.info(f"⏭️ Source backed off after {discovery['failures']} failures: {url}")
+            return []
+    else:
+        incr_metrics("rss_discovery", {"miss": 1})
 
-    for url in flat_urls:
-        rss_url = find_rss_url(url)
+    try:
+        rss_url = discovery["rss_url"] if discovery else await find_rss_url(fetcher, url)
         if rss_url:
             logger.info(f"✅ RSS found at {rss_url}, parsing...")
-            items = parse_via_rss(rss_url)
+            items = await parse_via_rss(fetcher, rss_url)
         else:
             logger.info(f"🔄 No RSS at {url}, crawling as news site...")
-            items = parse_via_html_news_crawler(url, since=since)
-        
-        # Добавляем метаданные и компанию источника
-        for item in items:
-            item.update({
-                "source": "rss" if rss_url else "html_crawler",
-                "company": company_name
-            })
-        results.extend(items)
-    
-    logger.info(f"Total items from {company_name}: {len(results)}")
-    return results
+            items = await parse_via_html_news_crawler(fetcher, url, since=since)
+    except SourceUnavailable as e:
+        # Лента или страница из кэша поиска умерла - без этого её качали бы
+        # каждый запуск до конца срока записи. Сбой самой страницы при свежем
+        # поиске уже отметил find_rss_url - второй раз не считаем
+        if discovery or e.url != url:
+            record = mark_dead(url)
+            logger.warning(f"⚠️ Source unavailable ({e}), failure #{record['failures']}: {url}")
+        fetcher.forget(url)
+        if rss_url:
+            fetcher.forget(rss_url)
+        return []
+    except Exception as e:
+        logger.error(f"❌ Failed to scrape {url}: {e}")
+        # Источник не обработан - в следующий раз качаем его целиком
+        fetcher.forget(url)
+        if rss_url:
+            fetcher.forget(rss_url)
+        return []
+
+    # Добавляем метаданные и компанию источника
+    for item in items:
+        item.update({
+            "source": "rss" if rss_url else "html_crawler",
+            "company": company_name
+        })
+
+    # Потоковый режим: не ждём остальные источники
+    # (seen-фильтр, БД, индекс сюжетов - в отдельном потоке, чтобы не останавливать загрузки)
+    if run_id and items:
+        await asyncio.to_thread(enqueue_for_llm, items, run_id)
+    return items
 
-def find_rss_url(html_url: str) -> str | None:
-    """Ищет RSS-ссылку на странице."""
+async def find_rss_url(fetcher: AsyncFetcher, html_url: str) -> str | None:
+    """
+    Ищет RSS-ссылку на странице. Результат (лента / ленты нет / страница
+    недоступна) запоминается в кэше поиска RSS и переиспользуется между запусками.
+    """
+    page = await fetcher.get_page(html_url, conditional=True)
+    if page is None or page.status_code >= 400:
+        record = mark_dead(html_url)
+        logger.warning(f"⚠️ Source unavailable ({page.status_code if page else 'no response'}), "
+                       f"failure #{record['failures']}: {html_url}")
+        return None
+    # Страница не менялась - берём результат поиска с прошлого запуска
+    if page.not_modified:
+        rss_url = page.cached.get("rss_url")
+        save_discovery(html_url, rss_url)
+        return rss_url
     try:
-        resp = requests.get(html_url, timeout=10, headers={'User-Agent': 'news-aggregator'})
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        # Ищем <link rel="alternate" type="application/rss+xml">
-        rss_link = soup.find('link', {'type': 'application/rss+xml'})
-        if rss_link and rss_link.get('href'):
-            rss_url = rss_link['href']
+        # URL уже указывает на ленту - разбирать её будем из тех же байтов
+        if page.is_feed:
+            rss_url = html_url
+        else:
+            # Ищем <link rel="alternate" type="application/rss+xml">
+            rss_links = page.tree.xpath('//link[@type="application/rss+xml"][@href]')
             # Обрабатываем относительные URL
-            from urllib.parse import urljoin
-            return urljoin(html_url, rss_url)
+            rss_url = urljoin(html_url, rss_links[0].get('href')) if rss_links else None
+        fetcher.annotate(html_url, rss_url=rss_url)
+        save_discovery(html_url, rss_url)
+        return rss_url
     except Exception as e:
         logger.warning(f"Failed to detect RSS at {html_url}: {e}")
     return None
 
-def parse_via_rss(rss_url: str, since: str = None) -> list:
+async def parse_via_rss(fetcher: AsyncFetcher, rss_url: str, since: str = None) -> list:
     since_dt = None
     if since:
         since_dt = datetime.fromisoformat(since.replace("Z","+00:00"))
 
-    feed = feedparser.parse(rss_url)
+    page = await fetcher.get_page(rss_url, conditional=True)
+    if page is not None and page.not_modified:
+        logger.info(f"⏭️ Feed not modified since last run: {rss_url}")
+        return []
+    if page is None or page.status_code >= 400:
+        raise SourceUnavailable(rss_url, page.status_code if page else None)
+    if not page.ok:
+        return []
+    feed = feedparser.parse(page.content, response_headers=page.headers)
     items = []
     for entry in feed.entries:
         pub_date = None
@@ -160,15 +273,18 @@ def parse_via_rss(rss_url: str, since: str = None) -> list:
         })
     return items
 
-def extract_news_links_from_page(base_url: str) -> list[str]:
+async def extract_news_links_from_page(fetcher: AsyncFetcher, base_url: str) -> list[str]:
     """Извлекает ссылки на отдельные новости со страницы-агрегатора."""
+    page = await fetcher.get_page(base_url, conditional=True)
+    if page is None or page.status_code >= 400:
+        raise SourceUnavailable(base_url, page.status_code if page else None)
+    if page.not_modified:
+        logger.info(f"⏭️ Page not modified since last run: {base_url}")
+        return []
     try:
-        resp = requests.get(base_url, timeout=10, headers={'User-Agent': 'news-aggregator'})
-        soup = BeautifulSoup(resp.text, 'html.parser')
-
         links = set()
-        for a in soup.find_all('a', href=True):
-            href = a['href']
+        for a in page.tree.xpath('//a[@href]'):
+            href = a.get('href')
             full_url = urljoin(base_url, href)
             # Фильтруем внешние ссылки
             if base_url in full_url or full_url.startswith(base_url):
@@ -180,7 +296,7 @@ def extract_news_links_from_page(base_url: str) -> list[str]:
         logger.error(f"Failed to extract news links from {base_url}: {e}")
         return []
 
-def parse_via_html_news_crawler(base_url: str, since: str = None) -> list:
+async def parse_via_html_news_crawler(fetcher: AsyncFetcher, base_url: str, since: str = None) -> list:
     """Парсит страницу как новостной агрегатор."""
     since_dt = None
     if since:
@@ -190,10 +306,12 @@ def parse_via_html_news_crawler(base_url: str, since: str = None) -> list:
             logger.warning(f"Failed to parse 'since' date: {e}")
 
     logger.info(f"🔍 No RSS found. Crawling as news page: {base_url}")
-    news_links = extract_news_links_from_page(base_url)
+    news_links = await extract_news_links_from_page(fetcher, base_url)
+    articles = await asyncio.gather(
+        *(extract_artlicle_from_url(fetcher, link) for link in news_links)
+    )
     items = []
-    for link in news_links:
-        article = extract_artlicle_from_url(link)
+    for link, article in zip(news_links, articles):
         if article:
             article_date = None
             if article.get("date"):
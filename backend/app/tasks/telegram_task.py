@@ -1,113 +1,228 @@
-import os
+import asyncio
 import logging
 from telethon import TelegramClient
-from telethon.errors import FloodWaitError
+from telethon.errors import ChannelInvalidError, FloodWaitError
 from celery import Task
+from celery.signals import worker_shutdown
 from app.celery_app import celery_app
 from app.config import settings
-from datetime import datetime, timezone
+from app.database import SessionLocal
+from app.repositories.watermark_repo import get_watermark, save_watermark
+from app.tasks.llm_task import enqueue_for_llm, stage_for_llm
+from app.utils.run_tracker import source_done
+from app.utils.company_matcher import get_company_matcher, get_matcher_for
+from app.utils.metrics import incr_metrics
+from app.utils.telegram_rate import acquire, charge_pages, defer_channel, record_flood, take_due_channels
+from app.utils.telegram_client import (
+    forget_channel, get_telegram_client, resolve_channel, run_telegram, shutdown_telegram
+)
+from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
-SESSION_FILE = os.path.join("data", "telegram.session")
-
-async def _create_client():
-    """Создаёт клиент только при необходимости."""
-    client = TelegramClient(SESSION_FILE, settings.TELEGRAM_API_ID, settings.TELEGRAM_API_HASH)
-    await client.connect()
-    if not await client.is_user_authorized():
-        raise RuntimeError("Telegram session not authorized. Run auth_telegram.py first!")
-    return client
-
 def is_relevant_to_company(text: str, company: str) -> bool:
     """
-    Проверяет, относится ли текст к компании.
+    Проверяет, относится ли текст к компании: название или алиас целым словом.
     """
     if not text or not company:
         return False
-    
-    text_lower = text.lower()
-    company_lower = company.lower()
-
-    # Базовое совпадение
-    if company_lower in text_lower:
-        return True
-    
-    # Синонимы
-    synonyms = {
-        "apple": ["iphone", "ipad", "macOS","iwatch", "airpods", "mac", "ios", "aapl", "tim cook"],
-        "nvidia": ["rtx", "geforce", "cuda", "nvda", "jensen huang"],
-        "microsoft": ["windows", "azure", "msft", "satya nadella"],
-        "tesla": ["elon musk", "model s", "model 3", "tsla", "cybertruck"],
+    return company.lower().strip() in get_company_matcher([company]).match(text)
+
+def telegram_item(company_name: str, channel_username: str, message, mentioned: set[str] = ()) -> dict:
+    """
+    Элемент конвейера из сообщения Telethon; mentioned - все компании, найденные в нём автоматом.
+    Сообщение уже прошло проверку упоминания компании (matched) - фильтр релевантности его не отбросит.
+    """
+    return {
+        "source": "telegram",
+        "company": company_name,
+        "matched": True,
+        "companies_mentioned": sorted(mentioned),
+        "title": "",    # в Telegram обычно нет заголовков
+        "text": message.message,
+        "url": f"https://t.me/{channel_username}/{message.id}",
+        "date": message.date.isoformat(),
+        "views": getattr(message, "views", None),
     }
 
-    for synonym in synonyms.get(company_lower, []):
-        if synonym in text_lower:
-            return True
+def load_watermark(channel: str, company: str) -> int:
+    db = SessionLocal()
+    try:
+        return get_watermark(db, channel, company)
+    finally:
+        db.close()
 
-    return False
+def store_watermark(channel: str, company: str, message_id: int) -> None:
+    db = SessionLocal()
+    try:
+        save_watermark(db, channel, company, message_id)
+    except Exception as e:
+        logger.error(f"❌ Failed to save watermark for @{channel}: {e}")
+    finally:
+        db.close()
 
-async def _scrape_telegram_channel(channel_username: str, company_name: str, since: str = None, limit: int = 50):
+async def _scrape_telegram_channel(client: TelegramClient, channel_username: str, company_name: str,
+                                   min_id: int = 0, since: str = None, limit: int | None = None) -> tuple[list, int, int]:
+    """
+    Сообщения канала новее min_id, относящиеся к компании, id самого нового
+    прочитанного сообщения (новая отметка) и сколько сообщений прочитано. Без limit Telethon листает
+    историю страницами до min_id - всплеск постов между запусками не теряется.
+    """
     since_dt = None
     if since:
         since_dt = datetime.fromisoformat(since.replace("Z", "+00:00"))
 
-    client = await _create_client()
     messages = []
+    last_id = min_id
+    read = 0
+    # Общий автомат активных подписок, один раз на канал, а не на каждое сообщение
+    matcher = get_matcher_for([company_name])
+    company = company_name.lower().strip()
     try:
-        async for message in client.iter_messages(channel_username, limit=limit):
+        try:
+            peer = await resolve_channel(client, channel_username)
+        except (ValueError, ChannelInvalidError):
+            # Устаревший кэш сущности - разрешаем username заново
+            forget_channel(channel_username)
+            peer = await resolve_channel(client, channel_username)
+        async for message in client.iter_messages(peer, limit=limit, min_id=min_id):
+            last_id = max(last_id, message.id)
+            read += 1
             if not message.message or not message.date:
                 continue
             if since_dt and message.date < since_dt:
                 break
 
-            text = message.message
-            if not is_relevant_to_company(text, company_name):
+            mentioned = matcher.match(message.message)
+            if company not in mentioned:
                 continue
 
-            messages.append({
-                "text": message.message,
-                "url": f"https://t.me/{channel_username}/{message.id}",
-                "date": message.date.isoformat(),
-                "views": getattr(message, "views", None),  
-            })
+            messages.append(telegram_item(company_name, channel_username, message, mentioned))
     except FloodWaitError as e:
         logger.warning(f"Flood wait for {e.seconds} seconds")
         raise
-    finally:
-        await client.disconnect()
-    return messages
+    return messages, last_id, read
 
 @celery_app.task(bind=True)
-def scrape_telegram_channels(self: Task, company_name: str, channel_usernames: list, since: str = None) -> dict:
+def scrape_telegram_channels(self: Task, company_name: str, channel_usernames: list, since: str = None, run_id: str = None) -> list | dict:
     """
     Собирает последние сообщения из публичных Telegram-каналов.
+
+    С run_id (потоковый режим) сообщения каждого канала сразу уходят
+    в LLM-стадию, а задача возвращает только сводку. Без run_id -
+    id новых сообщений во временном хранилище (для chord).
     """
-    import asyncio
+    try:
+        return _scrape_telegram_channels(company_name, channel_usernames, run_id)
+    finally:
+        if run_id:
+            source_done(run_id)
+
+@worker_shutdown.connect
+def _disconnect_telegram(**kwargs):
+    shutdown_telegram()
 
+def _scrape_telegram_channels(company_name: str, channel_usernames: list, run_id: str = None) -> list | dict:
     logger.info(f"📨 Scraping Telegram channels for '{company_name}':{channel_usernames}")
 
-    # Инициализация клиента (авторизация один раз)
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
+    # Клиент и его loop живут в процессе воркера между задачами
+    all_messages, watermarks = run_telegram(_scrape_channels(company_name, channel_usernames, run_id))
 
-    all_messages = []
-    for username in channel_usernames:
-        try:
-            msgs = loop.run_until_complete(_scrape_telegram_channel(username, company_name, limit=20))
-            for msg in msgs:
-                all_messages.append({
-                    "source": "telegram",
-                    "company": company_name,
-                    "title": "",    # в Telegram обычно нет заголовков
-                    "text": msg["text"],
-                    "url": msg["url"],
-                    "date": msg["date"],
-                })
-        except Exception as e:
-            logger.error(f"Failed to scrape @{username}: {e}")
-            continue
-    
-    loop.close()
-
-    return all_messages
\ No newline at end of file
+    if run_id:
+        return {"company": company_name, "source": "telegram", "items": len(all_messages), "streamed": True}
+    staged = stage_for_llm(all_messages)[0]
+    # Отметки сдвигаем только после того, как сообщения сохранены во временном хранилище
+    for username, last_id in watermarks.items():
+        store_watermark(username, company_name, last_id)
+    return staged
+
+async def _scrape_channels(company_name: str, channel_usernames: list, run_id: str = None,
+                          defer: bool = True) -> tuple[list, dict]:
+    """
+    Каналы опрашиваются параллельно, не больше TELEGRAM_CHANNEL_CONCURRENCY одновременно.
+    Читается всё новее отметки канала; новые отметки (в потоковом режиме уже
+    сохранённые) возвращаются вместе с сообщениями.
+
+    Перед каналом берётся запрос из общего бюджета сессии; при FloodWait
+    или исчерпанном бюджете канал не читается, а откладывается (defer) -
+    его дочитает retry_deferred_channels.
+    """
+    client = await get_telegram_client()
+    semaphore = asyncio.Semaphore(settings.TELEGRAM_CHANNEL_CONCURRENCY)
+
+    watermarks = {}
+
+    async def scrape(username: str) -> list:
+        async with semaphore:
+            wait = await asyncio.to_thread(acquire)
+            if wait:
+                if defer:
+                    await asyncio.to_thread(defer_channel, company_name, username, wait)
+                return []
+            try:
+                watermark = await asyncio.to_thread(load_watermark, username, company_name)
+                # Канал читаем впервые - только последние сообщения, а не всю историю
+                limit = None if watermark else settings.TELEGRAM_FIRST_RUN_LIMIT
+                channel_items, last_id, read = await _scrape_telegram_channel(
+                    client, username, company_name, min_id=watermark, limit=limit
+                )
+            except FloodWaitError as e:
+                # Ждать должны все воркеры, а не только этот: следующий канал продлил бы FloodWait
+                await asyncio.to_thread(record_flood, e.seconds)
+                if defer:
+                    await asyncio.to_thread(defer_channel, company_name, username, e.seconds)
+                return []
+            except Exception as e:
+                logger.error(f"Failed to scrape @{username}: {e}")
+                return []
+            incr_metrics("telegram_rate", {"success": 1})
+            await asyncio.to_thread(charge_pages, read)
+            # Потоковый режим: канал готов - не ждём остальные
+            # (Redis/БД - в отдельном потоке, чтобы не останавливать loop клиента)
+            if run_id and channel_items:
+                await asyncio.to_thread(enqueue_for_llm, channel_items, run_id)
+            if last_id > watermark:
+                if run_id:
+                    await asyncio.to_thread(store_watermark, username, company_name, last_id)
+                watermarks[username] = last_id
+            if channel_items or last_id > watermark:
+                logger.info(f"📨 @{username}: {len(channel_items)} relevant, watermark {watermark} -> {last_id}")
+            return channel_items
+
+    results = await asyncio.gather(*(scrape(username) for username in channel_usernames))
+    return [item for channel_items in results for item in channel_items], watermarks
+
+async def backfill_channels(company_name: str, channel_usernames: list, defer: bool = False) -> int:
+    """
+    Дочитывает каналы от отметок и сразу ставит найденное в LLM-очередь
+    (слушатель Telegram - при старте, после переподключения и пропусков).
+    Слушателю откладывать каналы не нужно: их дочитает его следующий backfill.
+    """
+    items, watermarks = await _scrape_channels(company_name, channel_usernames, defer=defer)
+    if items:
+        await asyncio.to_thread(enqueue_for_llm, items)
+    for username, last_id in watermarks.items():
+        await asyncio.to_thread(store_watermark, username, company_name, last_id)
+    return len(items)
+
+async def _retry_deferred(channels: dict[str, list[str]]) -> int:
+    items = 0
+    for company_name, usernames in channels.items():
+        items += await backfill_channels(company_name, usernames, defer=True)
+    return items
+
+@celery_app.task
+def retry_deferred_channels() -> dict:
+    """
+    Дочитывает каналы, отложенные из-за FloodWait или бюджета запросов
+    (по beat). Найденное сразу идёт в LLM-очередь.
+    """
+    if settings.TELEGRAM_LISTENER_ENABLED:
+        # Сессией владеет слушатель, он сам дочитывает пропуски
+        return {"status": "skipped", "reason": "listener"}
+    channels = take_due_channels()
+    if not channels:
+        return {"channels": 0}
+    logger.info(f"🔁 Retrying deferred Telegram channels: {channels}")
+    items = run_telegram(_retry_deferred(channels))
+    return {"channels": sum(len(c) for c in channels.values()), "items": items}
@@ -0,0 +1,190 @@
+"""
+Слушатель Telegram: отдельный долгоживущий процесс вместо опроса каналов по beat.
+
+Новые сообщения подписанных каналов приходят через events.NewMessage и сразу
+уходят в LLM-стадию. Пропуски (старт, обрыв соединения, дыра в id сообщений)
+дочитываются от отметок каналов. Запуск: python -m app.telegram_listener
+"""
+import asyncio
+import logging
+import time
+from telethon import events
+from telethon.errors import FloodWaitError
+from telethon.tl.functions.channels import JoinChannelRequest
+from app.config import settings
+from app.database import SessionLocal
+from app.models.subscription import Subscription
+from app.redis_client import get_redis_client
+from app.tasks.llm_task import enqueue_for_llm
+from app.tasks.telegram_task import backfill_channels, load_watermark, store_watermark, telegram_item
+from app.utils.company_matcher import get_matcher_for
+from app.utils.metrics import incr_metrics
+from app.utils.telegram_rate import record_flood
+from app.utils.telegram_client import get_telegram_client, resolve_channel, run_telegram, shutdown_telegram
+
+logger = logging.getLogger(__name__)
+
+# Меняется при каждом /subscribe и отписке - слушатель перечитывает каналы сразу
+SUBSCRIPTIONS_VERSION_KEY = "telegram:subscriptions:version"
+
+def notify_subscriptions_changed() -> None:
+    try:
+        get_redis_client().incr(SUBSCRIPTIONS_VERSION_KEY)
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to notify Telegram listener: {e}")
+
+def subscribed_channels() -> dict[str, list[str]]:
+    """Каналы активных подписок: username -> компании."""
+    db = SessionLocal()
+    try:
+        channels = {}
+        for sub in db.query(Subscription).filter(Subscription.is_active == True).all():
+            for username in sub.get_telegram_channels():
+                companies = channels.setdefault(username.lstrip("@").lower(), [])
+                if sub.company not in companies:
+                    companies.append(sub.company)
+        return channels
+    finally:
+        db.close()
+
+class TelegramListener:
+    def __init__(self):
+        self.client = None
+        self.companies = {}     # username -> компании
+        self.channel_ids = {}   # id канала -> username
+        self.last_ids = {}      # username -> id последнего сообщения, отданного в конвейер
+        self.gaps = set()       # каналы с пропуском в id - дочитать
+        self.version = None
+        self.refreshed_at = 0.0
+        self.backfilled_at = 0.0
+
+    async def refresh_channels(self) -> dict[str, list[str]]:
+        """
+        Перечитывает подписки, если они изменились (или раз в TELEGRAM_LISTENER_REFRESH_SECONDS).
+        Возвращает новые пары канал -> компании, которые нужно дочитать.
+        """
+        version = await asyncio.to_thread(get_redis_client().get, SUBSCRIPTIONS_VERSION_KEY)
+        if version == self.version and time.time() - self.refreshed_at < settings.TELEGRAM_LISTENER_REFRESH_SECONDS:
+            return {}
+        self.version = version
+        self.refreshed_at = time.time()
+
+        channels = await asyncio.to_thread(subscribed_channels)
+        added = {}
+        for username, companies in channels.items():
+            if username not in self.companies:
+                try:
+                    peer = await resolve_channel(self.client, username)
+                    if settings.TELEGRAM_LISTENER_JOIN:
+                        # Обновления приходят только по каналам, где аккаунт участник
+                        await self.client(JoinChannelRequest(peer))
+                except FloodWaitError as e:
+                    # Канал подключится при следующем перечитывании подписок
+                    await asyncio.to_thread(record_flood, e.seconds)
+                    continue
+                except Exception as e:
+                    logger.error(f"❌ Cannot listen to @{username}: {e}")
+                    continue
+                self.channel_ids[peer.channel_id] = username
+            new_companies = [c for c in companies if c not in self.companies.get(username, [])]
+            if new_companies:
+                added[username] = new_companies
+            self.companies[username] = companies
+
+        for username in set(self.companies) - set(channels):
+            del self.companies[username]
+            self.last_ids.pop(username, None)
+            self.channel_ids = {cid: name for cid, name in self.channel_ids.items() if name != username}
+        if added:
+            logger.info(f"👂 Listening to {len(self.companies)} channels, added: {sorted(added)}")
+        return added
+
+    async def backfill(self, channels: dict[str, list[str]]) -> None:
+        """Дочитывает каналы от отметок и запоминает, с какого id продолжают события."""
+        by_company = {}
+        for username, companies in channels.items():
+            for company in companies:
+                by_company.setdefault(company, []).append(username)
+
+        items = 0
+        for company, usernames in by_company.items():
+            items += await backfill_channels(company, usernames)
+        for username in channels:
+            if username in self.companies:
+                marks = [await asyncio.to_thread(load_watermark, username, c) for c in self.companies[username]]
+                self.last_ids[username] = min(marks)
+            self.gaps.discard(username)
+        incr_metrics("telegram_listener", {"backfills": 1, "backfilled_items": items})
+
+    async def on_message(self, event) -> None:
+        message = event.message
+        username = self.channel_ids.get(getattr(message.peer_id, "channel_id", None))
+        if username is None:
+            return
+        companies = self.companies.get(username, [])
+        last_id = self.last_ids.get(username)
+        # id сообщений канала идут подряд: разрыв значит, что что-то пропущено.
+        # Отметку не двигаем - её дочитает backfill, иначе пропущенное потеряется
+        contiguous = last_id is not None and message.id <= last_id + 1
+
+        # Один проход общим автоматом - все компании сообщения сразу
+        # (список подписок он изредка перечитывает из БД - не в event loop)
+        matcher = await asyncio.to_thread(get_matcher_for, companies)
+        mentioned = matcher.match(message.message or "")
+        items = [
+            telegram_item(company, username, message, mentioned)
+            for company in companies
+            if company.lower().strip() in mentioned and message.date
+        ]
+        incr_metrics("telegram_listener", {"messages": 1, "matched": len(items)})
+        if items:
+            await asyncio.to_thread(enqueue_for_llm, items)
+
+        if contiguous:
+            self.last_ids[username] = max(last_id, message.id)
+            for company in companies:
+                await asyncio.to_thread(store_watermark, username, company, message.id)
+        else:
+            self.gaps.add(username)
+
+    async def run(self) -> None:
+        self.client = await get_telegram_client()
+        self.client.add_event_handler(self.on_message, events.NewMessage())
+        await self.backfill(await self.refresh_channels())
+        self.backfilled_at = time.time()
+
+        while True:
+            await asyncio.sleep(settings.TELEGRAM_LISTENER_POLL_SECONDS)
+            try:
+                if not self.client.is_connected():
+                    # Пока соединения не было, обновления могли потеряться
+                    logger.warning("⚠️ Telegram listener disconnected, reconnecting")
+                    incr_metrics("telegram_listener", {"reconnects": 1})
+                    await get_telegram_client()
+                    await self.backfill(dict(self.companies))
+                    self.backfilled_at = time.time()
+                    continue
+
+                added = await self.refresh_channels()
+                if added:
+                    await self.backfill(added)
+
+                # Периодически - на случай тихих пропусков (Telethon переподключился сам)
+                if time.time() - self.backfilled_at > settings.TELEGRAM_LISTENER_BACKFILL_SECONDS:
+                    await self.backfill(dict(self.companies))
+                    self.backfilled_at = time.time()
+                elif self.gaps:
+                    await self.backfill({u: self.companies[u] for u in list(self.gaps) if u in self.companies})
+            except Exception as e:
+                logger.error(f"❌ Telegram listener tick failed: {e}")
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    logger.info("👂 Starting Telegram listener")
+    try:
+        run_telegram(TelegramListener().run())
+    finally:
+        shutdown_telegram()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+import pytest
+from app.utils import company_matcher
+
+@pytest.fixture(autouse=True)
+def no_active_subscriptions(monkeypatch):
+    """Тесты не ходят в БД за активными подписками: общий автомат пуст, берутся автоматы наборов."""
+    monkeypatch.setattr(company_matcher, "active_companies", lambda: [])
+    monkeypatch.setattr(company_matcher, "_active", None)
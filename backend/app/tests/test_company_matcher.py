@@ -0,0 +1,46 @@
+from app.utils.company_matcher import CompanyMatcher
+
+MATCHER = CompanyMatcher({
+    "apple": ["iphone", "mac", "ios", "tim cook"],
+    "nvidia": ["geforce", "jensen huang"],
+    "meta": ["facebook", "instagram"],
+})
+
+def test_match_returns_every_company_in_one_scan():
+    text = "Tim Cook and Jensen Huang met; Instagram was not discussed."
+    assert MATCHER.match(text) == {"apple", "nvidia", "meta"}
+
+def test_match_respects_word_boundaries():
+    assert MATCHER.match("A new machine learning BIOS update") == set()
+    assert MATCHER.match("metadata pipelines") == set()
+    assert MATCHER.match("New Mac, new iOS!") == {"apple"}
+
+def test_overlapping_patterns():
+    matcher = CompanyMatcher({"model": [], "model 3": [], "tesla": ["model 3"]})
+    assert matcher.match("Tesla Model 3 deliveries") == {"tesla", "model", "model 3"}
+
+def test_mentions_report_position_and_name_vs_alias():
+    mentions = MATCHER.mentions("Apple said the iPhone and Facebook ads")
+    assert mentions["apple"] == [(0, True), (15, False)]
+    assert mentions["meta"] == [(26, False)]
+
+def test_active_subscriptions_share_one_matcher(monkeypatch):
+    from app.utils import company_matcher, relevance
+
+    monkeypatch.setattr(company_matcher, "active_companies", lambda: ["Apple", "Nvidia", "Meta"])
+    active = company_matcher.get_active_matcher()
+    assert company_matcher.get_matcher_for(["apple"]) is active
+    # Компания без подписки - отдельный автомат
+    assert company_matcher.get_matcher_for(["tesla"]) is not active
+
+    items = [{"company": "apple", "title": "", "text": "Apple and Nvidia sign a chip deal.", "source": "rss"}]
+    relevance.split_relevant(items)
+    assert items[0]["companies_mentioned"] == ["apple", "nvidia"]
+
+def test_matcher_cache_is_bounded(monkeypatch):
+    from app.utils import company_matcher
+
+    monkeypatch.setattr(company_matcher, "MATCHER_CACHE_SIZE", 3)
+    for i in range(10):
+        company_matcher.get_company_matcher([f"company{i}"])
+    assert len(company_matcher._matchers) == 3
@@ -1,5 +1,6 @@
 from datetime import datetime
-from app.utils.date_utils import extract_data_from_html
+from app.utils.date_utils import clear_date_cache, extract_data_from_html, extract_date_from_tree
+from app.utils.html_utils import parse_html
 
 def test_extract_date_from_apple_newsroom():
     html = """
@@ -16,4 +17,47 @@ def test_extract_date_from_apple_newsroom():
 def test_extract_date_from_text():
     html = "<html><body>Press Release<br>January 29, 2026</body></html>"
     result = extract_data_from_html(html, "https://example.com")
-    assert result == datetime(2026, 1, 29)
\ No newline at end of file
+    assert result == datetime(2026, 1, 29)
+
+def test_extract_date_from_parsed_tree():
+    html = b"""<?xml version="1.0" encoding="utf-8"?>
+    <html><head>
+    <script type="application/ld+json">{"datePublished": "2026-01-15T12:00:00+00:00"}</script>
+    </head><body><h1>Quarterly results</h1></body></html>
+    """
+    result = extract_date_from_tree(parse_html(html), "https://example.com")
+    assert result.isoformat() == "2026-01-15T12:00:00+00:00"
+
+def test_structured_date_wins_over_text():
+    html = """
+    <html><head><meta property="article:published_time" content="2026-02-10T08:30:00Z"></head>
+    <body><p class="date">January 3, 2025</p></body></html>
+    """
+    result = extract_data_from_html(html, "https://example.com/a")
+    assert result.isoformat() == "2026-02-10T08:30:00+00:00"
+
+def test_date_memoized_per_url():
+    clear_date_cache()
+    first = parse_html("<html><body><p class='date'>5 March 2026</p></body></html>")
+    second = parse_html("<html><body><p>no date here</p></body></html>")
+    assert extract_date_from_tree(first, "https://example.com/b") == datetime(2026, 3, 5)
+    assert extract_date_from_tree(second, "https://example.com/b") == datetime(2026, 3, 5)
+
+def test_date_cache_is_thread_safe(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from app.utils import date_utils
+
+    monkeypatch.setattr(date_utils, "DATE_CACHE_SIZE", 4)
+    clear_date_cache()
+
+    def worker(n):
+        for i in range(2000):
+            key = (f"https://example.com/{(n + i) % 8}",)
+            date_utils._cache_get(key)
+            date_utils._cache_put(key, None)
+
+    with ThreadPoolExecutor(8) as pool:
+        for future in [pool.submit(worker, n) for n in range(8)]:
+            future.result()
+    assert len(date_utils._date_cache) <= 4
+    clear_date_cache()
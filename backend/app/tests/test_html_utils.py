@@ -0,0 +1,30 @@
+import httpx
+from app.tasks.rss_task import parse_article_html
+from app.utils.fetcher import Page
+from app.utils.html_utils import parse_html, visible_text
+
+TITLE = "Заголовок новости про Яндекс"
+BODY = " ".join(["Яндекс запустил новый сервис для бизнеса и рассказал о планах на год."] * 5)
+HTML = f"<html><head><title>{TITLE}</title></head><body><article><h1>{TITLE}</h1><p>{BODY}</p></article></body></html>"
+
+def _page(body: bytes, content_type: str) -> Page:
+    response = httpx.Response(200, content=body, headers={"content-type": content_type})
+    return Page("https://example.ru/news/1", response)
+
+def test_header_charset_without_meta():
+    page = _page(HTML.encode("utf-8"), "text/html; charset=utf-8")
+    assert TITLE in visible_text(page.tree)
+
+    item = parse_article_html(page.content, page.url, page.encoding)
+    assert "Яндекс запустил новый сервис" in item["text"]
+
+def test_header_charset_wins_for_legacy_encoding():
+    page = _page(HTML.encode("cp1251"), "text/html; charset=windows-1251")
+    assert TITLE in visible_text(page.tree)
+
+def test_utf8_bytes_without_any_charset():
+    assert TITLE in visible_text(parse_html(HTML.encode("utf-8")))
+
+def test_meta_charset_still_used():
+    html = HTML.replace("<head>", '<head><meta charset="windows-1251">')
+    assert TITLE in visible_text(parse_html(html.encode("cp1251")))
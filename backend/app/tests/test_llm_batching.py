@@ -0,0 +1,59 @@
+from app.tasks.llm_task import parse_batch_result, plan_llm_batches
+from app.utils.tokens import estimate_tokens
+
+def test_parse_batch_result_maps_by_id():
+    response = """```json
+    [{"id": 2, "summary": "Компания выпустила новый чип.", "event_type": "новость", "sentiment": "позитивная"},
+     {"id": 1, "summary": "Акции упали после отчёта.", "event_type": "новость", "sentiment": "негативная"}]
+    ```"""
+    results = parse_batch_result(response, 2)
+    assert results[1]["sentiment"] == "негативная"
+    assert results[2]["summary"].startswith("Компания")
+
+def test_parse_batch_result_keeps_english_for_translation_skips_out_of_range():
+    response = '[{"id": 1, "summary": "Shares fell."}, {"id": 2, "summary": ""}, {"id": 7, "summary": "Акции упали."}]'
+    results = parse_batch_result(response, 2)
+    assert list(results) == [1]
+    assert results[1]["summary"] == "Shares fell."
+    assert parse_batch_result("not json", 2) == {}
+
+def test_plan_llm_batches_splits_short_and_long():
+    short = estimate_tokens("Apple выпустила новый iPhone.")
+    long = estimate_tokens("word " * 1000)
+    items = [("a", short), ("b", long), ("c", short), ("d", 0)]
+    batches, singles = plan_llm_batches(items)
+    assert batches == [["a", "c"]]
+    assert sorted(singles) == ["b", "d"]
+
+def test_estimate_tokens_counts_cyrillic_heavier():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("привет мир") > estimate_tokens("hello world")
+
+def test_chord_callback_batches_by_priority_class(monkeypatch):
+    from app.tasks import llm_task
+
+    sent = []
+
+    class Task:
+        def __init__(self, name):
+            self.name = name
+
+        def apply_async(self, args, priority):
+            sent.append((self.name, args[0], priority))
+
+    monkeypatch.setattr(llm_task, "process_raw_batch", Task("batch"))
+    monkeypatch.setattr(llm_task, "process_raw_item", Task("item"))
+    monkeypatch.setattr(llm_task, "incr_metrics", lambda group, counters: None)
+
+    results = [
+        [["a", "urgent", 50], ["b", "urgent", 50], ["c", "low", 5000]],
+        [["d", "urgent", 50]],
+        "not a list",
+    ]
+    result = llm_task.process_collected_items(results, "Apple")
+
+    assert sorted(sent) == [
+        ("batch", ["a", "b", "d"], llm_task.PRIORITY_CLASSES["urgent"]),
+        ("item", "c", llm_task.PRIORITY_CLASSES["low"]),
+    ]
+    assert result["llm_tasks_submitted"] == 2
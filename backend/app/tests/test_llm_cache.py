@@ -0,0 +1,16 @@
+from app.utils.llm_cache import cache_key, normalize_text
+
+OPTIONS = {"temperature": 0.3, "num_ctx": 2048}
+
+def test_same_text_same_key():
+    a = cache_key("Apple  raises\nprices", "summary-v1", "mistral", OPTIONS)
+    b = cache_key(" apple raises prices ", "summary-v1", "mistral", dict(reversed(list(OPTIONS.items()))))
+    assert a == b
+    assert normalize_text("Apple  Inc\t") == "apple inc"
+
+def test_key_depends_on_prompt_model_and_options():
+    base = cache_key("Apple raises prices", "summary-v1", "mistral", OPTIONS)
+    assert base != cache_key("Apple raises prices", "summary-v2", "mistral", OPTIONS)
+    assert base != cache_key("Apple raises prices", "summary-v1", "llama3", OPTIONS)
+    assert base != cache_key("Apple raises prices", "summary-v1", "mistral", {**OPTIONS, "temperature": 0.7})
+    assert base != cache_key("Apple cuts prices", "summary-v1", "mistral", OPTIONS)
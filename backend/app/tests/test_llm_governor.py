@@ -0,0 +1,43 @@
+from app.utils import llm_governor
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+
+    def hgetall(self, key):
+        return {k: str(v) for k, v in self.hashes.get(key, {}).items()}
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+
+def _governor(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(llm_governor, "get_redis_client", lambda: client)
+    monkeypatch.setattr(llm_governor, "incr_metrics", lambda group, counters: None)
+    monkeypatch.setattr(llm_governor.settings, "LLM_MIN_CONCURRENCY", 1)
+    monkeypatch.setattr(llm_governor.settings, "LLM_MAX_CONCURRENCY", 4)
+    return client
+
+def test_short_translation_does_not_collapse_limit(monkeypatch):
+    _governor(monkeypatch)
+    limits = []
+    # Короткий перевод за 3 с, потом обычные суммаризации по 30 с - работы в них больше
+    llm_governor._adjust_limit(3.0, True, "translate", 300)
+    for _ in range(6):
+        llm_governor._adjust_limit(30.0, True, "item", 1000)
+        limits.append(llm_governor.current_limit())
+    assert limits[-1] == 4
+
+def test_batches_of_different_size_compared_per_token(monkeypatch):
+    _governor(monkeypatch)
+    llm_governor._adjust_limit(5.0, True, "batch", 400)
+    llm_governor._adjust_limit(15.0, True, "batch", 1200)
+    assert llm_governor.current_limit() == 3
+
+def test_queueing_latency_backs_off(monkeypatch):
+    _governor(monkeypatch)
+    for _ in range(3):
+        llm_governor._adjust_limit(10.0, True, "item", 1000)
+    for _ in range(5):
+        llm_governor._adjust_limit(60.0, True, "item", 1000)
+    assert llm_governor.current_limit() == 1
@@ -0,0 +1,33 @@
+from app.tasks import llm_task
+from app.tasks.llm_task import EVENT_TYPES, ITEM_SCHEMA, SENTIMENTS, normalize_labels, parse_llm_result
+
+def test_parse_llm_result_keeps_valid_labels():
+    result = parse_llm_result('{"summary": "Акции выросли.", "event_type": "новость", "sentiment": "позитивная"}')
+    assert result == {"summary": "Акции выросли.", "event_type": "новость", "sentiment": "позитивная"}
+
+def test_normalize_labels_maps_english_and_unknown():
+    result = normalize_labels({"summary": "Акции упали.", "event_type": "Press Release", "sentiment": "negative"})
+    assert result["event_type"] == "пресс-релиз"
+    assert result["sentiment"] == "негативная"
+
+    result = normalize_labels({"summary": "Акции упали.", "event_type": "unknown", "sentiment": ""})
+    assert result["event_type"] in EVENT_TYPES
+    assert result["sentiment"] in SENTIMENTS
+
+def test_item_schema_matches_vocabularies():
+    assert ITEM_SCHEMA["properties"]["event_type"]["enum"] == EVENT_TYPES
+    assert ITEM_SCHEMA["properties"]["sentiment"]["enum"] == SENTIMENTS
+
+def test_translate_summary_fixes_language_and_counts_usage(monkeypatch):
+    calls = []
+
+    def fake_generate(prompt, **kwargs):
+        calls.append(kwargs)
+        return {"response": "Акции Apple упали.", "prompt_eval_count": 40, "eval_count": 12}
+
+    monkeypatch.setattr(llm_task, "generate_ollama", fake_generate)
+    result, usage = {"summary": "Apple shares fell."}, {}
+    assert llm_task.translate_summary(result, usage)
+    assert result["summary"] == "Акции Apple упали."
+    assert usage == {"translations": 1, "prompt_tokens": 40, "eval_tokens": 12}
+    assert calls[0]["kind"] == "translate"
@@ -0,0 +1,29 @@
+import time
+from datetime import datetime, timedelta, timezone
+from app.utils.llm_priority import assign_priority, is_overdue, priority_queue_names
+
+NOW = time.time()
+
+def _iso(hours_ago: float) -> str:
+    return (datetime.fromtimestamp(NOW, timezone.utc) - timedelta(hours=hours_ago)).isoformat()
+
+def test_fresh_popular_telegram_post_is_urgent():
+    item = {"source": "telegram", "date": _iso(0.2), "views": 25000}
+    assert assign_priority(item, now=NOW) == "urgent"
+    assert item["enqueued_at"] == NOW
+
+def test_old_crawled_article_is_stale():
+    assert assign_priority({"source": "html_crawler", "date": _iso(24 * 5)}, now=NOW) == "stale"
+
+def test_rss_date_in_rfc822_is_understood():
+    published = datetime.fromtimestamp(NOW, timezone.utc).strftime("%a, %d %b %Y %H:%M:%S +0000")
+    assert assign_priority({"source": "rss", "published": published}, now=NOW) in ("urgent", "normal")
+
+def test_overdue_after_deadline():
+    item = {"source": "rss", "date": _iso(2)}
+    assign_priority(item, now=NOW)
+    assert not is_overdue(item, now=NOW)
+    assert is_overdue(item, now=item["deadline"] + 1)
+
+def test_priority_queue_names_follow_kombu():
+    assert priority_queue_names("llm") == ["llm", "llm:3", "llm:6", "llm:9"]
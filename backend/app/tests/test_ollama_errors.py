@@ -0,0 +1,48 @@
+import pytest
+import requests
+from app.utils import ollama_client
+from app.utils.ollama_client import OllamaPool, OllamaRequestError, OllamaUnavailable, is_outage
+
+def _http_error(status: int) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status}", response=response)
+
+def test_only_connection_timeout_and_5xx_are_outages():
+    assert is_outage(requests.ConnectionError())
+    assert is_outage(requests.ReadTimeout())
+    assert is_outage(_http_error(503))
+    assert not is_outage(_http_error(404))
+    assert not is_outage(ValueError("bad json"))
+
+class _FailingClient:
+    def __init__(self, error):
+        self.error = error
+
+    def generate(self, *args):
+        raise self.error
+
+def _pool(monkeypatch, error):
+    finished = []
+
+    def no_redis():
+        raise ConnectionError("no redis in tests")
+
+    monkeypatch.setattr(ollama_client, "get_redis_client", no_redis)
+    monkeypatch.setattr(ollama_client, "incr_metrics", lambda group, counters: None)
+    pool = OllamaPool(["http://ollama:11434"], pool_size=1, timeout=1)
+    pool.clients["http://ollama:11434"] = _FailingClient(error)
+    monkeypatch.setattr(pool, "_finish", lambda host, token, latency, ok: finished.append(ok))
+    return pool, finished
+
+def test_missing_model_is_request_error_not_host_failure(monkeypatch):
+    pool, finished = _pool(monkeypatch, _http_error(404))
+    with pytest.raises(OllamaRequestError):
+        pool.generate("prompt", "mistral", {})
+    assert finished == [True]
+
+def test_server_error_counts_against_host(monkeypatch):
+    pool, finished = _pool(monkeypatch, _http_error(500))
+    with pytest.raises(OllamaUnavailable):
+        pool.generate("prompt", "mistral", {})
+    assert finished == [False]
@@ -0,0 +1,17 @@
+from app.utils.relevance import relevance_score
+
+def test_relevance_score_weights_title_and_whole_words():
+    assert relevance_score("Apple reports record earnings", "", "Apple") >= 1.0
+    assert relevance_score("Markets today", "Analysts discuss the new iPhone lineup.", "Apple") > 0
+    assert relevance_score("Machine learning news", "A new machine translation model.", "Apple") == 0
+
+def test_matched_telegram_item_with_late_mention_is_kept():
+    from app.utils.relevance import split_relevant
+
+    text = "Рынок смартфонов. " * 20 + "Отдельно обсуждали новый iPhone."
+    telegram = {"company": "apple", "title": "", "text": text, "source": "telegram", "matched": True}
+    rss = {"company": "apple", "title": "", "text": text, "source": "rss"}
+
+    relevant, dropped = split_relevant([telegram, rss])
+
+    assert relevant == [telegram] and dropped == [rss]
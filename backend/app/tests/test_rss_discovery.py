@@ -0,0 +1,73 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from app.tasks import rss_task
+
+class FakeFetcher:
+    def __init__(self, status):
+        self.status = status
+        self.forgotten = []
+
+    async def get_page(self, url, conditional=False):
+        return SimpleNamespace(status_code=self.status, ok=self.status == 200, not_modified=False)
+
+    def forget(self, url):
+        self.forgotten.append(url)
+
+def _patch(monkeypatch, discovery):
+    dead = []
+    monkeypatch.setattr(rss_task, "get_discovery", lambda url: discovery)
+    monkeypatch.setattr(rss_task, "mark_dead", lambda url: dead.append(url) or {"failures": len(dead)})
+    monkeypatch.setattr(rss_task, "incr_metrics", lambda group, counters: None)
+    return dead
+
+def test_dead_cached_feed_backs_off(monkeypatch):
+    dead = _patch(monkeypatch, {"status": "feed", "rss_url": "https://example.com/feed"})
+    fetcher = FakeFetcher(404)
+
+    items = asyncio.run(rss_task._scrape_source(fetcher, "https://example.com/news", "Apple"))
+
+    assert items == []
+    assert dead == ["https://example.com/news"]
+    assert "https://example.com/feed" in fetcher.forgotten
+
+def test_dead_page_cached_without_feed_backs_off(monkeypatch):
+    dead = _patch(monkeypatch, {"status": "none", "rss_url": None})
+
+    asyncio.run(rss_task._scrape_source(FakeFetcher(503), "https://example.com/news", "Apple"))
+
+    assert dead == ["https://example.com/news"]
+
+def _patch_sources(monkeypatch, stage):
+    from app.utils import fetcher
+
+    saved = []
+
+    async def scrape_source(fetcher, url, company_name, since=None, run_id=None):
+        fetcher._validators[url] = {"etag": "v1"}
+        return [{"url": url + "/1"}]
+
+    monkeypatch.setattr(rss_task, "_scrape_source", scrape_source)
+    monkeypatch.setattr(rss_task, "stage_for_llm", stage)
+    monkeypatch.setattr(fetcher, "save_validators", lambda scope, records: saved.append(dict(records)))
+    monkeypatch.setattr(fetcher, "incr_metrics", lambda group, counters: None)
+    return saved
+
+def test_validators_saved_only_after_staging(monkeypatch):
+    saved = _patch_sources(monkeypatch, lambda items: ([["id1", "normal", 10]], {}))
+
+    items, staged = asyncio.run(rss_task._scrape_sources("Apple", ["https://example.com/feed"]))
+
+    assert staged == [["id1", "normal", 10]]
+    assert saved == [{"https://example.com/feed": {"etag": "v1"}}]
+
+def test_validators_dropped_when_staging_fails(monkeypatch):
+    def stage(items):
+        raise ConnectionError("redis down")
+
+    saved = _patch_sources(monkeypatch, stage)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(rss_task._scrape_sources("Apple", ["https://example.com/feed"]))
+    # Следующий запуск не получит 304 и заберёт элементы снова
+    assert saved == []
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app import celery_beat
+from app.models.subscription import Subscription
+
+def _session(monkeypatch, backlog=0):
+    engine = create_engine("sqlite://")
+    Subscription.__table__.create(engine)
+    session = sessionmaker(bind=engine)
+    launched = []
+
+    class Trigger:
+        @staticmethod
+        def delay(company_name, **kwargs):
+            launched.append(company_name)
+
+    monkeypatch.setattr(celery_beat, "SessionLocal", session)
+    monkeypatch.setattr(celery_beat, "llm_backlog", lambda: backlog)
+    monkeypatch.setattr(celery_beat, "incr_metrics", lambda group, counters: None)
+    monkeypatch.setattr(celery_beat, "trigger_company_monitoring", Trigger)
+    return session, launched
+
+def test_runs_only_due_subscriptions(monkeypatch):
+    session, launched = _session(monkeypatch)
+    now = datetime.now(timezone.utc)
+    db = session()
+    db.add_all([
+        Subscription(company="Apple", interval_hours=2, is_active=True, last_run_at=None),
+        Subscription(company="Tesla", interval_hours=2, is_active=True, last_run_at=now - timedelta(hours=3)),
+        Subscription(company="Nvidia", interval_hours=2, is_active=True, last_run_at=now - timedelta(hours=1)),
+        Subscription(company="Intel", interval_hours=2, is_active=False, last_run_at=None),
+    ])
+    db.commit()
+    db.close()
+
+    celery_beat.run_due_subscriptions()
+
+    assert sorted(launched) == ["Apple", "Tesla"]
+    # Запущенные подписки не повторяются на следующем тике
+    launched.clear()
+    celery_beat.run_due_subscriptions()
+    assert launched == []
+
+def test_slow_backlog_launches_oldest_first(monkeypatch):
+    session, launched = _session(monkeypatch, backlog=celery_beat.settings.LLM_BACKLOG_LIMIT // 2 + 1)
+    monkeypatch.setattr(celery_beat.settings, "SCHEDULER_SLOW_BATCH", 1)
+    now = datetime.now(timezone.utc)
+    db = session()
+    db.add_all([
+        Subscription(company="Tesla", interval_hours=2, is_active=True, last_run_at=now - timedelta(hours=3)),
+        Subscription(company="Apple", interval_hours=2, is_active=True, last_run_at=now - timedelta(hours=10)),
+    ])
+    db.commit()
+    db.close()
+
+    celery_beat.run_due_subscriptions()
+
+    assert launched == ["Apple"]
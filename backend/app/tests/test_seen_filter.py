@@ -0,0 +1,60 @@
+import pytest
+from app.tasks import llm_task
+
+def _patch(monkeypatch):
+    calls = {"marked": [], "released": []}
+    monkeypatch.setattr(llm_task, "mark_seen", lambda urls: calls["marked"].extend(urls))
+    monkeypatch.setattr(llm_task, "release_seen", lambda urls: calls["released"].extend(urls))
+    monkeypatch.setattr(llm_task, "send_telegram_message", lambda message: None)
+    monkeypatch.setattr(llm_task, "SessionLocal", lambda: type("DB", (), {"close": lambda self: None})())
+    return calls
+
+def test_saved_item_marked_seen(monkeypatch):
+    calls = _patch(monkeypatch)
+    monkeypatch.setattr(llm_task, "create_news_item", lambda db, record: None)  # дубль - тоже уже в БД
+
+    llm_task.save_processed_item({"url": "https://a.com/1", "company": "Apple"})
+
+    assert calls == {"marked": ["https://a.com/1"], "released": []}
+
+def test_failed_db_save_releases_claim(monkeypatch):
+    calls = _patch(monkeypatch)
+
+    def fail(db, record):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(llm_task, "create_news_item", fail)
+    llm_task.save_processed_item({"url": "https://a.com/1", "company": "Apple"})
+
+    assert calls == {"marked": [], "released": ["https://a.com/1"]}
+
+def test_unprocessed_items_release_only_unsaved(monkeypatch):
+    calls = _patch(monkeypatch)
+
+    def create(db, record):
+        if record["url"].endswith("2"):
+            raise RuntimeError("db down")
+
+    monkeypatch.setattr(llm_task, "create_news_item", create)
+    llm_task.store_unprocessed_items([{"url": f"https://a.com/{i}"} for i in range(1, 4)])
+
+    assert calls["marked"] == ["https://a.com/1"]
+    assert calls["released"] == ["https://a.com/2", "https://a.com/3"]
+
+def test_staging_failure_releases_claims(monkeypatch):
+    calls = _patch(monkeypatch)
+    items = [{"url": "https://a.com/1"}, {"url": "https://a.com/2"}]
+
+    def stage(items):
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(llm_task, "filter_seen_items", lambda items: (items, {}))
+    monkeypatch.setattr(llm_task, "split_relevant", lambda items: (items, []))
+    monkeypatch.setattr(llm_task, "assign_stories", lambda items: (items, []))
+    monkeypatch.setattr(llm_task, "assign_priority", lambda item: None)
+    monkeypatch.setattr(llm_task, "stage_items", stage)
+
+    with pytest.raises(ConnectionError):
+        llm_task._stage_new_items(items)
+
+    assert calls["released"] == ["https://a.com/1", "https://a.com/2"]
@@ -0,0 +1,25 @@
+import time
+from app.utils.story_index import StoryIndex, hamming, simhash
+import numpy as np
+
+REUTERS = ("Apple reported record quarterly revenue of $124 billion on Thursday, "
+           "driven by strong iPhone sales in China and growth in its services business, "
+           "the company said in a statement after markets closed.")
+CNBC = ("Apple reported record quarterly revenue of $124 billion on Thursday, "
+        "driven by strong iPhone sales in China and growth in its services business, "
+        "the company said in a statement after the market closed.")
+OTHER = "Tesla recalls 12,000 Model Y vehicles over a seat-belt warning issue, regulators said on Monday."
+
+def test_simhash_close_for_rewrites_and_far_for_other_stories():
+    a, b, c = simhash(REUTERS), simhash(CNBC), simhash(OTHER)
+    arr = np.array([a], dtype=np.uint64)
+    assert hamming(arr, b)[0] < hamming(arr, c)[0]
+    assert hamming(arr, b)[0] <= 6 < hamming(arr, c)[0]
+
+def test_story_index_finds_story_within_company(tmp_path):
+    index = StoryIndex(str(tmp_path / "index.npy"), capacity=16)
+    now = time.time()
+    index.add(0, simhash(REUTERS), 1, "story-a", None, now)
+    assert index.find_story(simhash(REUTERS), 1, None, now) == "story-a"
+    assert index.find_story(simhash(REUTERS), 2, None, now) is None
+    assert index.find_story(simhash(OTHER), 1, None, now) is None
@@ -0,0 +1,44 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from app import telegram_listener
+from app.telegram_listener import TelegramListener
+
+def _event(message_id, text):
+    return SimpleNamespace(message=SimpleNamespace(
+        id=message_id, message=text, views=None,
+        date=datetime(2026, 1, 1, tzinfo=timezone.utc),
+        peer_id=SimpleNamespace(channel_id=42),
+    ))
+
+def _listener(monkeypatch, enqueued, stored):
+    monkeypatch.setattr(telegram_listener, "enqueue_for_llm", lambda items: enqueued.extend(items))
+    monkeypatch.setattr(telegram_listener, "store_watermark", lambda *args: stored.append(args))
+    monkeypatch.setattr(telegram_listener, "incr_metrics", lambda *args: None)
+    listener = TelegramListener()
+    listener.companies = {"tech": ["Apple", "Tesla"]}
+    listener.channel_ids = {42: "tech"}
+    listener.last_ids = {"tech": 10}
+    return listener
+
+def test_matched_message_goes_to_llm_and_moves_watermark(monkeypatch):
+    enqueued, stored = [], []
+    listener = _listener(monkeypatch, enqueued, stored)
+
+    asyncio.run(listener.on_message(_event(11, "New iPhone announced")))
+
+    assert [item["company"] for item in enqueued] == ["Apple"]
+    assert enqueued[0]["url"] == "https://t.me/tech/11"
+    # Отметка двигается для всех компаний канала, даже не упомянутых
+    assert stored == [("tech", "Apple", 11), ("tech", "Tesla", 11)]
+    assert listener.last_ids["tech"] == 11
+
+def test_gap_in_ids_keeps_watermark_for_backfill(monkeypatch):
+    enqueued, stored = [], []
+    listener = _listener(monkeypatch, enqueued, stored)
+
+    asyncio.run(listener.on_message(_event(15, "Apple earnings")))
+
+    assert len(enqueued) == 1
+    assert stored == []
+    assert listener.gaps == {"tech"}
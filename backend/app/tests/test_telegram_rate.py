@@ -0,0 +1,56 @@
+import asyncio
+from telethon.errors import FloodWaitError
+from app.tasks import telegram_task
+
+def _patch(monkeypatch, scrape, wait=0.0):
+    calls = {"flood": [], "deferred": [], "success": 0}
+
+    async def client():
+        return object()
+
+    monkeypatch.setattr(telegram_task, "get_telegram_client", client)
+    monkeypatch.setattr(telegram_task, "_scrape_telegram_channel", scrape)
+    monkeypatch.setattr(telegram_task, "load_watermark", lambda channel, company: 10)
+    monkeypatch.setattr(telegram_task, "acquire", lambda: calls["flood"][-1] if calls["flood"] else wait)
+    monkeypatch.setattr(telegram_task, "record_flood", lambda seconds: calls["flood"].append(seconds))
+    monkeypatch.setattr(telegram_task, "defer_channel", lambda company, channel, w: calls["deferred"].append((channel, w)))
+    monkeypatch.setattr(telegram_task, "charge_pages", lambda messages: None)
+    monkeypatch.setattr(telegram_task, "incr_metrics", lambda group, counters: None)
+    monkeypatch.setattr(telegram_task.settings, "TELEGRAM_CHANNEL_CONCURRENCY", 1)
+    return calls
+
+def test_flood_wait_pauses_remaining_channels(monkeypatch):
+    async def scrape(client, username, company, min_id=0, limit=None):
+        if username == "first":
+            raise FloodWaitError(request=None, capture=120)
+        return [{"url": username}], min_id + 1, 1
+
+    calls = _patch(monkeypatch, scrape)
+    items, watermarks = asyncio.run(telegram_task._scrape_channels("Apple", ["first", "second"]))
+
+    # FloodWait записан для всех воркеров, второй канал уже не запрашивается, оба отложены
+    assert calls["flood"] == [120]
+    assert calls["deferred"] == [("first", 120), ("second", 120)]
+    assert items == [] and watermarks == {}
+
+def test_exhausted_budget_defers_without_requests(monkeypatch):
+    async def scrape(*args, **kwargs):
+        raise AssertionError("no Telegram requests over budget")
+
+    calls = _patch(monkeypatch, scrape, wait=30.0)
+    items, _ = asyncio.run(telegram_task._scrape_channels("Apple", ["tech"]))
+
+    assert items == []
+    assert calls["deferred"] == [("tech", 30.0)]
+
+def test_pages_charged_by_messages_read_not_id_range(monkeypatch):
+    async def scrape(client, username, company, min_id=0, limit=None):
+        # Канал с длинной историей, но прочитано всего 20 сообщений - один запрос
+        return [], 150000, 20
+
+    _patch(monkeypatch, scrape)
+    charged = []
+    monkeypatch.setattr(telegram_task, "charge_pages", lambda messages: charged.append(messages))
+    asyncio.run(telegram_task._scrape_channels("Apple", ["tech"]))
+
+    assert charged == [20]
@@ -0,0 +1,45 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from app.tasks import telegram_task
+
+class FakeClient:
+    """iter_messages как у Telethon: от новых к старым, строго новее min_id."""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.calls = []
+
+    async def iter_messages(self, peer, limit=None, min_id=0):
+        self.calls.append({"limit": limit, "min_id": min_id})
+        newer = [m for m in sorted(self.messages, key=lambda m: -m.id) if m.id > min_id]
+        for message in newer[:limit]:
+            yield message
+
+def _message(message_id, text):
+    return SimpleNamespace(id=message_id, message=text, date=datetime(2026, 1, 1, tzinfo=timezone.utc), views=10)
+
+async def _resolve(client, username):
+    return username
+
+def test_scrape_reads_everything_after_watermark(monkeypatch):
+    monkeypatch.setattr(telegram_task, "resolve_channel", _resolve)
+    client = FakeClient([_message(i, f"Apple news #{i}" if i % 2 else "weather") for i in range(1, 101)])
+
+    msgs, last_id, read = asyncio.run(telegram_task._scrape_telegram_channel(client, "tech", "Apple", min_id=40))
+
+    # Всплеск из 60 сообщений читается целиком, отметка - самое новое, даже нерелевантное
+    assert client.calls == [{"limit": None, "min_id": 40}]
+    assert len(msgs) == 30
+    assert last_id == 100
+    assert read == 60
+
+def test_scrape_keeps_watermark_when_nothing_new(monkeypatch):
+    monkeypatch.setattr(telegram_task, "resolve_channel", _resolve)
+    client = FakeClient([_message(i, "Apple") for i in range(1, 6)])
+
+    msgs, last_id, read = asyncio.run(telegram_task._scrape_telegram_channel(client, "tech", "Apple", min_id=5))
+
+    assert msgs == []
+    assert last_id == 5
+    assert read == 0
@@ -0,0 +1,49 @@
+from app.utils.text_compressor import compress_text, split_sentences
+from app.utils.tokens import estimate_tokens
+
+ARTICLE = (
+    "Apple reported record quarterly revenue of $124 billion on Thursday. "
+    "iPhone sales grew 6% year over year, driven by demand in China. "
+    "Subscribe to our newsletter. "
+    "The weather in Cupertino was mild this week. "
+    "Analysts said the services business, which includes the App Store, reached an all-time high. "
+    "Read more. "
+) + " ".join(f"Filler sentence number {i} talks about unrelated things." for i in range(40))
+
+def test_short_text_only_loses_boilerplate():
+    text, stats = compress_text("Apple shipped a new Mac. Subscribe to our newsletter.", 800)
+    assert text == "Apple shipped a new Mac."
+    assert stats["tokens_out"] <= stats["tokens_in"]
+
+def test_long_text_fits_budget_and_keeps_lead():
+    text, stats = compress_text(ARTICLE, 80, keywords=["Apple"])
+    assert estimate_tokens(text) <= 80
+    assert text.startswith("Apple reported record quarterly revenue")
+    assert "Subscribe" not in text
+    assert stats["tokens_out"] < stats["tokens_in"]
+
+def test_split_sentences_on_newlines_and_punctuation():
+    assert split_sentences("First one. Second one!\nThird") == ["First one.", "Second one!", "Third"]
+
+def test_news_about_subscribers_or_cookies_is_kept():
+    sentences = [
+        "Netflix added 9 million subscribers in the fourth quarter.",
+        "Яндекс подписал соглашение с крупным банком.",
+        "Apple faces an EU probe over cookie consent banners.",
+        "Реклама в Telegram принесла компании рекордную выручку.",
+    ]
+    for sentence in sentences:
+        text, _ = compress_text(f"Lead sentence about the company. {sentence}", 800)
+        assert sentence in text
+
+def test_boilerplate_lines_dropped_but_lead_kept():
+    text, _ = compress_text(
+        "Subscribe to our newsletter for the latest Apple news.\n"
+        "Apple opened a new store.\n"
+        "Read more\n"
+        "Читайте также:\n"
+        "Мы используем файлы cookie для улучшения сайта.\n"
+        "© 2024 Example Media. All rights reserved.",
+        800,
+    )
+    assert text == "Subscribe to our newsletter for the latest Apple news. Apple opened a new store."
@@ -0,0 +1,11 @@
+from app.utils.url_utils import canonicalize_url
+
+def test_canonicalize_strips_tracking_and_fragment():
+    url = "HTTPS://WWW.Example.com:443/news/item/?utm_source=tg&id=5&fbclid=abc#comments"
+    assert canonicalize_url(url) == "https://www.example.com/news/item?id=5"
+
+def test_canonicalize_sorts_query():
+    assert canonicalize_url("https://example.com/a?b=2&a=1") == canonicalize_url("https://example.com/a?a=1&b=2")
+
+def test_canonicalize_keeps_non_urls():
+    assert canonicalize_url(" not a url ") == "not a url"
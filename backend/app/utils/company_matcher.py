@@ -0,0 +1,194 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Продукты, тикеры и руководители - упоминание без названия компании.
+# Дополняются таблицей из COMPANY_ALIASES_FILE: {"компания": ["алиас", ...]}
+COMPANY_SYNONYMS = {
+    "apple": ["iphone", "ipad", "macOS","iwatch", "airpods", "mac", "ios", "aapl", "tim cook"],
+    "nvidia": ["rtx", "geforce", "cuda", "nvda", "jensen huang"],
+    "microsoft": ["windows", "azure", "msft", "satya nadella"],
+    "tesla": ["elon musk", "model s", "model 3", "tsla", "cybertruck"],
+}
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+class CompanyMatcher:
+    """
+    Автомат Ахо-Корасик по названиям компаний и их алиасам: текст сканируется
+    один раз, на выходе - все упомянутые компании. Совпадение засчитывается
+    только целым словом: «mac» не находится в «machine», «ios» - в «bios».
+    """
+
+    def __init__(self, aliases: dict[str, list[str]]):
+        self.companies = list(aliases)
+        self.company_set = frozenset(self.companies)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for idx, company in enumerate(self.companies):
+            name = company.lower().strip()
+            for pattern in {name, *(a.lower().strip() for a in aliases[company])}:
+                if pattern:
+                    self._add(pattern, idx, pattern == name)
+        self._build()
+
+    def _add(self, pattern: str, company_idx: int, is_name: bool) -> None:
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(pattern), company_idx, is_name))
+
+    def _build(self) -> None:
+        # Ссылки неудач обходом в ширину; выходы наследуются по ним
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                if state:
+                    fail = self._fail[state]
+                    while fail and ch not in self._goto[fail]:
+                        fail = self._fail[fail]
+                    self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def _scan(self, text: str):
+        """Все вхождения целым словом: (начало, номер компании, это название компании)."""
+        text = text.lower()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        last = len(text) - 1
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            # Конец совпадения - граница слова?
+            if i < last and _is_word_char(text[i + 1]):
+                continue
+            for length, idx, is_name in out[state]:
+                start = i - length + 1
+                if start == 0 or not _is_word_char(text[start - 1]):
+                    yield start, idx, is_name
+
+    def match(self, text: str) -> set[str]:
+        """Все компании, упомянутые в тексте (названием или алиасом)."""
+        if not text:
+            return set()
+        return {self.companies[idx] for _, idx, _ in self._scan(text)}
+
+    def mentions(self, text: str) -> dict[str, list[tuple[int, bool]]]:
+        """
+        Упоминания по компаниям за один проход: {компания: [(позиция, названием ли)]}.
+        Позиция нужна, чтобы отличить упоминание в начале текста.
+        """
+        found = {}
+        if text:
+            for start, idx, is_name in self._scan(text):
+                found.setdefault(self.companies[idx], []).append((start, is_name))
+        return found
+
+def load_aliases() -> dict[str, list[str]]:
+    """Встроенные синонимы + таблица из COMPANY_ALIASES_FILE (ключи - в нижнем регистре)."""
+    aliases = {company: list(values) for company, values in COMPANY_SYNONYMS.items()}
+    path = settings.COMPANY_ALIASES_FILE
+    if path and os.path.exists(path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                for company, values in json.load(f).items():
+                    aliases.setdefault(company.lower(), []).extend(values)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Failed to load company aliases from {path}: {e}")
+    return aliases
+
+# Автоматы по наборам компаний; старые вытесняются, чтобы ad-hoc наборы не копились до обновления алиасов
+MATCHER_CACHE_SIZE = 64
+
+_aliases = None
+_aliases_loaded_at = 0.0
+_matchers: OrderedDict = OrderedDict()
+_active = None
+_active_loaded_at = 0.0
+_lock = threading.Lock()
+
+def company_aliases() -> dict[str, list[str]]:
+    """Таблица алиасов, перечитывается не чаще раза в COMPANY_MATCHER_REFRESH_SECONDS."""
+    global _aliases, _aliases_loaded_at
+    with _lock:
+        if _aliases is None or time.time() - _aliases_loaded_at > settings.COMPANY_MATCHER_REFRESH_SECONDS:
+            _aliases = load_aliases()
+            _aliases_loaded_at = time.time()
+            _matchers.clear()
+        return _aliases
+
+def get_company_matcher(companies) -> CompanyMatcher:
+    """
+    Скомпилированный автомат для набора компаний (например, всех активных подписок).
+    Строится один раз на набор и переиспользуется; компании в match() - в нижнем регистре.
+    """
+    aliases = company_aliases()
+    key = frozenset(c.lower().strip() for c in companies if c and c.strip())
+    with _lock:
+        matcher = _matchers.get(key)
+        if matcher is None:
+            matcher = CompanyMatcher({c: aliases.get(c, []) for c in sorted(key)})
+            _matchers[key] = matcher
+            if len(_matchers) > MATCHER_CACHE_SIZE:
+                _matchers.popitem(last=False)
+        else:
+            _matchers.move_to_end(key)
+        return matcher
+
+def active_companies() -> list[str]:
+    """Компании всех активных подписок."""
+    from app.database import SessionLocal
+    from app.models.subscription import Subscription
+    db = SessionLocal()
+    try:
+        return [row.company for row in db.query(Subscription.company).filter(Subscription.is_active == True).distinct()]
+    finally:
+        db.close()
+
+def get_active_matcher() -> CompanyMatcher:
+    """
+    Один автомат по всем активным подпискам: сообщение сканируется один раз,
+    на выходе - все компании, которых оно касается. Список подписок
+    перечитывается раз в COMPANY_MATCHER_REFRESH_SECONDS.
+    """
+    global _active, _active_loaded_at
+    if _active is None or time.time() - _active_loaded_at > settings.COMPANY_MATCHER_REFRESH_SECONDS:
+        try:
+            _active = active_companies()
+        except Exception as e:
+            # БД недоступна - работаем с прежним списком, повторим после паузы
+            logger.warning(f"⚠️ Failed to load active companies for matcher: {e}")
+            _active = _active or []
+        _active_loaded_at = time.time()
+    return get_company_matcher(_active)
+
+def get_matcher_for(companies) -> CompanyMatcher:
+    """
+    Общий автомат активных подписок, если в нём есть все нужные компании;
+    иначе (компания без подписки) - отдельный автомат на набор.
+    """
+    key = {c.lower().strip() for c in companies if c and c.strip()}
+    active = get_active_matcher()
+    if key <= active.company_set:
+        return active
+    return get_company_matcher(key)
@@ -1,12 +1,59 @@
 import re
+import json
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from dateparser import parse as parse_date
 from urllib.parse import urlparse
+from lxml import etree
+from lxml.html import HtmlElement
+from app.utils.html_utils import element_text, has_class, parse_html, visible_text
+
+# Дата в URL: /2026/01/...
+URL_DATE_RE = re.compile(r'/(\d{4})/(\d{1,2})/')
+# "January 29, 2026"
+MONTH_DAY_YEAR_RE = re.compile(
+    r'\b(January|February|March|April|May|June|July|August|'
+    r'September|October|November|December)\s+(\d{1,2}),\s+(\d{4})\b'
+)
+
+# Точные источники даты, от самых надёжных: (XPath, атрибут)
+STRUCTURED_DATE_XPATHS = [
+    (etree.XPath('//meta[@property="article:published_time"]'), 'content'),
+    (etree.XPath('//meta[@property="og:published_time"]'), 'content'),
+    (etree.XPath('//meta[@itemprop="datePublished"]'), 'content'),
+    (etree.XPath('//meta[@name="pubdate" or @name="publishdate" or @name="date"]'), 'content'),
+    (etree.XPath('//time[@itemprop="datePublished"]'), 'datetime'),
+    (etree.XPath('//time[@datetime]'), 'datetime'),
+]
+JSON_LD_XPATH = etree.XPath('//script[@type="application/ld+json"]')
+
+# Классы, где часто лежит дата
+DATE_CLASSES = ['date', 'pub-date', 'updated', 'meta', 'timestamp', 'byline', 'header-meta']
+DATE_CLASS_XPATH = etree.XPath('//*[' + ' or '.join(has_class(cls) for cls in DATE_CLASSES) + ']')
+TITLE_XPATH = etree.XPath('(//h1|//h2)[1]')
+PARAGRAPHS_XPATH = etree.XPath('(//p)[position() <= 5]')
+DATE_KEYWORDS = ('update', 'published', 'released', 'as of')
+
+# Сколько коротких кандидатов максимум отдаём dateparser и какой длины
+MAX_DATEPARSER_CANDIDATES = 5
+MAX_CANDIDATE_LENGTH = 64
+HAS_DIGIT_RE = re.compile(r'\d')
+
+# Окно в начале текста страницы, где чаще всего стоит дата
+LEAD_TEXT_CHARS = 500
+
+# Мемоизация по URL: дата публикации статьи со временем не меняется
+DATE_CACHE_SIZE = 2048
+_date_cache: OrderedDict = OrderedDict()
+# Кэш общий для потоков asyncio.to_thread - get/move_to_end/popitem под одной блокировкой
+_date_cache_lock = threading.Lock()
+_MISSING = object()
 
 def extract_date_from_url(url: str) -> datetime | None:
     """Пытается извлечь дату из URL (например, /2026/01/...)."""
     path = urlparse(url).path
-    match = re.search(r'/(\d{4})/(\d{1,2})/', path)
+    match = URL_DATE_RE.search(path)
     if match:
         year, month = match.groups()
         try:
@@ -15,76 +62,68 @@ def extract_date_from_url(url: str) -> datetime | None:
             pass
     return None
 
-def extract_data_from_html(html_content: str, url: str) -> datetime | None:
+def extract_data_from_html(html_content: str | bytes, url: str) -> datetime | None:
     """Извлекает дату из HTML через мета-теги и текст."""
-    from bs4 import BeautifulSoup
-    
-    soup = BeautifulSoup(html_content, 'html.parser')
-
-    # Извлекаем первые 500 символов всего HTML — часто там дата
-    raw_text = soup.get_text()[:500]
-    if raw_text:
-    # Ищем паттерн вроде "January 29, 2026" в начале текста
-        import re
-        match = re.search(
-            r'\b(?:January|February|March|April|May|June|'
-            r'July|August|September|October|November|December)\s+\d{1,2},\s+\d{4}\b',
-            raw_text
-        )
-        if match:
-            try:
-                dt = parse_date(match.group(0))
-                if dt:
-                    return dt
-            except:
-                pass
-
-    for selector in [
-        'meta[property="article:published_time"]',
-        'meta[itemprop="datePublished"]',
-        'time[datetime]',
-        'time[itemprop="datePublished"]'
-    ]:
-        tag = soup.select_one(selector)
-        if tag and tag.get('datetime'):
-            try:
-                return datetime.fromisoformat(tag['datetime'].replace('Z', '+00:00'))
-            except:
-                pass
-        if tag and tag.get_text(strip=True):
-            try:
-                dt = parse_date(tag.get_text(strip=True))
-                if dt:
-                    return dt
-            except:
-                pass
-    
-    # Ищем текстовые паттерны ВБЛИЗИ заголовка или в блоках с классами "date", "update", "meta"
-    candidates = []
+    # Здесь HTML под рукой - учитываем и его, чтобы не путать разные страницы с одним URL
+    key = (url, hash(html_content))
+    cached = _cache_get(key)
+    if cached is not _MISSING:
+        return cached
+    return _cache_put(key, _extract_date(parse_html(html_content), url))
 
-    # Классы, где часто лежит дата
-    for cls in ['date', 'pub-date', 'updated', 'meta', 'timestamp', 'byline', 'header-meta']:
-        for el in soup.find_all(class_=cls):
-            text = el.get_text(strip=True)
-            if text:
-                candidates.append(text)
-    
-    # Также ищем рядом с заголовком
-    title_el = soup.find(['h1', 'h2'])
-    if title_el:
-        for sibling in title_el.find_next_siblings(limit=3):
-            text = sibling.get_text(strip=True)
-            if text:
-                candidates.append(text)
-    
-    # Ищем в теле страницы - первые 3 параграфа
-    for p in soup.find_all('p', limit=5):
-        text = p.get_text(strip=True)
-        if text and any(kw in text.lower() for kw in ['update', 'published', 'released', 'as of']):
-            candidates.append(text)
-    
-    # Парсим все кандидаты чеез dateparser
-    for cand in candidates:
+def extract_date_from_tree(tree: HtmlElement, url: str) -> datetime | None:
+    """То же, что extract_data_from_html, но по уже разобранному дереву lxml."""
+    key = (url,)
+    cached = _cache_get(key)
+    if cached is not _MISSING:
+        return cached
+    return _cache_put(key, _extract_date(tree, url))
+
+def _cache_get(key):
+    with _date_cache_lock:
+        value = _date_cache.get(key, _MISSING)
+        if value is not _MISSING:
+            _date_cache.move_to_end(key)
+        return value
+
+def _cache_put(key, value):
+    with _date_cache_lock:
+        _date_cache[key] = value
+        if len(_date_cache) > DATE_CACHE_SIZE:
+            _date_cache.popitem(last=False)
+    return value
+
+def clear_date_cache() -> None:
+    with _date_cache_lock:
+        _date_cache.clear()
+
+def _extract_date(tree: HtmlElement, url: str) -> datetime | None:
+    """
+    Источники даты по возрастанию стоимости: сначала точные (мета-теги,
+    JSON-LD, <time>), затем регулярки по тексту и лишь потом dateparser
+    на нескольких коротких кандидатах.
+    """
+    # 1. Структурированные данные: Open Graph, Schema.org, <time datetime>
+    for xpath, attr in STRUCTURED_DATE_XPATHS:
+        for tag in xpath(tree):
+            dt = _parse_iso(tag.get(attr))
+            if dt:
+                return dt
+
+    # 2. JSON-LD
+    for script in JSON_LD_XPATH(tree):
+        dt = _parse_iso(_json_ld_date(script.text))
+        if dt:
+            return dt
+
+    # 3. "January 29, 2026" в начале текста страницы
+    text = visible_text(tree)
+    dt = _match_month_day_year(text[:LEAD_TEXT_CHARS])
+    if dt:
+        return dt
+
+    # 4. dateparser - только на нескольких коротких кандидатах
+    for cand in _date_candidates(tree):
         try:
             dt = parse_date(cand, languages=['en', 'ru'], settings={'STRICT_PARSING': False})
             if dt:
@@ -92,41 +131,77 @@ def extract_data_from_html(html_content: str, url: str) -> datetime | None:
         except Exception:
             continue
 
-    # 1. Open Graph
-    og = soup.find('meta', property='article:published_time')
-    if og and og.get('content'):
-        try:
-            return datetime.fromisoformat(og['content'].replace('Z', '+00:00'))
-        except:
-            pass
-    
-    # 2. Schema.org
-    schema = soup.find('meta', itemprop='datePublished')
-    if schema and schema.get('content'):
-        try:
-            return datetime.fromisoformat(schema['content'].replace('Z', '+00:00'))
-        except:
-            pass
-    
-    # 3. JSON-LD
-    for script in soup.find_all('script', type='application/ld+json'):
-        try:
-            import json
-            data = json.loads(script.string)
-            if isinstance(data, dict) and 'datePublished' in data:
-                return datetime.fromisoformat(data['datePublished'].replace('Z', '+00:00'))
-        except:
+    # 5. Поиск в основном тексте (последняя надежда)
+    dt = _match_month_day_year(text[LEAD_TEXT_CHARS:])
+    if dt:
+        return dt
+
+    # 6. Из URL
+    return extract_date_from_url(url)
+
+def _parse_iso(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+def _json_ld_date(raw: str | None) -> str | None:
+    """datePublished из JSON-LD: объект, список объектов или @graph."""
+    if not raw:
+        return None
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        return None
+    nodes = data if isinstance(data, list) else [data]
+    for node in nodes:
+        if not isinstance(node, dict):
             continue
-    
-    # 4.Поиск в основном тексте (последняя надежда)
-    text = soup.get_text()
-    # Ищем шаблоны вроде "January 29, 2026"
-    date_match = re.search(r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},\s+\d{4}\b', text)
-    if date_match:
-        try:
-            return parse_date(date_match.group(0))
-        except:
-            pass
-    
-    # 5. Из URL
-    return extract_date_from_url(url)
\ No newline at end of file
+        if isinstance(node.get('datePublished'), str):
+            return node['datePublished']
+        for child in node.get('@graph', []):
+            if isinstance(child, dict) and isinstance(child.get('datePublished'), str):
+                return child['datePublished']
+    return None
+
+def _match_month_day_year(text: str) -> datetime | None:
+    match = MONTH_DAY_YEAR_RE.search(text)
+    if not match:
+        return None
+    month, day, year = match.groups()
+    try:
+        return datetime.strptime(f"{month} {day} {year}", "%B %d %Y")
+    except ValueError:
+        return None
+
+def _date_candidates(tree: HtmlElement) -> list[str]:
+    """
+    Короткие тексты, где может быть дата: блоки с «датными» классами,
+    соседи заголовка, первые абзацы с ключевыми словами.
+    Длинные блоки и тексты без цифр dateparser не отдаём.
+    """
+    candidates = []
+
+    def add(text: str) -> bool:
+        if text and len(text) <= MAX_CANDIDATE_LENGTH and HAS_DIGIT_RE.search(text) and text not in candidates:
+            candidates.append(text)
+        return len(candidates) >= MAX_DATEPARSER_CANDIDATES
+
+    for el in DATE_CLASS_XPATH(tree):
+        if add(element_text(el)):
+            return candidates
+
+    title_el = TITLE_XPATH(tree)
+    if title_el:
+        for sibling in list(title_el[0].itersiblings())[:3]:
+            if add(element_text(sibling)):
+                return candidates
+
+    for p in PARAGRAPHS_XPATH(tree):
+        text = element_text(p)
+        if any(kw in text.lower() for kw in DATE_KEYWORDS) and add(text):
+            return candidates
+
+    return candidates
@@ -0,0 +1,74 @@
+import hashlib
+import json
+import logging
+import time
+from app.config import settings
+from app.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+DISCOVERY_KEY_PREFIX = "rss:discovery:"
+
+# Результаты поиска RSS на странице
+DISCOVERY_FEED = "feed"     # найдена лента
+DISCOVERY_NONE = "none"     # страница живая, ленты нет
+DISCOVERY_DEAD = "dead"     # страница недоступна (404, 5xx, таймаут)
+
+def _discovery_key(url: str) -> str:
+    return DISCOVERY_KEY_PREFIX + hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+def _load(url: str) -> dict | None:
+    try:
+        raw = get_redis_client().get(_discovery_key(url))
+    except Exception as e:
+        logger.warning(f"⚠️ RSS discovery cache unavailable for {url}: {e}")
+        return None
+    return json.loads(raw) if raw else None
+
+def _store(url: str, record: dict, key_ttl: int) -> None:
+    try:
+        get_redis_client().set(_discovery_key(url), json.dumps(record), ex=key_ttl)
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to cache RSS discovery for {url}: {e}")
+
+def get_discovery(url: str) -> dict | None:
+    """
+    Возвращает действующий результат поиска RSS для URL:
+    {"status": feed|none|dead, "rss_url": ..., "retry_at": ...}.
+    None - записи нет или её срок вышел, страницу нужно проверить заново.
+    """
+    record = _load(url)
+    if not record or record.get("retry_at", 0) <= time.time():
+        return None
+    return record
+
+def save_discovery(url: str, rss_url: str | None) -> None:
+    """Запоминает результат поиска RSS у живой страницы и сбрасывает счётчик сбоев."""
+    if rss_url:
+        ttl = settings.RSS_DISCOVERY_FEED_TTL_HOURS * 3600
+        record = {"status": DISCOVERY_FEED, "rss_url": rss_url}
+    else:
+        ttl = settings.RSS_DISCOVERY_NONE_TTL_HOURS * 3600
+        record = {"status": DISCOVERY_NONE, "rss_url": None}
+    record.update({"failures": 0, "retry_at": time.time() + ttl})
+    _store(url, record, ttl)
+
+def mark_dead(url: str) -> dict:
+    """
+    Отмечает сбой страницы. Повторная проверка - через экспоненциально
+    растущий интервал: base, 2*base, 4*base ... но не больше max.
+    """
+    previous = _load(url) or {}
+    failures = previous.get("failures", 0) + 1 if previous.get("status") == DISCOVERY_DEAD else 1
+    base = settings.RSS_DISCOVERY_DEAD_BASE_HOURS * 3600
+    max_backoff = settings.RSS_DISCOVERY_DEAD_MAX_HOURS * 3600
+    backoff = min(base * 2 ** (failures - 1), max_backoff)
+    record = {
+        "status": DISCOVERY_DEAD,
+        "rss_url": None,
+        "failures": failures,
+        "retry_at": time.time() + backoff,
+    }
+    # Ключ живёт дольше паузы, чтобы счётчик сбоев дожил до следующей проверки
+    _store(url, record, int(backoff + max_backoff))
+    return record
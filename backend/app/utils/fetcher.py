@@ -0,0 +1,189 @@
+import asyncio
+import logging
+from urllib.parse import urlparse
+import httpx
+from lxml.html import HtmlElement
+from app.config import settings
+from app.utils.html_utils import parse_html
+from app.utils.http_cache import (
+    conditional_headers, load_validators, save_validators, validators_from_response
+)
+from app.utils.metrics import incr_metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {"User-Agent": "news-aggregator"}
+
+FEED_CONTENT_TYPES = ("rss", "atom", "xml")
+FEED_MARKERS = (b"<rss", b"<feed", b"<rdf:rdf")
+
+class Page:
+    """
+    Загруженная страница. Байты и разобранный DOM общие для всех шагов
+    запуска: поиск RSS, разбор ленты и сбор ссылок не качают URL повторно.
+    """
+
+    def __init__(self, url: str, response: httpx.Response, cached: dict = None):
+        self.url = url
+        self.response = response
+        # Запись из HTTP-кэша с прошлого запуска (валидаторы и служебные поля)
+        self.cached = cached or {}
+        self._tree = None
+
+    @property
+    def status_code(self) -> int:
+        return self.response.status_code
+
+    @property
+    def ok(self) -> bool:
+        return self.response.status_code == 200
+
+    @property
+    def not_modified(self) -> bool:
+        """Сервер ответил 304 на условный GET - с прошлого запуска ничего не менялось."""
+        return self.response.status_code == 304
+
+    @property
+    def content(self) -> bytes:
+        return self.response.content
+
+    @property
+    def text(self) -> str:
+        return self.response.text
+
+    @property
+    def encoding(self) -> str | None:
+        """Кодировка из заголовка Content-Type (None, если сервер её не указал)."""
+        return self.response.charset_encoding
+
+    @property
+    def headers(self) -> dict:
+        return dict(self.response.headers)
+
+    @property
+    def tree(self) -> HtmlElement:
+        """DOM страницы (lxml), разбирается один раз при первом обращении."""
+        if self._tree is None:
+            self._tree = parse_html(self.content, self.encoding)
+        return self._tree
+
+    @property
+    def is_feed(self) -> bool:
+        """Страница сама является RSS/Atom-лентой (например, Google News RSS)."""
+        content_type = self.response.headers.get("content-type", "").lower()
+        if "html" in content_type:
+            return False
+        if any(t in content_type for t in FEED_CONTENT_TYPES):
+            return True
+        head = self.content[:512].lstrip().lower()
+        return any(marker in head for marker in FEED_MARKERS)
+
+class AsyncFetcher:
+    """
+    Асинхронный загрузчик страниц на один запуск скрапера.
+
+    Один keep-alive клиент httpx на все запросы, ограничение числа
+    одновременных запросов - общее и отдельно на каждый хост,
+    чтобы не заваливать один сайт пачкой статей.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = None,
+        per_host_concurrency: int = None,
+        timeout: float = None,
+        cache_scope: str = "",
+    ):
+        max_concurrency = max_concurrency or settings.FETCH_MAX_CONCURRENCY
+        self._per_host_limit = per_host_concurrency or settings.FETCH_PER_HOST_CONCURRENCY
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._hosts: dict[str, asyncio.Semaphore] = {}
+        self._pages: dict[str, asyncio.Task] = {}
+        self._cache_scope = cache_scope
+        # Валидаторы, полученные в этом запуске; пишутся в кэш в конце запуска
+        self._validators: dict[str, dict] = {}
+        self._stats = {"conditional_hit": 0, "conditional_miss": 0, "not_modified": 0, "bytes_saved": 0}
+        self._client = httpx.AsyncClient(
+            timeout=timeout or settings.FETCH_TIMEOUT,
+            headers=DEFAULT_HEADERS,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+            ),
+        )
+
+    async def __aenter__(self) -> "AsyncFetcher":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self._client.aclose()
+        if exc_type is None:
+            save_validators(self._cache_scope, self._validators)
+        incr_metrics("http_cache", self._stats)
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc.lower()
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self._per_host_limit)
+        return self._hosts[host]
+
+    async def fetch(self, url: str, headers: dict = None) -> httpx.Response | None:
+        """
+        Загружает URL. Возвращает ответ с любым статусом
+        или None, если запрос не удался (таймаут, DNS, обрыв соединения).
+        """
+        # Сначала слот хоста, потом общий: ждущие одного медленного хоста
+        # не должны занимать общие слоты, нужные другим хостам
+        async with self._host_semaphore(url), self._global:
+            try:
+                return await self._client.get(url, headers=headers)
+            except httpx.HTTPError as e:
+                logger.warning(f"Failed to fetch {url}: {e!r}")
+                return None
+
+    async def get_page(self, url: str, conditional: bool = False) -> Page | None:
+        """
+        Загружает URL не более одного раза за запуск.
+        Параллельные вызовы для одного URL ждут одну и ту же загрузку.
+
+        conditional=True - условный GET по ETag / Last-Modified с прошлого
+        запуска (для лент и страниц-агрегаторов). При 304 у страницы
+        not_modified=True и нет тела.
+        """
+        if url not in self._pages:
+            self._pages[url] = asyncio.ensure_future(self._load_page(url, conditional))
+        return await self._pages[url]
+
+    def annotate(self, url: str, **fields) -> None:
+        """
+        Добавляет служебные поля к записи кэша URL (например, найденный rss_url),
+        чтобы при 304 в следующем запуске не пришлось разбирать страницу заново.
+        """
+        if url in self._validators:
+            self._validators[url].update(fields)
+
+    def forget(self, url: str) -> None:
+        """Не сохранять валидаторы URL - источник не был обработан до конца."""
+        self._validators.pop(url, None)
+
+    async def _load_page(self, url: str, conditional: bool) -> Page | None:
+        cached = load_validators(self._cache_scope, url) if conditional else {}
+        headers = conditional_headers(cached)
+        if conditional:
+            self._stats["conditional_hit" if headers else "conditional_miss"] += 1
+
+        resp = await self.fetch(url, headers=headers or None)
+        if resp is None:
+            return None
+
+        if resp.status_code == 304:
+            self._stats["not_modified"] += 1
+            self._stats["bytes_saved"] += cached.get("length", 0)
+            # Продлеваем запись в кэше, чтобы она не истекла у стабильных источников
+            self._validators[url] = cached
+        elif conditional and resp.status_code == 200:
+            record = validators_from_response(resp.headers, len(resp.content))
+            if record:
+                self._validators[url] = record
+        return Page(url, resp, cached)
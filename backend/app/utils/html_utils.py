@@ -0,0 +1,50 @@
+import re
+from functools import lru_cache
+from lxml import etree, html as lxml_html
+from lxml.html import HtmlElement
+
+# Текст страницы без содержимого <script>/<style> (как soup.get_text())
+_VISIBLE_TEXT = etree.XPath("//text()[not(ancestor::script) and not(ancestor::style)]")
+
+_META_CHARSET_RE = re.compile(rb"<meta[^>]+charset", re.IGNORECASE)
+
+@lru_cache(maxsize=32)
+def _parser(encoding: str) -> lxml_html.HTMLParser:
+    return lxml_html.HTMLParser(encoding=encoding)
+
+def parse_html(content: str | bytes, encoding: str | None = None) -> HtmlElement:
+    """
+    Разбирает HTML в дерево lxml один раз - дальше по нему работают
+    trafilatura, поиск даты, RSS и ссылок.
+    encoding - charset из заголовка Content-Type, он главнее <meta charset>.
+    Без него lxml смотрит <meta>, а если нет и её - байты в UTF-8 пробуем сами
+    (иначе lxml прочитает их как latin-1).
+    """
+    if isinstance(content, str):
+        # lxml не принимает str с объявлением кодировки - отдаём как UTF-8
+        content, encoding = content.encode("utf-8"), "utf-8"
+    elif not encoding and not _META_CHARSET_RE.search(content[:4096]):
+        try:
+            content.decode("utf-8")
+            encoding = "utf-8"
+        except UnicodeDecodeError:
+            pass
+    if encoding:
+        try:
+            return lxml_html.document_fromstring(content, parser=_parser(encoding.lower()))
+        except LookupError:
+            # Неизвестная lxml кодировка в заголовке - пусть определяет сам
+            pass
+    return lxml_html.document_fromstring(content)
+
+def element_text(el: HtmlElement) -> str:
+    """Текст элемента: строки обрезаны и разделены пробелом ("Press Release<br>May 1" -> "Press Release May 1")."""
+    return " ".join(s for s in (s.strip() for s in el.itertext()) if s)
+
+def visible_text(tree: HtmlElement) -> str:
+    """Видимый текст всей страницы без скриптов и стилей, текстовые узлы через пробел."""
+    return " ".join(_VISIBLE_TEXT(tree))
+
+def has_class(cls: str) -> str:
+    """XPath-условие «в class есть cls» (аналог find_all(class_=cls))."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')"
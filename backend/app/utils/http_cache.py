@@ -0,0 +1,59 @@
+import hashlib
+import json
+import logging
+from app.config import settings
+from app.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+VALIDATORS_KEY_PREFIX = "http:validators:"
+
+def _validators_key(scope: str, url: str) -> str:
+    return VALIDATORS_KEY_PREFIX + hashlib.sha1(f"{scope}\n{url}".encode("utf-8")).hexdigest()
+
+def load_validators(scope: str, url: str) -> dict:
+    """
+    Возвращает сохранённые валидаторы URL: etag, last_modified, length
+    и служебные поля (например, найденный rss_url). Пустой dict - записи нет.
+
+    scope - чей это кэш (компания подписки): 304 означает «ничего нового
+    для этой подписки», поэтому разные подписки на один URL не делят записи.
+    """
+    try:
+        raw = get_redis_client().get(_validators_key(scope, url))
+    except Exception as e:
+        logger.warning(f"⚠️ HTTP cache unavailable for {url}: {e}")
+        return {}
+    return json.loads(raw) if raw else {}
+
+def save_validators(scope: str, records: dict[str, dict]) -> None:
+    """Сохраняет валидаторы пачкой: {url: record}."""
+    if not records:
+        return
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        for url, record in records.items():
+            pipe.set(_validators_key(scope, url), json.dumps(record), ex=settings.HTTP_CACHE_TTL_DAYS * 86400)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to save HTTP validators: {e}")
+
+def conditional_headers(record: dict) -> dict:
+    """Заголовки условного GET по сохранённым валидаторам."""
+    headers = {}
+    if record.get("etag"):
+        headers["If-None-Match"] = record["etag"]
+    if record.get("last_modified"):
+        headers["If-Modified-Since"] = record["last_modified"]
+    return headers
+
+def validators_from_response(headers, length: int) -> dict:
+    """Достаёт ETag / Last-Modified из ответа. Пустой dict - валидировать нечем."""
+    record = {}
+    if headers.get("etag"):
+        record["etag"] = headers["etag"]
+    if headers.get("last-modified"):
+        record["last_modified"] = headers["last-modified"]
+    if record:
+        record["length"] = length
+    return record
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import logging
+import re
+import time
+import unicodedata
+from app.config import settings
+from app.redis_client import get_redis_client
+from app.utils.metrics import incr_metrics
+
+logger = logging.getLogger(__name__)
+
+RESULT_KEY_PREFIX = "llm:result:"
+LRU_KEY = "llm:result:lru"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def normalize_text(text: str) -> str:
+    """Одинаковый текст из разных источников: без различий в пробелах, регистре и юникод-формах."""
+    text = unicodedata.normalize("NFKC", text or "")
+    return _WHITESPACE_RE.sub(" ", text).strip().lower()
+
+def cache_key(text: str, prompt_version: str, model: str, options: dict) -> str:
+    """Ключ результата: хэш нормализованного текста + версия промпта + модель + опции."""
+    fingerprint = json.dumps(
+        [normalize_text(text), prompt_version, model, options],
+        ensure_ascii=False, sort_keys=True,
+    )
+    return RESULT_KEY_PREFIX + hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+
+def get_cached_results(keys: list[str]) -> list[dict | None]:
+    """
+    Достаёт готовые результаты LLM пачкой (None - промах) и обновляет
+    время последнего обращения для LRU. Если Redis недоступен - всё промахи.
+    """
+    if not keys:
+        return []
+    try:
+        client = get_redis_client()
+        raw = client.mget(keys)
+        results = [json.loads(value) if value else None for value in raw]
+        hits = [key for key, result in zip(keys, results) if result is not None]
+        if hits:
+            pipe = client.pipeline(transaction=False)
+            pipe.zadd(LRU_KEY, {key: time.time() for key in hits})
+            for key in hits:
+                pipe.expire(key, settings.LLM_CACHE_TTL_DAYS * 86400)
+            pipe.execute()
+    except Exception as e:
+        logger.warning(f"⚠️ LLM result cache unavailable: {e}")
+        results = [None] * len(keys)
+
+    hit_count = sum(1 for result in results if result is not None)
+    incr_metrics("llm_cache", {"hits": hit_count, "misses": len(keys) - hit_count})
+    return results
+
+def get_cached_result(key: str) -> dict | None:
+    return get_cached_results([key])[0]
+
+def save_result(key: str, result: dict) -> None:
+    """
+    Запоминает результат (summary/event_type/sentiment) на LLM_CACHE_TTL_DAYS.
+    Сверх LLM_CACHE_MAX_ENTRIES вытесняются давно не читанные записи.
+    """
+    try:
+        client = get_redis_client()
+        now = time.time()
+        ttl = settings.LLM_CACHE_TTL_DAYS * 86400
+        pipe = client.pipeline(transaction=False)
+        pipe.set(key, json.dumps(result, ensure_ascii=False), ex=ttl)
+        pipe.zadd(LRU_KEY, {key: now})
+        # Записи, истёкшие по TTL, не должны занимать место в LRU
+        pipe.zremrangebyscore(LRU_KEY, "-inf", now - ttl)
+        pipe.zcard(LRU_KEY)
+        size = pipe.execute()[-1]
+
+        overflow = size - settings.LLM_CACHE_MAX_ENTRIES
+        if overflow > 0:
+            evicted = client.zrange(LRU_KEY, 0, overflow - 1)
+            if evicted:
+                pipe = client.pipeline(transaction=False)
+                pipe.delete(*evicted)
+                pipe.zrem(LRU_KEY, *evicted)
+                pipe.execute()
+                incr_metrics("llm_cache", {"evicted": len(evicted)})
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to save LLM result to cache: {e}")
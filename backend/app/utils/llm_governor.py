@@ -0,0 +1,141 @@
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from app.config import settings
+from app.redis_client import get_redis_client
+from app.utils.metrics import incr_metrics
+from app.utils.llm_priority import priority_queue_names
+
+logger = logging.getLogger(__name__)
+
+INFLIGHT_KEY = "llm:governor:inflight"
+STATE_KEY = "llm:governor:state"
+
+# Занять слот, если занятых меньше текущего лимита. Просроченные слоты
+# (воркер упал, не вернув слот) сначала вычищаются.
+_ACQUIRE_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+local limit = tonumber(redis.call('HGET', KEYS[2], 'limit') or ARGV[4])
+if redis.call('ZCARD', KEYS[1]) < limit then
+    redis.call('ZADD', KEYS[1], ARGV[2], ARGV[3])
+    return 1
+end
+return 0
+"""
+
+class LLMSlot:
+    """Занятый слот: после запроса в него сообщают задержку, успех и объём работы (токены)."""
+
+    def __init__(self, token: str, kind: str = "item"):
+        self.token = token
+        self.kind = kind
+        self.latency = None
+        self.ok = True
+        self.tokens = 0
+
+    def report(self, latency: float, ok: bool, tokens: int = 0) -> None:
+        self.latency = latency
+        self.ok = ok
+        self.tokens = tokens
+
+def _state() -> dict:
+    raw = get_redis_client().hgetall(STATE_KEY)
+    return {k: float(v) for k, v in raw.items()}
+
+def current_limit() -> int:
+    try:
+        return int(_state().get("limit", settings.LLM_MIN_CONCURRENCY))
+    except Exception:
+        return settings.LLM_MIN_CONCURRENCY
+
+def _try_acquire(token: str) -> bool:
+    now = time.time()
+    script = get_redis_client().register_script(_ACQUIRE_SCRIPT)
+    return bool(script(
+        keys=[INFLIGHT_KEY, STATE_KEY],
+        args=[now, now + settings.LLM_SLOT_TIMEOUT, token, settings.LLM_MIN_CONCURRENCY],
+    ))
+
+def _adjust_limit(latency: float | None, ok: bool, kind: str = "item", tokens: int = 0) -> None:
+    """
+    Подбирает число одновременных запросов к Ollama (AIMD по задержке).
+
+    Задержка нормируется на объём работы - секунды на токен (промпт + ответ),
+    и сравнивается только с запросами того же вида (item / batch / translate):
+    короткий перевод не должен задавать планку для суммаризации статьи.
+    baseline - задержка без очереди (минимум, медленно забывается).
+    Пока сглаженная задержка близка к baseline, Ollama справляется
+    параллельно (OLLAMA_NUM_PARALLEL) - лимит +1. Когда запросы начинают
+    ждать друг друга или падают - лимит уменьшается в LLM_BACKOFF_RATIO раз.
+    """
+    client = get_redis_client()
+    state = _state()
+    limit = state.get("limit", settings.LLM_MIN_CONCURRENCY)
+    ewma_field, baseline_field = f"latency_ewma:{kind}", f"latency_baseline:{kind}"
+    ewma = state.get(ewma_field)
+    baseline = state.get(baseline_field)
+
+    # Без счётчиков токенов (ошибка, пустой ответ) задержку не с чем сравнить
+    if latency is not None and ok and tokens:
+        per_token = latency / tokens
+        ewma = per_token if ewma is None else 0.8 * ewma + 0.2 * per_token
+        # baseline медленно ползёт вверх, чтобы пережить смену модели/железа
+        baseline = per_token if baseline is None else min(per_token, baseline * 1.01)
+
+    if not ok or (ewma is not None and ewma > baseline * settings.LLM_LATENCY_TOLERANCE):
+        limit = max(settings.LLM_MIN_CONCURRENCY, int(limit * settings.LLM_BACKOFF_RATIO))
+        event = "decrease"
+    else:
+        limit = min(settings.LLM_MAX_CONCURRENCY, limit + 1)
+        event = "increase"
+
+    mapping = {"limit": limit}
+    if ewma is not None:
+        mapping.update({ewma_field: ewma, baseline_field: baseline})
+    client.hset(STATE_KEY, mapping=mapping)
+    incr_metrics("llm_governor", {
+        event: 1,
+        "requests": 1,
+        "errors": 0 if ok else 1,
+        "latency_total_s": float(latency or 0),
+    })
+
+@contextmanager
+def llm_slot(kind: str = "item"):
+    """
+    Ждёт свободный слот для запроса к Ollama (общий лимит на все воркеры)
+    и по завершении подстраивает лимит по задержке запросов вида kind.
+    Если Redis недоступен, запрос идёт без ограничения.
+    """
+    token = uuid.uuid4().hex
+    try:
+        waited = 0.0
+        while not _try_acquire(token):
+            time.sleep(settings.LLM_SLOT_POLL_SECONDS)
+            waited += settings.LLM_SLOT_POLL_SECONDS
+        if waited:
+            incr_metrics("llm_governor", {"wait_total_s": waited})
+    except Exception as e:
+        logger.warning(f"⚠️ LLM governor unavailable, calling Ollama without limit: {e}")
+        yield LLMSlot(token, kind)
+        return
+
+    slot = LLMSlot(token, kind)
+    try:
+        yield slot
+    finally:
+        try:
+            get_redis_client().zrem(INFLIGHT_KEY, token)
+            # Без отчёта (ошибка самого запроса, не нагрузки) лимит не трогаем
+            if slot.latency is not None:
+                _adjust_limit(slot.latency, slot.ok, slot.kind, slot.tokens)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to release LLM slot: {e}")
+
+def llm_backlog() -> int:
+    """Сколько LLM-задач ждёт в очереди брокера (по всем уровням приоритета)."""
+    pipe = get_redis_client().pipeline(transaction=False)
+    for name in priority_queue_names(settings.LLM_QUEUE):
+        pipe.llen(name)
+    return sum(pipe.execute())
@@ -0,0 +1,50 @@
+import logging
+import time
+from app.config import settings
+from app.redis_client import get_redis_client
+from app.utils.metrics import incr_metrics
+from app.utils.staging import extend_items
+
+logger = logging.getLogger(__name__)
+
+PARKED_KEY = "llm:parked"
+ATTEMPTS_KEY_PREFIX = "llm:parked:attempts:"
+
+def park_items(item_ids: list[str]) -> list[str]:
+    """
+    Откладывает элементы, пока Ollama недоступен. Сами элементы остаются
+    во временном хранилище (TTL продлевается), здесь - только их id.
+    Возвращает id, отложенные уже LLM_PARK_MAX_ATTEMPTS раз: их больше
+    не откладываем, вызывающий сохраняет их без LLM.
+    """
+    if not item_ids:
+        return []
+    client = get_redis_client()
+    pipe = client.pipeline(transaction=False)
+    for item_id in item_ids:
+        pipe.incr(ATTEMPTS_KEY_PREFIX + item_id)
+        pipe.expire(ATTEMPTS_KEY_PREFIX + item_id, settings.STAGING_TTL_HOURS * 3600)
+    attempts = pipe.execute()[::2]
+    exhausted = [i for i, n in zip(item_ids, attempts) if n > settings.LLM_PARK_MAX_ATTEMPTS]
+    parked = [i for i, n in zip(item_ids, attempts) if n <= settings.LLM_PARK_MAX_ATTEMPTS]
+
+    if parked:
+        # Время первой парковки не перезаписываем - разбираем от старых к новым
+        client.zadd(PARKED_KEY, {item_id: time.time() for item_id in parked}, nx=True)
+        extend_items(parked)
+        logger.warning(f"🅿️ Ollama unavailable, parked {len(parked)} items")
+    if exhausted:
+        logger.warning(f"🅿️ {len(exhausted)} items parked {settings.LLM_PARK_MAX_ATTEMPTS} times, giving up on LLM")
+    incr_metrics("llm_parking", {"parked": len(parked), "gave_up": len(exhausted)})
+    return exhausted
+
+def take_parked(limit: int) -> list[str]:
+    """Забирает до limit самых давних отложенных id для повторной постановки в LLM-очередь."""
+    if limit <= 0:
+        return []
+    item_ids = [item_id for item_id, _ in get_redis_client().zpopmin(PARKED_KEY, limit)]
+    incr_metrics("llm_parking", {"drained": len(item_ids)})
+    return item_ids
+
+def parked_count() -> int:
+    return get_redis_client().zcard(PARKED_KEY)
@@ -0,0 +1,120 @@
+import logging
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from app.config import settings
+from app.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Классы приоритета -> приоритет сообщения Celery (Redis-брокер: меньше - раньше).
+# Значения совпадают с priority_steps в celery_app
+PRIORITY_CLASSES = {"urgent": 0, "normal": 3, "low": 6, "stale": 9}
+PRIORITY_STEPS = sorted(PRIORITY_CLASSES.values())
+PRIORITY_SEP = ":"
+
+WAIT_KEY_PREFIX = "llm:queue_wait:"
+WAIT_SAMPLES = 1000
+
+# Вклад источника: Telegram - самые оперативные, HTML-краулер чаще всего приносит старое
+SOURCE_WEIGHTS = {"telegram": 1.0, "rss": 0.5, "html_crawler": 0.0}
+
+def _published_at(item: dict) -> datetime | None:
+    """Дата публикации элемента: ISO из date или RFC 822 / ISO из published (RSS)."""
+    for value in (item.get("date"), item.get("published")):
+        if not value:
+            continue
+        try:
+            dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            try:
+                dt = parsedate_to_datetime(str(value))
+            except (TypeError, ValueError):
+                continue
+        return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+    return None
+
+def assign_priority(item: dict, now: float | None = None) -> str:
+    """
+    Определяет класс приоритета элемента и записывает в него priority_class,
+    enqueued_at и deadline (до какого момента новость считается свежей).
+
+    Очки: свежесть публикации (до 3), тип источника (до 1), просмотры
+    Telegram (до 1), упоминание компании в заголовке (0.5). Элемент старше
+    LLM_FRESHNESS_HOURS сразу получает класс stale.
+    """
+    now = now or time.time()
+    published = _published_at(item)
+    freshness = settings.LLM_FRESHNESS_HOURS * 3600
+
+    score = SOURCE_WEIGHTS.get(item.get("source"), 0.0)
+    if published is None:
+        # Дату не нашли - считаем «сегодняшней», но не срочной
+        score += 1.0
+        deadline = now + freshness
+    else:
+        age_hours = (now - published.timestamp()) / 3600
+        score += 3.0 if age_hours < 1 else 2.0 if age_hours < 6 else 1.0 if age_hours < 24 else 0.0
+        deadline = published.timestamp() + freshness
+
+    views = item.get("views") or 0
+    score += 1.0 if views >= 10000 else 0.5 if views >= 1000 else 0.0
+    if (item.get("relevance") or 0) >= 1.0:
+        score += 0.5
+
+    if deadline <= now:
+        priority_class = "stale"
+    elif score >= 3.5:
+        priority_class = "urgent"
+    elif score >= 2.0:
+        priority_class = "normal"
+    else:
+        priority_class = "low"
+
+    item.update({"priority_class": priority_class, "enqueued_at": now, "deadline": deadline})
+    return priority_class
+
+def task_priority(item: dict) -> int:
+    return PRIORITY_CLASSES.get(item.get("priority_class"), PRIORITY_CLASSES["normal"])
+
+def is_overdue(item: dict, now: float | None = None) -> bool:
+    """Срок свежести прошёл, а элемент ещё не понижен до stale."""
+    deadline = item.get("deadline")
+    return bool(deadline) and item.get("priority_class") != "stale" and deadline <= (now or time.time())
+
+def record_queue_wait(item: dict) -> None:
+    """Сколько элемент ждал в LLM-очереди - в скользящую выборку его класса."""
+    enqueued_at = item.get("enqueued_at")
+    if not enqueued_at:
+        return
+    key = WAIT_KEY_PREFIX + item.get("priority_class", "normal")
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        pipe.lpush(key, round(time.time() - enqueued_at, 2))
+        pipe.ltrim(key, 0, WAIT_SAMPLES - 1)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to record queue wait: {e}")
+
+def _percentile(values: list[float], q: float) -> float:
+    index = min(len(values) - 1, int(round(q * (len(values) - 1))))
+    return values[index]
+
+def queue_wait_percentiles() -> dict:
+    """p50/p90/p99 ожидания в LLM-очереди (секунды) по последним WAIT_SAMPLES элементам каждого класса."""
+    client = get_redis_client()
+    result = {}
+    for priority_class in PRIORITY_CLASSES:
+        values = sorted(float(v) for v in client.lrange(WAIT_KEY_PREFIX + priority_class, 0, -1))
+        if values:
+            result[priority_class] = {
+                "samples": len(values),
+                "p50": _percentile(values, 0.5),
+                "p90": _percentile(values, 0.9),
+                "p99": _percentile(values, 0.99),
+            }
+    return result
+
+def priority_queue_names(queue: str) -> list[str]:
+    """Имена Redis-списков очереди с приоритетами (как их называет kombu)."""
+    return [queue if step == 0 else f"{queue}{PRIORITY_SEP}{step}" for step in PRIORITY_STEPS]
@@ -0,0 +1,40 @@
+import logging
+from app.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+METRICS_PREFIX = "metrics:"
+
+def incr_metrics(group: str, counters: dict) -> None:
+    """
+    Увеличивает счётчики группы (Redis-хэш metrics:<group>).
+    Ошибки Redis не должны ронять конвейер - только логируем.
+    """
+    counters = {k: v for k, v in counters.items() if v}
+    if not counters:
+        return
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        for field, amount in counters.items():
+            if isinstance(amount, float):
+                pipe.hincrbyfloat(f"{METRICS_PREFIX}{group}", field, amount)
+            else:
+                pipe.hincrby(f"{METRICS_PREFIX}{group}", field, amount)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to update metrics '{group}': {e}")
+
+def _to_number(value: str):
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+def get_metrics() -> dict:
+    """Возвращает все группы счётчиков: {group: {field: value}}."""
+    client = get_redis_client()
+    result = {}
+    for key in client.scan_iter(f"{METRICS_PREFIX}*"):
+        group = key[len(METRICS_PREFIX):]
+        result[group] = {k: _to_number(v) for k, v in client.hgetall(key).items()}
+    return result
@@ -0,0 +1,335 @@
+import logging
+import random
+import threading
+import time
+import uuid
+import requests
+from requests.adapters import HTTPAdapter
+from app.config import settings
+from app.redis_client import get_redis_client
+from app.utils.metrics import incr_metrics
+
+logger = logging.getLogger(__name__)
+
+NS = 1_000_000_000
+
+INFLIGHT_KEY_PREFIX = "llm:hosts:inflight:"
+EJECTED_KEY = "llm:hosts:ejected"
+FAILURES_KEY = "llm:hosts:failures"
+HOST_METRICS_PREFIX = "ollama_host:"
+
+class OllamaUnavailable(Exception):
+    """Ollama не ответил: все хосты исключены из пула, нет соединения, таймаут или 5xx."""
+
+class OllamaRequestError(Exception):
+    """Хост ответил, но запрос не удался (4xx, например нет модели, или битый JSON) - это не сбой хоста."""
+
+def is_outage(error: Exception) -> bool:
+    """Сбой хоста, а не конкретного запроса: нет соединения, таймаут или 5xx."""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code >= 500
+    return False
+
+# Загрузка модели дольше секунды - модель была выгружена (холодный старт)
+COLD_LOAD_SECONDS = 1.0
+
+def _keep_alive():
+    """OLLAMA_KEEP_ALIVE: длительность ("30m", "2h") или число секунд (-1 - держать всегда)."""
+    value = settings.OLLAMA_KEEP_ALIVE
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+class OllamaClient:
+    """
+    Клиент Ollama на одном requests.Session: соединения переиспользуются
+    между вызовами, модель держится в памяти keep_alive.
+    """
+
+    def __init__(self, host: str, pool_size: int, timeout: float):
+        self.host = host.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def generate(self, prompt: str, model: str, options: dict, format: dict | str | None = None) -> dict:
+        """
+        POST /api/generate без стриминга. Возвращает JSON ответа целиком.
+        format - "json" или JSON-схема: Ollama ограничивает вывод модели этой схемой.
+        """
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": _keep_alive(),
+            "options": options,
+        }
+        if format is not None:
+            payload["format"] = format
+        resp = self.session.post(f"{self.host}/api/generate", json=payload, timeout=self.timeout)
+        resp.raise_for_status()
+        data = resp.json()
+        record_timings(model, data)
+        return data
+
+    def embed(self, text: str, model: str) -> list[float]:
+        """POST /api/embeddings - вектор текста."""
+        resp = self.session.post(
+            f"{self.host}/api/embeddings",
+            json={"model": model, "prompt": text, "keep_alive": _keep_alive()},
+            timeout=self.timeout,
+        )
+        resp.raise_for_status()
+        return resp.json()["embedding"]
+
+    def preload(self, model: str) -> None:
+        """Запрос без prompt только загружает модель в память (и продлевает keep_alive)."""
+        resp = self.session.post(
+            f"{self.host}/api/generate",
+            json={"model": model, "keep_alive": _keep_alive()},
+            timeout=self.timeout,
+        )
+        resp.raise_for_status()
+        load_s = resp.json().get("load_duration", 0) / NS
+        logger.info(f"🔥 Ollama model {model} preloaded in {load_s:.1f}s (keep_alive={settings.OLLAMA_KEEP_ALIVE})")
+
+def record_timings(model: str, data: dict) -> dict:
+    """
+    Тайминги из ответа Ollama (наносекунды) - в лог и в метрики группы ollama.
+    Возвращает их в секундах.
+    """
+    timings = {
+        "load_s": data.get("load_duration", 0) / NS,
+        "prompt_tokens": data.get("prompt_eval_count", 0),
+        "prompt_eval_s": data.get("prompt_eval_duration", 0) / NS,
+        "eval_tokens": data.get("eval_count", 0),
+        "eval_s": data.get("eval_duration", 0) / NS,
+        "total_s": data.get("total_duration", 0) / NS,
+    }
+    tokens_per_s = timings["eval_tokens"] / timings["eval_s"] if timings["eval_s"] else 0
+    logger.info(
+        f"🧠 Ollama {model}: total {timings['total_s']:.1f}s, load {timings['load_s']:.2f}s, "
+        f"prompt {timings['prompt_tokens']} tok, eval {timings['eval_tokens']} tok ({tokens_per_s:.1f} tok/s)"
+    )
+    incr_metrics("ollama", {
+        "calls": 1,
+        "cold_loads": 1 if timings["load_s"] > COLD_LOAD_SECONDS else 0,
+        "load_seconds": float(timings["load_s"]),
+        "prompt_tokens": timings["prompt_tokens"],
+        "prompt_eval_seconds": float(timings["prompt_eval_s"]),
+        "eval_tokens": timings["eval_tokens"],
+        "eval_seconds": float(timings["eval_s"]),
+        "total_seconds": float(timings["total_s"]),
+    })
+    return timings
+
+def probe_host(host: str, timeout: float = 5) -> list[str] | None:
+    """Проверка живости через /api/tags (как /health/ollama). Список моделей или None."""
+    try:
+        resp = requests.get(f"{host.rstrip('/')}/api/tags", timeout=timeout)
+        if resp.status_code == 200:
+            return [m["name"] for m in resp.json().get("models", [])]
+        logger.warning(f"⚠️ Ollama {host} health check: HTTP {resp.status_code}")
+    except Exception as e:
+        logger.warning(f"⚠️ Ollama {host} health check failed: {e}")
+    return None
+
+class OllamaPool:
+    """
+    Несколько хостов Ollama (OLLAMA_HOSTS) за одним интерфейсом generate/preload.
+
+    Запрос уходит на здоровый хост с наименьшим числом незавершённых запросов
+    (счётчики общие для всех воркеров - в Redis). Хост, не ответивший
+    OLLAMA_EJECT_AFTER_FAILURES раз подряд или не прошедший проверку /api/tags,
+    исключается на OLLAMA_EJECT_SECONDS; вернуть его раньше может проверка
+    check_ollama_hosts в beat.
+
+    Исключение всех хостов работает как размыкатель цепи: generate сразу
+    бросает OllamaUnavailable, не дожидаясь таймаутов. По истечении
+    OLLAMA_EJECT_SECONDS хост снова пробуется, и первая же ошибка (счётчик
+    ошибок подряд не сброшен) исключает его опять.
+    """
+
+    def __init__(self, hosts: list[str], pool_size: int, timeout: float):
+        self.clients = {host.rstrip("/"): OllamaClient(host, pool_size, timeout) for host in hosts}
+        self.hosts = list(self.clients)
+
+    def healthy_hosts(self) -> list[str]:
+        """Хосты, не исключённые сейчас. Без Redis считаем здоровыми все."""
+        try:
+            ejected = get_redis_client().hgetall(EJECTED_KEY)
+        except Exception as e:
+            logger.warning(f"⚠️ Ollama host state unavailable: {e}")
+            return self.hosts
+        now = time.time()
+        return [h for h in self.hosts if float(ejected.get(h, 0)) <= now]
+
+    def is_available(self) -> bool:
+        return bool(self.healthy_hosts())
+
+    def _pick(self, exclude: set[str] = frozenset()) -> str | None:
+        hosts = [h for h in self.healthy_hosts() if h not in exclude]
+        if len(hosts) <= 1:
+            return hosts[0] if hosts else None
+        try:
+            now = time.time()
+            pipe = get_redis_client().pipeline(transaction=False)
+            for host in hosts:
+                pipe.zcount(INFLIGHT_KEY_PREFIX + host, now, "+inf")
+            outstanding = dict(zip(hosts, pipe.execute()))
+        except Exception:
+            return random.choice(hosts)
+        least = min(outstanding.values())
+        return random.choice([h for h in hosts if outstanding[h] == least])
+
+    def _begin(self, host: str) -> str:
+        token = uuid.uuid4().hex
+        try:
+            # Просроченные записи (воркер упал посреди запроса) не считаются
+            get_redis_client().zadd(INFLIGHT_KEY_PREFIX + host, {token: time.time() + settings.OLLAMA_TIMEOUT})
+        except Exception:
+            pass
+        return token
+
+    def _finish(self, host: str, token: str, latency: float, ok: bool) -> None:
+        try:
+            client = get_redis_client()
+            pipe = client.pipeline(transaction=False)
+            pipe.zrem(INFLIGHT_KEY_PREFIX + host, token)
+            pipe.zremrangebyscore(INFLIGHT_KEY_PREFIX + host, "-inf", time.time())
+            if ok:
+                pipe.hdel(FAILURES_KEY, host)
+            else:
+                pipe.hincrby(FAILURES_KEY, host, 1)
+            failures = pipe.execute()[-1]
+            if not ok and failures >= settings.OLLAMA_EJECT_AFTER_FAILURES:
+                self.eject(host, f"{failures} failures in a row")
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to update Ollama host state: {e}")
+        incr_metrics(HOST_METRICS_PREFIX + host, {
+            "requests": 1,
+            "errors": 0 if ok else 1,
+            "latency_seconds": float(latency),
+        })
+
+    def eject(self, host: str, reason: str) -> None:
+        get_redis_client().hset(EJECTED_KEY, host, time.time() + settings.OLLAMA_EJECT_SECONDS)
+        incr_metrics(HOST_METRICS_PREFIX + host, {"ejections": 1})
+        logger.warning(f"🚫 Ollama host {host} ejected for {settings.OLLAMA_EJECT_SECONDS}s: {reason}")
+
+    def admit(self, host: str) -> None:
+        client = get_redis_client()
+        if client.hdel(EJECTED_KEY, host):
+            logger.info(f"✅ Ollama host {host} re-admitted")
+        client.hdel(FAILURES_KEY, host)
+
+    def _fail(self, host: str, token: str, started: float, error: Exception) -> Exception:
+        """
+        Учитывает ошибку запроса: сбой хоста (is_outage) считается в его исключение
+        из пула, остальное - ошибка самого запроса, хост при этом исправен.
+        """
+        latency = time.monotonic() - started
+        if is_outage(error):
+            self._finish(host, token, latency, False)
+            return OllamaUnavailable(f"{host}: {error}")
+        self._finish(host, token, latency, True)
+        incr_metrics(HOST_METRICS_PREFIX + host, {"bad_requests": 1})
+        return OllamaRequestError(f"{host}: {error}")
+
+    def generate(self, prompt: str, model: str, options: dict, format: dict | str | None = None) -> dict:
+        """
+        generate на наименее загруженном здоровом хосте. Если хост недоступен
+        (соединение не установилось), запрос повторяется на следующем.
+        Сбой хоста приходит как OllamaUnavailable, ошибка запроса - OllamaRequestError.
+        """
+        tried = set()
+        while True:
+            host = self._pick(exclude=tried)
+            if host is None:
+                raise OllamaUnavailable("no healthy Ollama hosts")
+            tried.add(host)
+            token = self._begin(host)
+            started = time.monotonic()
+            try:
+                data = self.clients[host].generate(prompt, model, options, format)
+            except requests.ConnectionError as e:
+                self._finish(host, token, time.monotonic() - started, False)
+                if self._pick(exclude=tried) is None:
+                    raise OllamaUnavailable(f"{host}: {e}") from e
+                continue
+            except (requests.RequestException, ValueError) as e:
+                raise self._fail(host, token, started, e) from e
+            self._finish(host, token, time.monotonic() - started, True)
+            return data
+
+    def embed(self, text: str, model: str) -> list[float]:
+        """Эмбеддинг на наименее загруженном здоровом хосте (без повторов на других)."""
+        host = self._pick()
+        if host is None:
+            raise OllamaUnavailable("no healthy Ollama hosts")
+        token = self._begin(host)
+        started = time.monotonic()
+        try:
+            vector = self.clients[host].embed(text, model)
+        except (requests.RequestException, ValueError, KeyError) as e:
+            raise self._fail(host, token, started, e) from e
+        self._finish(host, token, time.monotonic() - started, True)
+        return vector
+
+    def preload(self, model: str) -> None:
+        for host in self.healthy_hosts():
+            try:
+                self.clients[host].preload(model)
+            except Exception as e:
+                logger.warning(f"⚠️ Ollama model preload failed on {host}: {e}")
+
+    def check_hosts(self) -> dict:
+        """Проверяет все хосты через /api/tags: живые возвращает в пул, мёртвые исключает."""
+        report = {}
+        for host in self.hosts:
+            models = probe_host(host)
+            try:
+                if models is None:
+                    self.eject(host, "health check failed")
+                else:
+                    self.admit(host)
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to update Ollama host state: {e}")
+            report[host] = {"healthy": models is not None, "models": models or []}
+        return report
+
+    def host_states(self) -> dict:
+        """Состояние хостов для /health/ollama: исключён ли, незавершённые запросы, ошибки подряд."""
+        client = get_redis_client()
+        now = time.time()
+        ejected = client.hgetall(EJECTED_KEY)
+        failures = client.hgetall(FAILURES_KEY)
+        return {
+            host: {
+                "ejected_for_s": max(0, round(float(ejected.get(host, 0)) - now)),
+                "outstanding": client.zcount(INFLIGHT_KEY_PREFIX + host, now, "+inf"),
+                "failures_in_row": int(failures.get(host, 0)),
+            }
+            for host in self.hosts
+        }
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_ollama_client() -> OllamaPool:
+    """Общий для процесса пул хостов Ollama (потоки LLM-воркера делят пулы соединений)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OllamaPool(
+                    settings.OLLAMA_HOSTS,
+                    pool_size=max(settings.LLM_MAX_CONCURRENCY, 1),
+                    timeout=settings.OLLAMA_TIMEOUT,
+                )
+    return _client
@@ -0,0 +1,77 @@
+import logging
+from app.config import settings
+from app.utils.company_matcher import get_company_matcher, get_matcher_for
+from app.utils.metrics import incr_metrics
+
+logger = logging.getLogger(__name__)
+
+# Вес упоминаний: в заголовке - почти наверняка про компанию, в начале текста - скорее всего
+TITLE_WEIGHT = 1.0
+LEAD_WEIGHT = 0.5
+MENTION_WEIGHT = 0.25
+SYNONYM_WEIGHT = 0.15
+LEAD_CHARS = 300
+MAX_MENTIONS = 4
+
+def _score(title_mentions: dict, text_mentions: dict, company: str) -> float:
+    """Оценка по упоминаниям из CompanyMatcher.mentions() заголовка и текста."""
+    company = company.lower().strip()
+    # Целые слова: «mac» не находится в «machine» - это гарантирует автомат
+    in_title = title_mentions.get(company, [])
+    in_text = text_mentions.get(company, [])
+
+    score = 0.0
+    if in_title:
+        score += TITLE_WEIGHT
+    if any(start < LEAD_CHARS for start, _ in in_text):
+        score += LEAD_WEIGHT
+    names = sum(1 for _, is_name in in_text if is_name)
+    score += MENTION_WEIGHT * min(names, MAX_MENTIONS)
+    score += SYNONYM_WEIGHT * min(len(in_text) - names, MAX_MENTIONS)
+    return round(score, 3)
+
+def relevance_score(title: str, text: str, company: str) -> float:
+    """
+    Насколько элемент про компанию: взвешенные упоминания названия и синонимов
+    в заголовке, начале и остальном тексте. 0 - компания не упоминается вовсе.
+    """
+    if not company:
+        return 0.0
+    matcher = get_company_matcher([company])
+    return _score(matcher.mentions(title or ""), matcher.mentions(text or ""), company)
+
+def split_relevant(items: list[dict]) -> tuple[list[dict], list[dict]]:
+    """
+    Делит элементы на релевантные компании (идут в LLM) и нерелевантные
+    (сохраняются без обработки). Счётчики - по источникам в группе relevance.
+    """
+    if not settings.RELEVANCE_FILTER_ENABLED:
+        return items, []
+
+    relevant, dropped = [], []
+    counters = {}
+    # Общий автомат активных подписок: каждый текст сканируется один раз,
+    # заодно видно, каких ещё компаний касается элемент
+    matcher = get_matcher_for({item.get("company") or "" for item in items})
+    for item in items:
+        company = item.get("company") or ""
+        title_mentions = matcher.mentions(item.get("title") or "")
+        text_mentions = matcher.mentions(item.get("text") or "")
+        item["companies_mentioned"] = sorted(title_mentions.keys() | text_mentions.keys())
+        item["relevance"] = _score(title_mentions, text_mentions, company) if company else 0.0
+        if item.get("matched"):
+            # Упоминание уже подтвердил скрапер (Telegram): даже позднее упоминание
+            # алиасом не повод сохранять без LLM
+            item["relevance"] = max(item["relevance"], settings.RELEVANCE_THRESHOLD)
+        source = item.get("source", "unknown")
+        if item["relevance"] >= settings.RELEVANCE_THRESHOLD:
+            relevant.append(item)
+            counters[f"{source}_passed"] = counters.get(f"{source}_passed", 0) + 1
+        else:
+            dropped.append(item)
+            counters[f"{source}_dropped"] = counters.get(f"{source}_dropped", 0) + 1
+
+    incr_metrics("relevance", counters)
+    if dropped:
+        logger.info(f"🎯 Relevance filter: {len(relevant)} passed, {len(dropped)} dropped")
+    return relevant, dropped
@@ -0,0 +1,71 @@
+import logging
+import time
+from app.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+RUN_KEY_PREFIX = "run:"
+RUN_TTL_SECONDS = 24 * 3600
+
+def _run_key(run_id: str) -> str:
+    return RUN_KEY_PREFIX + run_id
+
+def start_run(run_id: str, company_name: str, sources_total: int) -> None:
+    """Регистрирует запуск мониторинга: сколько скраперов должно отчитаться."""
+    try:
+        client = get_redis_client()
+        client.hset(_run_key(run_id), mapping={
+            "company": company_name,
+            "sources_total": sources_total,
+            "sources_done": 0,
+            "items_emitted": 0,
+            "llm_submitted": 0,
+            "started_at": time.time(),
+        })
+        client.expire(_run_key(run_id), RUN_TTL_SECONDS)
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to register run {run_id}: {e}")
+
+def record_emitted(run_id: str, items_emitted: int, llm_submitted: int) -> None:
+    """Скрапер отдал пачку элементов в LLM-стадию."""
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        pipe.hincrby(_run_key(run_id), "items_emitted", items_emitted)
+        pipe.hincrby(_run_key(run_id), "llm_submitted", llm_submitted)
+        if llm_submitted:
+            pipe.hsetnx(_run_key(run_id), "first_item_at", time.time())
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to update run {run_id}: {e}")
+
+def record_summary(run_id: str) -> None:
+    """LLM обработал элемент запуска - запоминаем время первой суммаризации."""
+    try:
+        get_redis_client().hsetnx(_run_key(run_id), "first_summary_at", time.time())
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to update run {run_id}: {e}")
+
+def source_done(run_id: str) -> None:
+    """Скрапер закончил. Когда отчитались все - запуск завершён."""
+    try:
+        client = get_redis_client()
+        done = client.hincrby(_run_key(run_id), "sources_done", 1)
+        total = int(client.hget(_run_key(run_id), "sources_total") or 0)
+        if done >= total:
+            client.hsetnx(_run_key(run_id), "finished_at", time.time())
+            logger.info(f"🏁 Run {run_id} finished: {get_run(run_id)}")
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to update run {run_id}: {e}")
+
+def get_run(run_id: str) -> dict | None:
+    """Состояние запуска; время до первого элемента/суммаризации - в секундах."""
+    raw = get_redis_client().hgetall(_run_key(run_id))
+    if not raw:
+        return None
+    run = {k: (v if k == "company" else float(v)) for k, v in raw.items()}
+    started = run.get("started_at", 0)
+    for field in ("first_item_at", "first_summary_at", "finished_at"):
+        if field in run:
+            run[f"{field[:-3]}_seconds"] = round(run[field] - started, 2)
+    run["status"] = "finished" if "finished_at" in run else "running"
+    return run
@@ -0,0 +1,119 @@
+import hashlib
+import logging
+from app.config import settings
+from app.database import SessionLocal
+from app.models.news_item import NewsItem
+from app.redis_client import get_redis_client
+from app.utils.metrics import incr_metrics
+from app.utils.url_utils import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+SEEN_KEY_PREFIX = "seen:url:"
+
+def _seen_key(url: str) -> str:
+    return SEEN_KEY_PREFIX + hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+def _claim_in_redis(urls: list[str]) -> list[bool] | None:
+    """
+    Атомарно «проверяет и занимает» URL пачкой (SET NX EX в одном pipeline).
+    Пока элемент ждёт LLM, это только блокировка на SEEN_CLAIM_TTL_HOURS:
+    надолго URL помечает mark_seen, когда запись попала в БД.
+    True - URL новый, False - уже был. None - Redis недоступен.
+    """
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        for url in urls:
+            pipe.set(_seen_key(url), 1, nx=True, ex=settings.SEEN_CLAIM_TTL_HOURS * 3600)
+        return [bool(r) for r in pipe.execute()]
+    except Exception as e:
+        logger.warning(f"⚠️ Seen-set in Redis unavailable, falling back to DB only: {e}")
+        return None
+
+def mark_seen(urls: list[str]) -> None:
+    """Помечает URL виденными на SEEN_URL_TTL_DAYS: запись уже в БД."""
+    if not urls:
+        return
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        for url in urls:
+            pipe.set(_seen_key(url), 1, ex=settings.SEEN_URL_TTL_DAYS * 86400)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to mark URLs as seen: {e}")
+
+def release_seen(urls: list[str]) -> None:
+    """Снимает блокировку URL, если элемент не дошёл до БД: следующий запуск возьмёт его снова."""
+    if not urls:
+        return
+    try:
+        get_redis_client().delete(*[_seen_key(url) for url in urls])
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to release seen URLs: {e}")
+        return
+    incr_metrics("seen_filter", {"released": len(urls)})
+
+def _known_in_db(urls: dict[str, str]) -> set[str]:
+    """
+    Возвращает канонические URL, которые уже есть в news_items.
+    urls: {канонический URL: исходный URL} - старые записи хранились без канонизации.
+    """
+    if not urls:
+        return set()
+    lookup = {}
+    for canonical, original in urls.items():
+        lookup[canonical] = canonical
+        lookup[original] = canonical
+
+    db = SessionLocal()
+    try:
+        rows = db.query(NewsItem.url).filter(NewsItem.url.in_(list(lookup))).all()
+        return {lookup[row.url] for row in rows}
+    finally:
+        db.close()
+
+def filter_seen_items(items: list) -> tuple[list[dict], dict]:
+    """
+    Отбрасывает уже виденные элементы до постановки LLM-задач.
+
+    URL канонизируется и записывается обратно в элемент. Проверка идёт пачкой:
+    сначала seen-set в Redis, затем БД для тех URL, которых Redis не знал
+    (например, после очистки Redis). Возвращает (новые элементы, счётчики).
+    """
+    stats = {"total": len(items), "invalid": 0, "skipped_batch": 0, "skipped_redis": 0, "skipped_db": 0, "passed": 0}
+
+    unique = {}
+    originals = {}
+    for item in items:
+        if not isinstance(item, dict) or not item.get("url"):
+            logger.warning(f"Skipping item without url: {item}")
+            stats["invalid"] += 1
+            continue
+        url = canonicalize_url(item["url"])
+        if url in unique:
+            stats["skipped_batch"] += 1
+            continue
+        originals[url] = item["url"]
+        item["url"] = url
+        unique[url] = item
+
+    claimed = _claim_in_redis(list(unique)) if unique else []
+    if claimed is None:
+        candidates = list(unique)
+    else:
+        candidates = [url for url, is_new in zip(unique, claimed) if is_new]
+    stats["skipped_redis"] = len(unique) - len(candidates)
+
+    try:
+        known = _known_in_db({url: originals[url] for url in candidates})
+    except Exception as e:
+        logger.warning(f"⚠️ Seen check in DB failed: {e}")
+        known = set()
+    stats["skipped_db"] = len(known)
+
+    fresh = [unique[url] for url in candidates if url not in known]
+    stats["passed"] = len(fresh)
+
+    incr_metrics("seen_filter", stats)
+    logger.info(f"🔁 Seen filter: {stats}")
+    return fresh, stats
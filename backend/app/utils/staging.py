@@ -0,0 +1,48 @@
+import json
+import logging
+import uuid
+from app.config import settings
+from app.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+STAGED_KEY_PREFIX = "staged:item:"
+
+def _staged_key(item_id: str) -> str:
+    return STAGED_KEY_PREFIX + item_id
+
+def stage_items(items: list[dict]) -> list[str]:
+    """
+    Кладёт сырые элементы во временное хранилище (Redis, TTL) и возвращает их id.
+    Дальше по Celery ходят только id, а не тексты статей (claim-check).
+    """
+    if not items:
+        return []
+    item_ids = [uuid.uuid4().hex for _ in items]
+    pipe = get_redis_client().pipeline(transaction=False)
+    for item_id, item in zip(item_ids, items):
+        pipe.set(_staged_key(item_id), json.dumps(item, ensure_ascii=False), ex=settings.STAGING_TTL_HOURS * 3600)
+    pipe.execute()
+    return item_ids
+
+def load_item(item_id: str) -> dict | None:
+    """Достаёт элемент по id. None - истёк TTL или уже обработан."""
+    raw = get_redis_client().get(_staged_key(item_id))
+    return json.loads(raw) if raw else None
+
+def restage_item(item_id: str, item: dict) -> None:
+    """Перезаписывает элемент под тем же id (например, после смены приоритета)."""
+    get_redis_client().set(_staged_key(item_id), json.dumps(item, ensure_ascii=False), ex=settings.STAGING_TTL_HOURS * 3600)
+
+def extend_items(item_ids: list[str]) -> None:
+    """Продлевает TTL элементов, которые ещё подождут LLM (например, пока Ollama недоступен)."""
+    pipe = get_redis_client().pipeline(transaction=False)
+    for item_id in item_ids:
+        pipe.expire(_staged_key(item_id), settings.STAGING_TTL_HOURS * 3600)
+    pipe.execute()
+
+def drop_item(item_id: str) -> None:
+    try:
+        get_redis_client().delete(_staged_key(item_id))
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to drop staged item {item_id}: {e}")
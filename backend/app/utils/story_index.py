@@ -0,0 +1,181 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+import numpy as np
+from app.config import settings
+from app.redis_client import get_redis_client
+from app.utils.metrics import incr_metrics
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY = "story:index:lock"
+CURSOR_KEY = "story:index:cursor"
+
+# Запись индекса: отпечаток текста, время, компания и сюжет, к которому он отнесён
+INDEX_DTYPE = np.dtype([
+    ("simhash", "<u8"),
+    ("ts", "<f8"),
+    ("company", "<u4"),
+    ("story_id", "S32"),
+])
+
+_WORD_RE = re.compile(r"\w+")
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little")
+
+def _company_hash(company: str) -> int:
+    return _hash64(company.lower().strip()) & 0xFFFFFFFF
+
+def simhash(text: str) -> int:
+    """
+    64-битный SimHash по словам и парам слов: у пересказов одной новости
+    (Reuters / CNBC / Google News) отпечатки отличаются в немногих битах.
+    Шинглы длиннее на коротких постах слишком чувствительны к правкам.
+    """
+    words = _WORD_RE.findall((text or "").lower())
+    if not words:
+        return 0
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    hashes = np.array([_hash64(f) for f in features], dtype=np.uint64)
+    bits = (hashes[:, None] >> np.arange(64, dtype=np.uint64)) & np.uint64(1)
+    votes = bits.sum(axis=0) * 2 > len(features)
+    return int(np.packbits(votes[::-1]).view(">u8")[0])
+
+def hamming(a: np.ndarray, b: int) -> np.ndarray:
+    """Расстояние Хэмминга от каждого отпечатка массива до b."""
+    x = np.bitwise_xor(a, np.uint64(b))
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(x)
+    return np.unpackbits(x.view(np.uint8)).reshape(-1, 64).sum(axis=1)
+
+class StoryIndex:
+    """
+    Индекс недавних элементов для поиска почти-дублей: кольцевой буфер
+    в файле .npy, открытом через memmap (общий для воркеров на одном томе data/).
+    Позиция записи и блокировка - в Redis.
+    """
+
+    def __init__(self, path: str, capacity: int):
+        self.path = path
+        self.capacity = capacity
+        self._index = None
+        self._embeddings = None
+
+    @property
+    def index(self) -> np.ndarray:
+        if self._index is None:
+            if not os.path.exists(self.path):
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                index = np.lib.format.open_memmap(self.path, mode="w+", dtype=INDEX_DTYPE, shape=(self.capacity,))
+                index.flush()
+            self._index = np.load(self.path, mmap_mode="r+")
+        return self._index
+
+    def embeddings(self, dim: int) -> np.ndarray:
+        """Матрица эмбеддингов (float16) рядом с индексом - только если они включены."""
+        if self._embeddings is None:
+            path = self.path.replace(".npy", f".emb{dim}.npy")
+            if not os.path.exists(path):
+                emb = np.lib.format.open_memmap(path, mode="w+", dtype=np.float16, shape=(len(self.index), dim))
+                emb.flush()
+            self._embeddings = np.load(path, mmap_mode="r+")
+        return self._embeddings
+
+    def _window(self, company: int, now: float) -> np.ndarray:
+        index = self.index
+        since = now - settings.DEDUP_WINDOW_HOURS * 3600
+        return np.flatnonzero((index["ts"] >= since) & (index["company"] == company))
+
+    def find_story(self, fingerprint: int, company: int, embedding: np.ndarray | None, now: float) -> str | None:
+        """story_id ближайшего недавнего элемента той же компании или None."""
+        candidates = self._window(company, now)
+        if not len(candidates):
+            return None
+        distances = hamming(self.index["simhash"][candidates], fingerprint)
+        best = int(np.argmin(distances))
+        if distances[best] <= settings.DEDUP_SIMHASH_DISTANCE:
+            return self.index["story_id"][candidates[best]].decode()
+
+        if embedding is not None:
+            vectors = self.embeddings(len(embedding))[candidates].astype(np.float32)
+            norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(embedding)
+            similarity = vectors @ embedding / np.where(norms == 0, 1, norms)
+            best = int(np.argmax(similarity))
+            if similarity[best] >= settings.DEDUP_EMBED_THRESHOLD:
+                return self.index["story_id"][candidates[best]].decode()
+        return None
+
+    def add(self, slot: int, fingerprint: int, company: int, story_id: str,
+            embedding: np.ndarray | None, now: float) -> None:
+        slot %= len(self.index)
+        self.index[slot] = (fingerprint, now, company, story_id.encode())
+        if embedding is not None:
+            self.embeddings(len(embedding))[slot] = embedding
+        self.index.flush()
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_story_index() -> StoryIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = StoryIndex(settings.DEDUP_INDEX_PATH, settings.DEDUP_INDEX_CAPACITY)
+    return _index
+
+def _embed(text: str) -> np.ndarray | None:
+    if not settings.DEDUP_EMBEDDINGS_ENABLED:
+        return None
+    from app.utils.ollama_client import get_ollama_client
+    try:
+        vector = get_ollama_client().embed(text[:2000], settings.DEDUP_EMBED_MODEL)
+        return np.asarray(vector, dtype=np.float32)
+    except Exception as e:
+        logger.warning(f"⚠️ Embedding for dedup failed, using SimHash only: {e}")
+        return None
+
+def assign_stories(items: list[dict]) -> tuple[list[dict], list[dict]]:
+    """
+    Относит элементы к сюжетам (story_id) и делит на первые в сюжете
+    (идут в LLM и уведомления) и почти-дубли уже известных сюжетов.
+    Сюжет ищется среди элементов той же компании за DEDUP_WINDOW_HOURS.
+    Если индекс недоступен - все элементы считаются новыми.
+    """
+    if not settings.DEDUP_ENABLED or not items:
+        return items, []
+
+    # Отпечатки и эмбеддинги (запросы к Ollama) - до блокировки индекса
+    prints = []
+    for item in items:
+        text = f"{item.get('title', '')} {item.get('text', '')}"
+        prints.append((simhash(text), _company_hash(item.get("company", "")), _embed(text)))
+
+    firsts, duplicates = [], []
+    try:
+        index = get_story_index()
+        client = get_redis_client()
+        with client.lock(LOCK_KEY, timeout=30, blocking_timeout=10):
+            for item, (fingerprint, company, embedding) in zip(items, prints):
+                now = time.time()
+                story_id = index.find_story(fingerprint, company, embedding, now)
+                if story_id:
+                    duplicates.append(item)
+                else:
+                    story_id = uuid.uuid4().hex
+                    firsts.append(item)
+                item["story_id"] = story_id
+                index.add(client.incr(CURSOR_KEY) - 1, fingerprint, company, story_id, embedding, now)
+    except Exception as e:
+        logger.warning(f"⚠️ Story index unavailable, skipping dedup: {e}")
+        return items, []
+
+    incr_metrics("dedup", {"checked": len(items), "new_stories": len(firsts), "duplicates": len(duplicates)})
+    if duplicates:
+        logger.info(f"🧩 Dedup: {len(duplicates)} near-duplicates of known stories")
+    return firsts, duplicates
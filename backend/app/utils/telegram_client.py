@@ -0,0 +1,116 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+from telethon import TelegramClient
+from telethon.tl.types import InputPeerChannel
+from app.config import settings
+from app.redis_client import get_redis_client
+from app.utils.metrics import incr_metrics
+
+logger = logging.getLogger(__name__)
+
+SESSION_FILE = os.path.join("data", "telegram.session")
+ENTITY_KEY_PREFIX = "telegram:entity:"
+
+_loop = None
+_loop_lock = threading.Lock()
+_client = None
+_client_lock = None
+_entities = {}
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """
+    Постоянный event loop процесса в отдельном потоке: клиент Telethon
+    живёт в нём между задачами и не переподключается на каждый канал.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="telegram-loop", daemon=True).start()
+    return _loop
+
+def run_telegram(coro, timeout: float | None = None):
+    """Выполняет корутину в loop Telegram-клиента и ждёт результат (из синхронной задачи Celery)."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result(timeout)
+
+async def get_telegram_client() -> TelegramClient:
+    """
+    Общий для процесса подключённый клиент. Соединение и авторизация
+    проверяются один раз; после обрыва клиент переподключается.
+    """
+    global _client, _client_lock
+    if _client_lock is None:
+        _client_lock = asyncio.Lock()
+    async with _client_lock:
+        if _client is None:
+            _client = TelegramClient(
+                SESSION_FILE, settings.TELEGRAM_API_ID, settings.TELEGRAM_API_HASH,
+                # Короткие FloodWait Telethon переждёт сам, длинные - пробрасывает
+                flood_sleep_threshold=settings.TELEGRAM_FLOOD_SLEEP_THRESHOLD,
+            )
+        if not _client.is_connected():
+            await _client.connect()
+            if not await _client.is_user_authorized():
+                await _client.disconnect()
+                raise RuntimeError("Telegram session not authorized. Run auth_telegram.py first!")
+            logger.info("📡 Telegram client connected")
+    return _client
+
+async def resolve_channel(client: TelegramClient, username: str) -> InputPeerChannel:
+    """
+    InputPeer канала по username. Кэш в памяти процесса и в Redis (общий для воркеров),
+    чтобы повторные запуски не тратили запросы ResolveUsername.
+    """
+    username = username.lstrip("@").lower()
+    peer = _entities.get(username)
+    if peer is not None:
+        return peer
+
+    try:
+        raw = get_redis_client().get(ENTITY_KEY_PREFIX + username)
+    except Exception as e:
+        logger.warning(f"⚠️ Telegram entity cache unavailable: {e}")
+        raw = None
+    if raw:
+        data = json.loads(raw)
+        peer = InputPeerChannel(data["id"], data["access_hash"])
+        incr_metrics("telegram_entities", {"cache_hits": 1})
+    else:
+        peer = await client.get_input_entity(username)
+        incr_metrics("telegram_entities", {"resolved": 1})
+        if isinstance(peer, InputPeerChannel):
+            try:
+                get_redis_client().set(
+                    ENTITY_KEY_PREFIX + username,
+                    json.dumps({"id": peer.channel_id, "access_hash": peer.access_hash}),
+                    ex=settings.TELEGRAM_ENTITY_TTL_DAYS * 86400,
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to cache Telegram entity @{username}: {e}")
+    _entities[username] = peer
+    return peer
+
+def forget_channel(username: str) -> None:
+    """Сбрасывает кэш сущности (канал переименован / access_hash устарел)."""
+    username = username.lstrip("@").lower()
+    _entities.pop(username, None)
+    try:
+        get_redis_client().delete(ENTITY_KEY_PREFIX + username)
+    except Exception:
+        pass
+
+async def _disconnect():
+    if _client is not None and _client.is_connected():
+        await _client.disconnect()
+
+def shutdown_telegram() -> None:
+    """Отключает клиента при остановке воркера."""
+    if _loop is None:
+        return
+    try:
+        run_telegram(_disconnect(), timeout=10)
+    except Exception as e:
+        logger.warning(f"⚠️ Telegram client disconnect failed: {e}")
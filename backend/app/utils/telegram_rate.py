@@ -0,0 +1,94 @@
+import json
+import logging
+import math
+import time
+from app.config import settings
+from app.redis_client import get_redis_client
+from app.utils.metrics import incr_metrics
+
+logger = logging.getLogger(__name__)
+
+# Общие для всех воркеров: одна сессия Telegram - один бюджет запросов и один FloodWait
+FLOOD_KEY = "telegram:flood"
+BUDGET_KEY_PREFIX = "telegram:budget:"
+DEFERRED_KEY = "telegram:deferred"
+
+# Сколько сообщений Telethon получает за один запрос GetHistory
+MESSAGES_PER_REQUEST = 100
+
+def flood_remaining(now: float | None = None) -> float:
+    """Сколько секунд ещё действует FloodWait аккаунта (0 - запросы разрешены)."""
+    until = get_redis_client().zscore(FLOOD_KEY, "until") or 0
+    return max(0.0, until - (now or time.time()))
+
+def record_flood(seconds: int) -> None:
+    """Запоминает FloodWait для всех воркеров; срок только продлевается, не сокращается."""
+    until = time.time() + seconds
+    get_redis_client().zadd(FLOOD_KEY, {"until": until}, gt=True)
+    incr_metrics("telegram_rate", {"flood": 1, "flood_seconds": int(seconds)})
+    logger.warning(f"🌊 Telegram FloodWait {seconds}s - all workers pause")
+
+def _window(now: float) -> tuple[str, float]:
+    minute = int(now // 60)
+    return f"{BUDGET_KEY_PREFIX}{minute}", (minute + 1) * 60 - now
+
+def acquire(cost: int = 1) -> float:
+    """
+    Берёт cost запросов из бюджета текущей минуты (TELEGRAM_REQUESTS_PER_MINUTE).
+    Возвращает 0, если запросы можно делать, иначе - через сколько секунд повторить.
+    Redis недоступен - не блокируем (FloodWait тогда переждёт сам Telethon).
+    """
+    now = time.time()
+    try:
+        wait = flood_remaining(now)
+        if wait:
+            return wait
+        key, window_left = _window(now)
+        pipe = get_redis_client().pipeline(transaction=False)
+        pipe.incrby(key, cost)
+        pipe.expire(key, 120)
+        used = pipe.execute()[0]
+    except Exception as e:
+        logger.warning(f"⚠️ Telegram rate limiter unavailable: {e}")
+        return 0.0
+    if used > settings.TELEGRAM_REQUESTS_PER_MINUTE:
+        return window_left
+    return 0.0
+
+def charge_pages(messages: int) -> None:
+    """Досписывает запросы, которые Telethon сделал при листании длинной истории."""
+    extra = math.ceil(messages / MESSAGES_PER_REQUEST) - 1
+    if extra <= 0:
+        return
+    key, _ = _window(time.time())
+    try:
+        get_redis_client().incrby(key, extra)
+    except Exception:
+        pass
+
+def defer_channel(company: str, channel: str, wait: float) -> None:
+    """Откладывает канал: его дочитает retry_deferred_channels, когда ограничение снимется."""
+    member = json.dumps({"company": company, "channel": channel}, sort_keys=True)
+    try:
+        get_redis_client().zadd(DEFERRED_KEY, {member: time.time() + wait}, gt=True)
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to defer @{channel}: {e}")
+        return
+    incr_metrics("telegram_rate", {"deferred": 1})
+    logger.info(f"⏳ @{channel} ({company}) deferred for {wait:.0f}s")
+
+def take_due_channels(limit: int = 100) -> dict[str, list[str]]:
+    """Забирает отложенные каналы, чей срок наступил: компания -> каналы."""
+    client = get_redis_client()
+    due = client.zrangebyscore(DEFERRED_KEY, "-inf", time.time(), start=0, num=limit)
+    if not due:
+        return {}
+    client.zrem(DEFERRED_KEY, *due)
+    channels = {}
+    for member in due:
+        entry = json.loads(member)
+        channels.setdefault(entry["company"], []).append(entry["channel"])
+    return channels
+
+def deferred_count() -> int:
+    return get_redis_client().zcard(DEFERRED_KEY)
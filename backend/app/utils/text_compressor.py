@@ -0,0 +1,111 @@
+import math
+import re
+from collections import Counter
+from app.utils.tokens import estimate_tokens
+
+# Конец предложения: знак препинания + пробел + заглавная буква / кавычка / цифра, либо перевод строки
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?…])\s+(?=[\"«“(\[A-ZА-ЯЁ0-9])|\n+")
+_WORD_RE = re.compile(r"[a-zа-яё0-9]+", re.IGNORECASE)
+
+# Обвязка страниц, которую trafilatura иногда оставляет в тексте: строка целиком -
+# служебная надпись, либо короткая строка с устойчивой фразой (только целыми словами,
+# иначе пропадают новости про подписчиков, cookie или «подписал соглашение»)
+_BOILERPLATE_LINE_RE = re.compile(
+    r"(?:subscribe|sign up|advertisement|read more|related articles?|follow us|share(?: this)?|click here|"
+    r"подпишитесь|подписаться|реклама|читайте также|поделиться|©[^.!?]{0,100})"
+    r"[\s.!:…»>-]*",
+    re.IGNORECASE,
+)
+_BOILERPLATE_PHRASE_RE = re.compile(
+    r"\b(?:subscribe to (?:our|the) newsletter|sign up for (?:our|the) newsletter|all rights reserved|"
+    r"(?:we|this (?:site|website)) uses? cookies|"
+    r"подпишитесь на (?:наш|нас)|все права защищены|мы используем (?:файлы )?cookie)\b",
+    re.IGNORECASE,
+)
+
+# Служебные слова не должны поднимать вес предложения
+_STOP_WORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the this to was were will with
+и в во на не что с со по к ко из за от для как а но же ли бы то это он она они его её их был была были
+""".split())
+
+# Первые предложения новости (лид) обычно содержат главное - берём их всегда
+LEAD_SENTENCES = 2
+
+def split_sentences(text: str) -> list[str]:
+    return [s.strip() for s in _SENTENCE_SPLIT_RE.split(text or "") if s and s.strip()]
+
+def _is_boilerplate(sentence: str) -> bool:
+    if _BOILERPLATE_LINE_RE.fullmatch(sentence):
+        return True
+    # Длинное предложение с такой фразой может быть новостью - режем только короткие
+    return len(sentence) < 200 and bool(_BOILERPLATE_PHRASE_RE.search(sentence))
+
+def _words(sentence: str) -> list[str]:
+    return [w for w in _WORD_RE.findall(sentence.lower()) if w not in _STOP_WORDS]
+
+def rank_sentences(sentences: list[str], keywords: list[str] = ()) -> list[float]:
+    """
+    TF-IDF-вес предложений: предложение - «документ», вес - сумма tf-idf его слов,
+    нормированная на корень длины. Предложения с ключевыми словами (компания) весомее.
+    """
+    words = [_words(s) for s in sentences]
+    df = Counter(w for ws in words for w in set(ws))
+    total = len(sentences)
+    keywords = [k.lower() for k in keywords if k]
+
+    scores = []
+    for sentence, ws in zip(sentences, words):
+        if not ws:
+            scores.append(0.0)
+            continue
+        tf = Counter(ws)
+        score = sum(count * math.log(1 + total / df[w]) for w, count in tf.items()) / math.sqrt(len(ws))
+        if any(k in sentence.lower() for k in keywords):
+            score *= 1.5
+        scores.append(score)
+    return scores
+
+def compress_text(text: str, token_budget: int, keywords: list[str] = ()) -> tuple[str, dict]:
+    """
+    Сжимает текст статьи под бюджет токенов перед отправкой в LLM.
+
+    Убирает обвязку (подписки, cookie, «читайте также») и повторы. Если текст
+    всё ещё не помещается - оставляет лид и самые весомые по TF-IDF предложения
+    в исходном порядке. Возвращает (текст, {"tokens_in", "tokens_out"}).
+    """
+    tokens_in = estimate_tokens(text)
+    seen = set()
+    sentences = []
+    for i, sentence in enumerate(split_sentences(text)):
+        key = sentence.lower()
+        # Лид не выбрасываем никогда: в нём главное, даже если похож на обвязку
+        if key in seen or (i > 0 and _is_boilerplate(sentence)):
+            continue
+        seen.add(key)
+        sentences.append(sentence)
+
+    cleaned = " ".join(sentences)
+    if estimate_tokens(cleaned) <= token_budget:
+        return cleaned, {"tokens_in": tokens_in, "tokens_out": estimate_tokens(cleaned)}
+
+    costs = [estimate_tokens(s) for s in sentences]
+    scores = rank_sentences(sentences, keywords)
+    chosen, used = set(), 0
+    lead = list(range(min(LEAD_SENTENCES, len(sentences))))
+    ranked = sorted(range(len(sentences)), key=lambda i: scores[i], reverse=True)
+    for i in lead + ranked:
+        if i in chosen or used + costs[i] > token_budget:
+            continue
+        chosen.add(i)
+        used += costs[i]
+
+    if not chosen and sentences:
+        # Даже первое предложение не влезает - режем его по словам
+        words = sentences[0].split()
+        while words and estimate_tokens(" ".join(words)) > token_budget:
+            words = words[: len(words) * 3 // 4]
+        compressed = " ".join(words)
+    else:
+        compressed = " ".join(sentences[i] for i in sorted(chosen))
+    return compressed, {"tokens_in": tokens_in, "tokens_out": estimate_tokens(compressed)}
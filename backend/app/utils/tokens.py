@@ -0,0 +1,17 @@
+import re
+
+# Слова и отдельные знаки препинания - грубое приближение к токенам BPE
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+# В среднем токенов на слово у токенизаторов Mistral/Llama
+# (кириллица режется мельче латиницы)
+TOKENS_PER_WORD_LATIN = 1.3
+TOKENS_PER_WORD_CYRILLIC = 2.2
+
+def estimate_tokens(text: str) -> int:
+    """Оценка числа токенов без загрузки токенизатора модели."""
+    if not text:
+        return 0
+    pieces = _TOKEN_RE.findall(text)
+    cyrillic = sum(1 for p in pieces if '\u0400' <= p[0] <= '\u04FF')
+    return int((len(pieces) - cyrillic) * TOKENS_PER_WORD_LATIN + cyrillic * TOKENS_PER_WORD_CYRILLIC) + 1
@@ -0,0 +1,33 @@
+import re
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Параметры, которые не меняют содержимое страницы (трекинг, рефералы)
+TRACKING_PARAMS = {"fbclid", "gclid", "yclid", "igshid", "mc_cid", "mc_eid", "ref", "ref_src", "cmpid", "ocid", "oc"}
+TRACKING_PREFIXES = ("utm_",)
+
+def canonicalize_url(url: str) -> str:
+    """
+    Приводит URL к канонической форме, чтобы одна и та же статья
+    не считалась новой из-за трекинг-параметров, якоря или регистра хоста.
+    """
+    url = url.strip()
+    parts = urlsplit(url)
+    if not parts.scheme or not parts.netloc:
+        return url
+
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme == "http" and netloc.endswith(":80")) or (scheme == "https" and netloc.endswith(":443")):
+        netloc = netloc.rsplit(":", 1)[0]
+
+    path = re.sub(r"/{2,}", "/", parts.path) or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path[:-1]
+
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    ]
+    query.sort()
+
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))
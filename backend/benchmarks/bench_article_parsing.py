@@ -0,0 +1,60 @@
+"""
+Замер CPU-времени на разбор одной статьи на сохранённых страницах (benchmarks/corpus).
+
+Запуск из backend/:
+    python -m benchmarks.bench_article_parsing [--rounds 20]
+
+before - прежний путь: trafilatura разбирает строку сама, затем поиск даты
+         (benchmarks/legacy.py) строит отдельное дерево BeautifulSoup
+         (html.parser) и дважды вызывает get_text() по всему документу.
+after  - parse_article_html: одно дерево lxml для trafilatura и поиска даты.
+"""
+import argparse
+import time
+from pathlib import Path
+from trafilatura import extract
+from app.tasks.rss_task import parse_article_html
+from app.utils.date_utils import clear_date_cache
+from benchmarks.legacy import legacy_extract_date
+
+CORPUS_DIR = Path(__file__).parent / "corpus"
+
+def before(html: bytes, url: str) -> None:
+    text = html.decode("utf-8")
+    if extract(text, include_comments=False, only_with_metadata=False, url=url):
+        legacy_extract_date(text, url)
+
+def after(html: bytes, url: str) -> None:
+    # Каждый раунд - как новая статья, без кэша дат по URL
+    clear_date_cache()
+    parse_article_html(html, url)
+
+def measure(fn, pages: list[tuple[str, bytes]], rounds: int) -> float:
+    """Среднее CPU-время на статью, мс."""
+    start = time.process_time()
+    for _ in range(rounds):
+        for url, html in pages:
+            fn(html, url)
+    return (time.process_time() - start) * 1000 / (rounds * len(pages))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    pages = [
+        (f"https://example.com/news/{path.stem}", path.read_bytes())
+        for path in sorted(CORPUS_DIR.glob("*.html"))
+    ]
+    # Прогрев: импорты и кэши trafilatura / dateparser
+    measure(before, pages, 1)
+    measure(after, pages, 1)
+
+    before_ms = measure(before, pages, args.rounds)
+    after_ms = measure(after, pages, args.rounds)
+    print(f"pages: {len(pages)}, rounds: {args.rounds}")
+    print(f"before: {before_ms:.2f} ms CPU per article")
+    print(f"after:  {after_ms:.2f} ms CPU per article ({before_ms / after_ms:.2f}x)")
+
+if __name__ == "__main__":
+    main()
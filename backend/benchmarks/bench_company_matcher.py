@@ -0,0 +1,82 @@
+"""
+Поиск упоминаний компаний в сообщениях: автомат Ахо-Корасик против
+прежней проверки подстрокой по каждой компании и синониму.
+
+Запуск из backend/:
+    python -m benchmarks.bench_company_matcher [--companies 1000] [--messages 100000]
+
+Прежний способ на всём корпусе идёт минутами, поэтому меряется на первых
+--legacy-messages сообщениях и пересчитывается на весь корпус.
+Результат при 1000 x 100000: ~30 мкс на сообщение против ~1 мс.
+"""
+import argparse
+import random
+import time
+from app.utils.company_matcher import CompanyMatcher
+
+WORDS = (
+    "market shares quarter revenue growth report analysts said company new launch "
+    "deal investors price chips cloud software demand sales profit outlook record "
+    "рынок акции выручка компания запуск сделка прибыль отчёт спрос аналитики"
+).split()
+
+def make_companies(count: int) -> dict[str, list[str]]:
+    companies = {}
+    for i in range(count):
+        name = f"company{i}"
+        companies[name] = [f"product{i}", f"ticker{i}", f"ceo{i} surname{i}"]
+    return companies
+
+def make_messages(count: int, companies: dict, rng: random.Random) -> list[str]:
+    names = list(companies)
+    messages = []
+    for _ in range(count):
+        words = rng.choices(WORDS, k=rng.randint(15, 60))
+        # Примерно в половине сообщений - одно-два упоминания
+        for _ in range(rng.choice((0, 0, 1, 2))):
+            company = rng.choice(names)
+            words.insert(rng.randrange(len(words)), rng.choice([company, *companies[company]]))
+        messages.append(" ".join(words))
+    return messages
+
+def legacy_match(text: str, companies: dict) -> set[str]:
+    """Прежний is_relevant_to_company, вызванный для каждой компании."""
+    text_lower = text.lower()
+    return {
+        company for company, aliases in companies.items()
+        if company in text_lower or any(alias in text_lower for alias in aliases)
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--companies", type=int, default=1000)
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--legacy-messages", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    companies = make_companies(args.companies)
+    messages = make_messages(args.messages, companies, rng)
+
+    started = time.perf_counter()
+    matcher = CompanyMatcher(companies)
+    build_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    matched = sum(1 for text in messages if matcher.match(text))
+    scan_s = time.perf_counter() - started
+
+    sample = messages[:args.legacy_messages]
+    started = time.perf_counter()
+    for text in sample:
+        legacy_match(text, companies)
+    legacy_per_msg = (time.perf_counter() - started) / len(sample)
+
+    print(f"{args.companies} companies x {args.messages} messages, {matched} messages with mentions")
+    print(f"automaton build: {build_s * 1000:.0f} ms")
+    print(f"automaton scan:  {scan_s:.1f} s ({scan_s / len(messages) * 1e6:.1f} us/msg)")
+    print(f"legacy scan:     {legacy_per_msg * 1e6:.1f} us/msg "
+          f"(~{legacy_per_msg * len(messages):.0f} s for all messages)")
+
+if __name__ == "__main__":
+    main()
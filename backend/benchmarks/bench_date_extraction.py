@@ -0,0 +1,61 @@
+"""
+Задержка поиска даты на страницу по корпусу benchmarks/corpus.
+
+Запуск из backend/:
+    python -m benchmarks.bench_date_extraction [--rounds 20]
+
+Для каждой страницы печатает время прежней реализации (benchmarks/legacy.py),
+новой без кэша (с разбором HTML) и повторного вызова из кэша по URL,
+а также сверяет найденную дату с corpus/expected.json.
+Корректность на граничных случаях - app/tests/test_date_utils.py.
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from app.utils.date_utils import clear_date_cache, extract_data_from_html, extract_date_from_tree
+from app.utils.html_utils import parse_html
+from benchmarks.legacy import legacy_extract_date
+
+CORPUS_DIR = Path(__file__).parent / "corpus"
+
+def per_call_ms(fn, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) * 1000 / rounds
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    expected = json.loads((CORPUS_DIR / "expected.json").read_text())
+    failed = 0
+    print(f"{'page':<18}{'legacy ms':>11}{'new ms':>9}{'cached ms':>11}  date")
+    for name, want in sorted(expected.items()):
+        html = (CORPUS_DIR / name).read_bytes()
+        text = html.decode("utf-8")
+        url = f"https://example.com/news/{Path(name).stem}"
+
+        def cold():
+            clear_date_cache()
+            return extract_data_from_html(html, url)
+
+        legacy_ms = per_call_ms(lambda: legacy_extract_date(text, url), args.rounds)
+        new_ms = per_call_ms(cold, args.rounds)
+        tree = parse_html(html)
+        extract_date_from_tree(tree, url)
+        cached_ms = per_call_ms(lambda: extract_date_from_tree(tree, url), args.rounds)
+
+        got = cold()
+        ok = got is not None and got.date().isoformat() == want
+        failed += not ok
+        print(f"{name:<18}{legacy_ms:>11.2f}{new_ms:>9.2f}{cached_ms:>11.4f}  "
+              f"{got.isoformat() if got else None} {'OK' if ok else f'FAIL (want {want})'}")
+
+    if failed:
+        raise SystemExit(f"{failed} page(s) with wrong date")
+
+if __name__ == "__main__":
+    main()
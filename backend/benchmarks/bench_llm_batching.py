@@ -0,0 +1,56 @@
+"""
+Пропускная способность LLM-стадии: по одному элементу против пачек.
+Нужен живой Ollama (OLLAMA_HOST) с моделью по умолчанию.
+
+Запуск из backend/:
+    python -m benchmarks.bench_llm_batching [--items 12]
+
+В проде те же цифры копятся в группе llm_throughput на GET /metrics
+(single_items / single_seconds против batch_items / batch_seconds).
+"""
+import argparse
+import time
+from app.tasks.llm_task import (
+    build_batch_prompt, call_ollama, parse_batch_result, plan_llm_batches, summarize_item
+)
+
+SAMPLE_TEXTS = [
+    "Apple shares rose 3% after the company reported record iPhone sales in China.",
+    "NVIDIA announced a new data-center GPU with twice the memory bandwidth of its predecessor.",
+    "Tesla recalls 12,000 Model Y vehicles over a seat-belt warning issue.",
+    "Microsoft to invest $5 billion in cloud infrastructure in Japan over two years.",
+    "Компания Яндекс запустила новую версию голосового помощника Алиса.",
+    "Amazon cuts prices on Echo devices ahead of the holiday season.",
+    "Meta faces a new EU antitrust investigation over its advertising practices.",
+    "Google releases an update to Chrome fixing two actively exploited vulnerabilities.",
+]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=12)
+    args = parser.parse_args()
+
+    items = [{"text": SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]} for i in range(args.items)]
+
+    started = time.monotonic()
+    for item in items:
+        summarize_item(dict(item))
+    single_s = time.monotonic() - started
+
+    batches, singles = plan_llm_batches([(str(i), item) for i, item in enumerate(items)])
+    started = time.monotonic()
+    parsed = 0
+    for batch in batches:
+        texts = [items[int(i)]["text"] for i in batch]
+        parsed += len(parse_batch_result(call_ollama(build_batch_prompt(texts)), len(texts)))
+    for i in singles:
+        summarize_item(dict(items[int(i)]))
+    batch_s = time.monotonic() - started
+
+    print(f"items: {len(items)}, batches: {[len(b) for b in batches]}, singles: {len(singles)}")
+    print(f"single: {len(items) / single_s:.3f} items/s ({single_s:.1f} s)")
+    print(f"batch:  {len(items) / batch_s:.3f} items/s ({batch_s:.1f} s), "
+          f"parsed from batches: {parsed}/{len(items) - len(singles)}")
+
+if __name__ == "__main__":
+    main()